@@ -2,12 +2,23 @@
 Core module - Logique métier du scraping immobilier
 """
 
-from .models import ScraperConfig
-from .scraper import SeLogerScraper
-from .cleaner import SeLogerDataProcessor
-
 __all__ = [
     "ScraperConfig",
     "SeLogerScraper",
     "SeLogerDataProcessor",
 ]
+
+# Imports paresseux : `from core.x import ...` ne doit pas charger requests,
+# pandas ni shapely pour des modules qui n'en ont pas besoin
+_LAZY = {
+    "ScraperConfig": ".models",
+    "SeLogerScraper": ".scraper",
+    "SeLogerDataProcessor": ".cleaner",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+        return getattr(importlib.import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
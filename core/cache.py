@@ -0,0 +1,60 @@
+# core/cache.py
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Cache LRU en mémoire, borné par un budget d'octets et partagé entre threads.
+
+    `sizeof(value)` estime la taille d'une valeur ; elle n'est calculée
+    qu'une fois, à l'insertion.
+    """
+
+    def __init__(self, max_bytes: int, sizeof):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            self._entries.move_to_end(key)
+            return item[0]
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+            self._entries[key] = (value, size)
+            self._size += size
+            # On garde toujours l'entrée la plus récente, même si elle dépasse le budget
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, (_, old_size) = self._entries.popitem(last=False)
+                self._size -= old_size
+        return value
+
+    def discard(self, predicate):
+        """Supprime les entrées dont la clé satisfait `predicate`."""
+        with self._lock:
+            for key in [k for k in self._entries if predicate(k)]:
+                _, size = self._entries.pop(key)
+                self._size -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    def __len__(self):
+        return len(self._entries)
@@ -3,7 +3,6 @@ import json
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from shapely.geometry import shape
 
 
 class SeLogerDataProcessor:
@@ -151,7 +150,7 @@ class SeLogerDataProcessor:
         )
 
     @staticmethod
-    def _centroid(row):
+    def _centroid(row, shape):
         coords = row["geometry_coords"]
         if isinstance(coords, str):
             try:
@@ -174,8 +173,9 @@ class SeLogerDataProcessor:
         df["creation_date"] = pd.to_datetime(df["creation_date"], errors="coerce")
         df["update_date"] = pd.to_datetime(df["update_date"], errors="coerce")
 
-        # Géométrie
-        df[["lon", "lat"]] = df.apply(self._centroid, axis=1)
+        # Géométrie (import local : shapely n'est utile qu'au nettoyage)
+        from shapely.geometry import shape
+        df[["lon", "lat"]] = df.apply(self._centroid, axis=1, args=(shape,))
 
         # Catégories
         for c in self.cat_cols:
@@ -200,6 +200,10 @@ class SeLogerDataProcessor:
 
         df.to_csv(output_path, index=False)
 
+        # Index spatial persisté avec le CSV (positions alignées sur ses lignes)
+        from core.spatial import save_spatial_index
+        save_spatial_index(df.reset_index(drop=True), output_path)
+
         return df
     def _process_and_save(self, json_files, output_path):
         df_raw = self._merge_jsons(json_files)
@@ -0,0 +1,208 @@
+# core/commune_index.py
+"""
+Recherche des communes françaises au fil de la frappe.
+
+L'index est construit une fois par processus à partir de
+`data/cleaned_communes_francaises.csv` (~33k communes) et sert toutes les
+sessions :
+
+- préfixe : clés canoniques (`fold_name`) triées, une par début de mot
+  ("etienne" trouve Saint-Étienne), parcourues par dichotomie ; le top
+  de chaque préfixe est mémorisé (les préfixes courts comme "sa" ou
+  "saint" couvrent des milliers de communes) ;
+- trigrammes : listes compactes d'identifiants par trigramme, pour les
+  fautes de frappe quand le préfixe ne donne rien.
+
+Les résultats sont classés par population (villes connues de
+`merged_cities_communes.csv`) puis par longueur du nom. Un numéro de
+département dans la requête ("saint denis 93") filtre les homonymes.
+"""
+
+import bisect
+import csv
+import heapq
+import re
+import threading
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from core.utils import fold_name
+
+COMMUNES_PATH = Path("data/cleaned_communes_francaises.csv")
+POPULATION_PATH = Path("data/merged_cities_communes.csv")
+
+DEFAULT_LIMIT = 8
+
+# Similarité minimale (Jaccard sur les trigrammes) du repli approché
+MIN_TRIGRAM_SCORE = 0.3
+
+_DEPARTEMENT = re.compile(r"^(\d{2,3}|2a|2b)$")
+
+# Régions nommées différemment dans merged_cities_communes.csv
+REGION_ALIASES = {"corsica": "corse"}
+
+
+@dataclass(frozen=True)
+class Commune:
+    name: str
+    departement: str
+    departement_name: str
+    population: int = 0
+
+    @property
+    def label(self) -> str:
+        return f"{self.name} ({self.departement})"
+
+
+def _trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _population_by_departement(path: Path, departements: dict) -> dict:
+    """
+    Population de `merged_cities_communes.csv` par (nom canonique, département).
+
+    Le département du fichier vient d'une jointure par nom et peut désigner un
+    homonyme : il n'est retenu que s'il est dans la région de la ville, sinon
+    on prend l'unique commune homonyme de cette région. Ville ambiguë : ignorée.
+
+    Args:
+        departements: {nom canonique: [(département, région canonique), ...]}
+    """
+    population = {}
+    if not path.exists():
+        return population
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            folded = fold_name(row["city"])
+            region = fold_name(row["admin_name"])
+            region = REGION_ALIASES.get(region, region)
+            candidates = [dep for dep, r in departements.get(folded, ()) if r == region]
+            if row["Département (numéro)"] in candidates:
+                departement = row["Département (numéro)"]
+            elif len(candidates) == 1:
+                departement = candidates[0]
+            else:
+                continue
+            population[(folded, departement)] = int(float(row["population"] or 0))
+    return population
+
+
+class CommuneIndex:
+    def __init__(self, communes_path: Path = COMMUNES_PATH, population_path: Path = POPULATION_PATH):
+        communes = {}
+        departements = {}
+        with open(communes_path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                # "Lyon 01" → aussi "Lyon"
+                departement = row["Département (numéro)"]
+                region = fold_name(row["Région"])
+                for name in dict.fromkeys((row["Commune"], row["cleaned_city_name"])):
+                    folded = fold_name(name)
+                    if (folded, departement) not in communes:
+                        communes[(folded, departement)] = (name.strip(), departement, row["Département (nom)"])
+                        departements.setdefault(folded, []).append((departement, region))
+
+        # Homonymes d'une même région : chacun sa population (clé : département)
+        population = _population_by_departement(population_path, departements)
+        communes = [Commune(*fields, population.get(key, 0)) for key, fields in communes.items()]
+
+        # Identifiant = rang : plus petit = plus pertinent à score égal
+        self.communes = sorted(communes, key=lambda c: (-c.population, len(c.name), c.name))
+        self._folded = [fold_name(c.name) for c in self.communes]
+
+        # Une clé par début de mot, triée pour la recherche par dichotomie
+        entries = sorted(
+            (" ".join(words[i:]), cid)
+            for cid, key in enumerate(self._folded)
+            for words in [key.split()]
+            for i in range(len(words))
+        )
+        self._keys = [key for key, _ in entries]
+        self._ids = array("I", (cid for _, cid in entries))
+
+        postings = {}
+        self._sizes = array("H")
+        for cid, key in enumerate(self._folded):
+            trigrams = _trigrams(key)
+            self._sizes.append(len(trigrams))
+            for trigram in trigrams:
+                postings.setdefault(trigram, array("I")).append(cid)
+        self._trigrams = postings
+
+        self._top = lru_cache(maxsize=4096)(self._rank)
+
+    def __len__(self) -> int:
+        return len(self.communes)
+
+    # ------------------------------------------------------------------
+    # RECHERCHE
+    # ------------------------------------------------------------------
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> list:
+        """Communes les plus pertinentes pour la saisie (liste vide si rien)."""
+        words = fold_name(query).split()
+        departement = words.pop().upper() if len(words) > 1 and _DEPARTEMENT.match(words[-1]) else None
+        key = " ".join(words)
+        if not key:
+            return []
+
+        # Filtre par département : on élargit le top avant de filtrer
+        wanted = limit * 20 if departement else limit
+        results = [self.communes[cid] for cid in self._top(key, wanted)]
+        if departement:
+            results = [c for c in results if c.departement == departement]
+        return results[:limit]
+
+    def similar(self, query: str, limit: int = DEFAULT_LIMIT) -> list:
+        """Communes au nom proche (trigrammes seuls), pour corriger une faute de frappe."""
+        key = fold_name(query)
+        return [self.communes[cid] for cid in self._fuzzy(key, limit)] if key else []
+
+    def _rank(self, key: str, limit: int) -> tuple:
+        # Mémorisé par lru_cache : la saisie repasse par les mêmes préfixes
+        return self._prefix(key, limit) or self._fuzzy(key, limit)
+
+    def _prefix(self, key: str, limit: int) -> tuple:
+        lo = bisect.bisect_left(self._keys, key)
+        hi = bisect.bisect_left(self._keys, key + "\uffff")
+        # Nom exact, puis début du nom, puis début d'un autre mot ; par rang sinon
+        folded = self._folded
+        return tuple(heapq.nsmallest(
+            limit, set(self._ids[lo:hi]),
+            key=lambda cid: (folded[cid] != key, not folded[cid].startswith(key), cid),
+        ))
+
+    def _fuzzy(self, key: str, limit: int) -> list:
+        """Repli par trigrammes (fautes de frappe) : similarité de Jaccard."""
+        query = _trigrams(key)
+        counts = Counter()
+        for trigram in query:
+            counts.update(self._trigrams.get(trigram, ()))
+
+        scored = []
+        for cid, shared in counts.items():
+            score = shared / (len(query) + self._sizes[cid] - shared)
+            if score >= MIN_TRIGRAM_SCORE:
+                scored.append((-score, cid))
+        return tuple(cid for _, cid in heapq.nsmallest(limit, scored))
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def commune_index() -> CommuneIndex:
+    """Index partagé par tout le processus (construit au premier appel)."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = CommuneIndex()
+        return _index
+
+
+def search_communes(query: str, limit: int = DEFAULT_LIMIT) -> list:
+    return commune_index().search(query, limit)
@@ -1,8 +1,88 @@
 # core/data_loader.py
 
-import pandas as pd 
-from core.cleaner import SeLogerDataProcessor
+import threading
+
+import pandas as pd
+from pathlib import Path
+from core.cache import LRUCache
+from core import manifest
+
+
+# Budget mémoire des DataFrames partagés par toutes les sessions
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+
+_frames = LRUCache(
+    MAX_CACHE_BYTES,
+    sizeof=lambda df: int(df.memory_usage(deep=True).sum()),
+)
+
+
+# Un verrou par ville : un seul chargement / nettoyage à la fois pour une ville
+_city_locks = {}
+_city_locks_guard = threading.Lock()
+
+
+def city_lock(city: str) -> threading.Lock:
+    """Verrou des fichiers dérivés d'une ville (CSV nettoyé, index spatial)."""
+    with _city_locks_guard:
+        return _city_locks.setdefault(city, threading.Lock())
+
+
+def clean_csv_path(city: str) -> Path:
+    return Path(f"data/{city}_clean.csv")
+
 
 def load_city_dataframe(city: str) -> pd.DataFrame:
-    processor = SeLogerDataProcessor()
-    return processor.run(city_name=city, output_path=f"data/{city}_clean.csv")
+    """
+    Charge le DataFrame nettoyé d'une ville via un cache partagé par le processus.
+
+    La clé de cache est le jeton de version du manifeste (aucun parcours de
+    fichiers). Le DataFrame retourné est partagé : ne pas le modifier en place.
+    """
+    city = city.lower()
+    df = _frames.get((city, manifest.version_token(city)))
+    if df is not None:
+        return df
+
+    # Deux sessions ouvrant la même ville après un scraping ne nettoient pas
+    # en même temps (même CSV, même index spatial) : la seconde attend et
+    # relit le manifeste, puis réutilise le résultat de la première
+    with city_lock(city):
+        df = _frames.get((city, manifest.version_token(city)))
+        if df is not None:
+            return df
+
+        entry = manifest.get_entry(city)
+        csv_path = clean_csv_path(city)
+
+        # CSV à jour d'après le manifeste → cache ou lecture directe du CSV
+        if entry is not None and entry["clean"] == entry["raw"] and csv_path.exists():
+            key = (city, manifest.version_token(city))
+            df = _frames.get(key)
+            if df is None:
+                df = pd.read_csv(csv_path)
+                _frames.discard(lambda k: k[0] == city)
+                _frames.put(key, df)
+            return df
+
+        # Ville inconnue ou nouvelles données brutes → pipeline complet
+        raw_generation = entry["raw"] if entry is not None else 0
+        from core.cleaner import SeLogerDataProcessor
+
+        processor = SeLogerDataProcessor()
+        df = processor.run(city_name=city, output_path=str(csv_path))
+        if df.empty:
+            return df
+
+        manifest.mark_clean(city, raw_generation)
+        _frames.discard(lambda k: k[0] == city)
+        _frames.put((city, manifest.version_token(city)), df)
+        return df
+
+
+def dataset_version(city: str) -> str:
+    """
+    Jeton de version du jeu de données nettoyé d'une ville.
+    Change dès que de nouvelles données sont scrapées ou nettoyées.
+    """
+    return manifest.version_token(city)
@@ -0,0 +1,156 @@
+# core/estimator.py
+"""
+Estimation du loyer au m² d'un logement à partir d'annonces comparables.
+
+Pour chaque ville, les annonces nettoyées sont placées dans un espace de
+caractéristiques mises à l'échelle (position projetée en mètres, log de la
+surface, nombre de pièces) et indexées par un KD-tree. Une estimation est
+une recherche des k plus proches comparables suivie d'une médiane pondérée
+de leur prix au m² (robuste aux annonces aberrantes), avec une fourchette
+interquartile. Les requêtes groupées sont entièrement vectorisées.
+
+Échelles par défaut : 1 km d'écart ≈ 25 % de surface ≈ 1 pièce.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from core import manifest
+from core.cache import LRUCache
+from core.spatial import project
+
+DEFAULT_K = 15
+
+# Écart valant une unité de distance dans l'espace des caractéristiques
+LOCATION_SCALE_M = 1000.0
+SURFACE_SCALE = np.log(1.25)
+ROOMS_SCALE = 1.0
+
+# Annonces retenues comme comparables
+MIN_SURFACE, MAX_SURFACE = 9, 400
+MAX_ROOMS = 10
+PRICE_M2_QUANTILES = (0.01, 0.99)
+
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+
+@dataclass
+class RentEstimate:
+    price_m2: float             # médiane pondérée des comparables (€/m²)
+    rent: float                 # loyer mensuel estimé (€)
+    low_m2: float               # 1er quartile pondéré (€/m²)
+    high_m2: float              # 3e quartile pondéré (€/m²)
+    comparables: np.ndarray     # positions (iloc) dans le DataFrame de la ville
+    distances_m: np.ndarray     # distance géographique de chaque comparable
+
+
+def _weighted_quantiles(values: np.ndarray, weights: np.ndarray, quantiles) -> list:
+    """Quantiles pondérés ligne par ligne de matrices (n, k)."""
+    order = np.argsort(values, axis=1)
+    values = np.take_along_axis(values, order, axis=1)
+    cumulative = np.cumsum(np.take_along_axis(weights, order, axis=1), axis=1)
+    cumulative /= cumulative[:, -1:]
+    rows = np.arange(len(values))
+    # Première valeur dont le poids cumulé atteint le quantile
+    return [values[rows, np.argmax(cumulative >= q, axis=1)] for q in quantiles]
+
+
+class RentEstimator:
+    def __init__(self, df):
+        """`df` : DataFrame nettoyé d'une ville (lon, lat, livingSpace, numberOfRooms, price_m2)."""
+        frame = df.reindex(columns=["lon", "lat", "livingSpace", "numberOfRooms", "price_m2"])
+        valid = (
+            frame.notna().all(axis=1)
+            & frame["livingSpace"].between(MIN_SURFACE, MAX_SURFACE)
+            & frame["numberOfRooms"].between(1, MAX_ROOMS)
+        )
+        if valid.any():
+            # Prix au m² aberrants (erreurs de saisie, parkings...) écartés
+            low, high = frame["price_m2"][valid].quantile(PRICE_M2_QUANTILES)
+            valid &= frame["price_m2"].between(max(low, 1), high)
+        valid = valid.to_numpy()
+
+        self.rows = np.flatnonzero(valid)
+        data = frame.to_numpy(dtype=float)[valid]
+        self.lat0 = float(data[:, 1].mean()) if len(data) else 0.0
+        self.xy = project(data[:, 0], data[:, 1], self.lat0) if len(data) else np.empty((0, 2))
+        self.price_m2 = data[:, 4]
+        self.tree = cKDTree(self._features(self.xy, data[:, 2], data[:, 3]))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def nbytes(self) -> int:
+        return self.tree.data.nbytes * 3 + self.xy.nbytes + self.price_m2.nbytes + self.rows.nbytes
+
+    @staticmethod
+    def _features(xy, surface, rooms) -> np.ndarray:
+        return np.column_stack([
+            xy / LOCATION_SCALE_M,
+            np.log(np.asarray(surface, dtype=float)) / SURFACE_SCALE,
+            np.asarray(rooms, dtype=float) / ROOMS_SCALE,
+        ])
+
+    # ------------------------------------------------------------------
+    # ESTIMATION
+    # ------------------------------------------------------------------
+    def estimate_many(self, lon, lat, surface, rooms, k: int = DEFAULT_K) -> dict:
+        """
+        Estimations groupées (tableaux de même longueur).
+
+        Retourne un dict de tableaux : "price_m2", "rent", "low_m2",
+        "high_m2" (n,), "comparables" et "distances_m" (n, k).
+        """
+        surface = np.atleast_1d(np.asarray(surface, dtype=float))
+        xy = project(lon, lat, self.lat0)
+        k = min(k, len(self))
+        if k == 0:
+            raise ValueError("❌ Aucune annonce comparable pour cette ville")
+
+        feature_distances, idx = self.tree.query(self._features(xy, surface, rooms), k=k, workers=-1)
+        idx = idx.reshape(len(xy), k)
+        feature_distances = feature_distances.reshape(len(xy), k)
+
+        # Les plus proches comptent davantage ; +0.5 borne le poids d'un quasi-doublon
+        weights = 1.0 / (feature_distances + 0.5)
+        low, median, high = _weighted_quantiles(self.price_m2[idx], weights, (0.25, 0.5, 0.75))
+
+        return {
+            "price_m2": median,
+            "rent": median * surface,
+            "low_m2": low,
+            "high_m2": high,
+            "comparables": self.rows[idx],
+            "distances_m": np.hypot(*(self.xy[idx] - xy[:, None, :]).transpose(2, 0, 1)),
+        }
+
+    def estimate(self, lon: float, lat: float, surface: float, rooms: int, k: int = DEFAULT_K) -> RentEstimate:
+        result = self.estimate_many([lon], [lat], [surface], [rooms], k)
+        return RentEstimate(
+            price_m2=float(result["price_m2"][0]),
+            rent=float(result["rent"][0]),
+            low_m2=float(result["low_m2"][0]),
+            high_m2=float(result["high_m2"][0]),
+            comparables=result["comparables"][0],
+            distances_m=result["distances_m"][0],
+        )
+
+
+_estimators = LRUCache(MAX_CACHE_BYTES, sizeof=lambda estimator: estimator.nbytes)
+
+
+def rent_estimator(city: str) -> RentEstimator:
+    """Estimateur d'une ville, construit une fois par version des données."""
+    from core.data_loader import load_city_dataframe
+
+    city = city.lower()
+    key = (city, manifest.version_token(city))
+    estimator = _estimators.get(key)
+    if estimator is None:
+        estimator = RentEstimator(load_city_dataframe(city))
+        _estimators.discard(lambda k: k[0] == city)
+        _estimators.put(key, estimator)
+    return estimator
@@ -1,36 +1,170 @@
-# config.py
-import pandas as pd
+# core/geo.py
+"""
+Recherche des villes et communes par nom.
+
+L'index est construit une seule fois par processus à partir de
+`data/cities_loc.csv` (villes avec coordonnées) et de
+`data/cleaned_communes_francaises.csv` (~33k communes avec département).
+Les noms sont comparés sous forme canonique (`fold_name` : sans accents,
+tirets ni "St/Saint") : une recherche est une lecture de dictionnaire, avec
+un repli approché pour les fautes de frappe (difflib sur les villes avec
+coordonnées, puis l'index de trigrammes de `core.commune_index`).
+"""
+
+import csv
+import difflib
+import re
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import Optional
+
+from core.commune_index import REGION_ALIASES
+from core.utils import fold_name
 
-# Chargement du CSV une seule fois
 CITIES_LOC_PATH = Path("data/cities_loc.csv")
+COMMUNES_PATH = Path("data/cleaned_communes_francaises.csv")
+
+# Score minimal (difflib) du repli approché
+FUZZY_CUTOFF = 0.85
+
+# Candidats proposés par l'index de trigrammes, départagés par difflib
+FUZZY_CANDIDATES = 5
+
+
+@dataclass
+class Place:
+    name: str
+    departement: str = ""
+    region: str = ""
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+
+    @property
+    def has_coords(self) -> bool:
+        return self.lat is not None and self.lon is not None
+
+
+class CityIndex:
+    """Index nom canonique → lieux (plusieurs en cas d'homonymes)."""
+
+    def __init__(self, cities_path: Path = CITIES_LOC_PATH, communes_path: Path = COMMUNES_PATH):
+        self._places = {}
+
+        # Villes avec coordonnées d'abord : elles priment sur les homonymes
+        if not cities_path.exists():
+            raise FileNotFoundError(f"❌ Fichier non trouvé : {cities_path}")
+        with open(cities_path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                place = Place(row["city"].strip(), region=row["admin_name"],
+                              lat=float(row["lat"]), lon=float(row["lng"]))
+                self._places.setdefault(fold_name(place.name), []).append(place)
+        self._located_keys = list(self._places)
+
+        if communes_path.exists():
+            with open(communes_path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    departement, region = row["Département (numéro)"], row["Région"]
+                    self._add_commune(row["Commune"], departement, region)
+                    # "Lyon 01" → aussi indexé sous "Lyon"
+                    if row["cleaned_city_name"] != row["Commune"]:
+                        self._add_commune(row["cleaned_city_name"], departement, region)
+
+        self._closest = lru_cache(maxsize=1024)(self._closest_key)
 
-_city_df_cache = None
+    def _add_commune(self, name: str, departement: str, region: str) -> None:
+        places = self._places.setdefault(fold_name(name), [])
+        for place in places:
+            if place.departement == departement:
+                return
+            # Ville de cities_loc (sans département) : même nom et même région
+            located_region = fold_name(place.region)
+            if not place.departement and REGION_ALIASES.get(located_region, located_region) == fold_name(region):
+                place.departement = departement
+                return
+        places.append(Place(name.strip(), departement, region))
 
-def load_city_data():
-    """Charge le CSV contenant les coordonnées des villes."""
-    global _city_df_cache
-    if _city_df_cache is None:
-        if not CITIES_LOC_PATH.exists():
-            raise FileNotFoundError(f"❌ Fichier non trouvé : {CITIES_LOC_PATH}")
-        _city_df_cache = pd.read_csv(CITIES_LOC_PATH)
-        _city_df_cache["city_norm"] = _city_df_cache["city"].str.strip().str.lower()
-    return _city_df_cache
+    def __len__(self) -> int:
+        return len(self._places)
+
+    def lookup(self, name: str, fuzzy: bool = True) -> list:
+        """
+        Lieux correspondant à `name` (liste vide si inconnu).
+        Un département entre parenthèses filtre les homonymes : "Saint-Denis (93)" ;
+        aucun lieu de ce département → liste vide.
+        """
+        key = fold_name(name)
+        places = self._places.get(key)
+        if places is None and fuzzy and key:
+            match = self._closest(key)
+            places = self._places.get(match) if match else None
+        if not places:
+            return []
+
+        departement = re.search(r"\((\w{2,3})\)", name)
+        if departement:
+            places = [p for p in places if p.departement == departement.group(1).upper()]
+        return list(places)
+
+    def _closest_key(self, key: str):
+        # Uniquement en cas d'échec de la recherche exacte (résultat mémorisé,
+        # échecs compris) : les villes avec coordonnées d'abord (600 clés)
+        matches = difflib.get_close_matches(key, self._located_keys, n=1, cutoff=FUZZY_CUTOFF)
+        if matches:
+            return matches[0]
+
+        # Toutes les communes : quelques candidats par trigrammes plutôt
+        # qu'un difflib sur 33k clés
+        from core.commune_index import commune_index
+
+        candidates = [fold_name(c.name) for c in commune_index().similar(key, FUZZY_CANDIDATES)]
+        matches = difflib.get_close_matches(
+            key, [c for c in candidates if c in self._places], n=1, cutoff=FUZZY_CUTOFF,
+        )
+        return matches[0] if matches else None
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def city_index() -> CityIndex:
+    """Index partagé par tout le processus (construit au premier appel)."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = CityIndex()
+        return _index
+
+
+def _listings_centroid(city_name: str):
+    """Position médiane des annonces scrapées (communes absentes de cities_loc)."""
+    from core.data_loader import clean_csv_path, load_city_dataframe
+    from core.utils import normalize_city
+
+    city = normalize_city(city_name)
+    if not clean_csv_path(city).exists():
+        return None
+    df = load_city_dataframe(city)
+    if df.empty or df["lat"].isna().all():
+        return None
+    return {"lat": float(df["lat"].median()), "lon": float(df["lon"].median())}
 
 
 def get_city_coords(city_name: str):
     """
-    Retourne les coordonnées lat/lon d'une ville en utilisant le CSV tools/cities_loc.csv.
+    Retourne les coordonnées lat/lon d'une ville.
+
+    Insensible aux accents, tirets, "St/Saint" et fautes légères. Une commune
+    connue sans coordonnées prend la position médiane de ses annonces.
     """
-    df = load_city_data()
-    
-    city_norm = city_name.strip().lower()
-    row = df[df["city_norm"] == city_norm]
-
-    if row.empty:
-        raise KeyError(f"❌ Ville '{city_name}' non trouvée dans {CITIES_LOC_PATH}")
-
-    return {
-        "lat": float(row.iloc[0]["lat"]),
-        "lon": float(row.iloc[0]["lng"])
-    }
+    places = city_index().lookup(city_name)
+    for place in places:
+        if place.has_coords:
+            return {"lat": place.lat, "lon": place.lon}
+
+    coords = _listings_centroid(city_name)
+    if coords is None:
+        raise KeyError(f"Ville inconnue : {city_name}")
+    return coords
@@ -1,18 +1,53 @@
 # core/http.py
-print("🔥 HttpClient loaded from:", __file__)
 import random
 import time
 import json
 import subprocess
 from pathlib import Path
+from urllib.parse import urlparse
 import requests
 
 from core.headers import BASE_HEADERS
 from core.exceptions import SessionExpiredError
+from core.metrics import REGISTRY
 
 
 COOKIE_PATH = Path("cookies/seloger_cookies.json")
 
+# ----------------------------------------------------------------------
+# MÉTRIQUES
+# ----------------------------------------------------------------------
+HTTP_REQUESTS = REGISTRY.counter(
+    "seloger_http_requests_total", "Requêtes HTTP par endpoint, méthode et statut",
+    labels=("endpoint", "method", "status"),
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "seloger_http_request_duration_seconds", "Latence réseau des requêtes HTTP",
+    labels=("endpoint",),
+)
+HTTP_BYTES = REGISTRY.counter(
+    "seloger_http_bytes_total", "Octets transférés (corps de requête et de réponse)",
+    labels=("endpoint", "direction"),
+)
+NETWORK_SECONDS = REGISTRY.counter(
+    "seloger_network_seconds_total", "Temps passé à attendre le réseau",
+)
+SLEEP_SECONDS = REGISTRY.counter(
+    "seloger_sleep_seconds_total", "Temps passé en pause volontaire",
+    labels=("reason",),
+)
+SESSION_REFRESHES = REGISTRY.counter(
+    "seloger_session_refreshes_total", "Rafraîchissements de la session navigateur",
+)
+SESSION_REFRESH_SECONDS = REGISTRY.counter(
+    "seloger_session_refresh_seconds_total", "Temps passé à rafraîchir la session",
+)
+
+
+def _sleep(seconds: float, reason: str) -> None:
+    SLEEP_SECONDS.inc(seconds, reason=reason)
+    time.sleep(seconds)
+
 
 class BrowserSession:
     def __init__(self):
@@ -32,6 +67,8 @@ class BrowserSession:
 
     def refresh_session(self):
         print("🔄 Session expirée → ouverture du navigateur")
+        SESSION_REFRESHES.inc()
+        started = time.perf_counter()
         try:
             subprocess.run(
                 ["python3", "tools/get_cookie_headers.py"],
@@ -59,6 +96,8 @@ class BrowserSession:
         except Exception as e:
             print(f"❌ Erreur lors du rafraîchissement: {e}")
             raise
+        finally:
+            SESSION_REFRESH_SECONDS.inc(time.perf_counter() - started)
 
 
 class HttpClient:
@@ -75,11 +114,23 @@ class HttpClient:
         self.max_retries = max_retries
         self.http = requests.Session()
 
-    def request(self, method, url, *, json_body=None):
+        # Compteurs lus par core.progress
+        self.forbidden = 0
+        self.refreshes = 0
+
+    def request(self, method, url, *, json_body=None, endpoint=None):
+        """
+        Args:
+            endpoint: Libellé de l'endpoint pour les métriques
+                      (par défaut le chemin de l'URL)
+        """
+        endpoint = endpoint or urlparse(url).path
+
         for attempt in range(1, self.max_retries + 1):
             headers = BASE_HEADERS.copy()
             headers["Cookie"] = self.session.load_cookies()
 
+            started = time.perf_counter()
             resp = self.http.request(
                 method,
                 url,
@@ -87,25 +138,34 @@ class HttpClient:
                 json=json_body,
                 timeout=30,
             )
+            elapsed = time.perf_counter() - started
+
+            HTTP_REQUESTS.inc(endpoint=endpoint, method=method, status=str(resp.status_code))
+            HTTP_LATENCY.observe(elapsed, endpoint=endpoint)
+            NETWORK_SECONDS.inc(elapsed)
+            HTTP_BYTES.inc(len(resp.request.body or b""), endpoint=endpoint, direction="sent")
+            HTTP_BYTES.inc(len(resp.content), endpoint=endpoint, direction="received")
 
             if resp.status_code == 403:
+                self.forbidden += 1
                 print(f"⚠️ 403 Forbidden (tentative {attempt}/{self.max_retries}) - {url}")
                 if attempt < self.max_retries:
                     self.session.refresh_session()
-                    time.sleep(2)  # Pause avant retry
+                    self.refreshes += 1
+                    _sleep(2, "retry")  # Pause avant retry
                     continue
                 else:
                     raise SessionExpiredError(f"403 après {self.max_retries} tentatives")
 
             # 404 = annonce supprimée, on retourne la réponse pour que l'appelant puisse la gérer
             if resp.status_code == 404:
-                time.sleep(random.uniform(self.min_delay, self.max_delay))
+                _sleep(random.uniform(self.min_delay, self.max_delay), "rate_limit")
                 return resp
 
             if resp.status_code >= 400:
                 raise RuntimeError(f"HTTP {resp.status_code} - {url}")
 
-            time.sleep(random.uniform(self.min_delay, self.max_delay))
+            _sleep(random.uniform(self.min_delay, self.max_delay), "rate_limit")
             return resp
 
         raise SessionExpiredError("Impossible de récupérer une session valide")
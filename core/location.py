@@ -1,16 +1,143 @@
 # core/location.py
+"""
+Résolution d'un nom de ville en identifiant de lieu SeLoger (placeId).
 
+Les résultats sont conservés dans un cache persistant (data/place_ids.json)
+indexé par le nom canonique de la requête (`fold_name`) et le département :
+deux homonymes ne partagent jamais un placeId. Une ville déjà résolue ne
+coûte plus aucun aller-retour réseau (ni pause de rate-limit, ni risque de
+403). `python -m tools.warm_place_ids` pré-remplit le cache pour les
+communes de `merged_cities_communes.csv`.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
 from typing import Tuple, Optional
-from .http import HttpClient , BrowserSession
+
+from .http import HttpClient, BrowserSession
+from .metrics import REGISTRY
+from .utils import fold_name
 
 
 AUTOCOMPLETE_URL = "https://www.seloger.com/search-mfe-bff/autocomplete"
 
-def location_autocomplete(
-    query: str,
-    session: BrowserSession,
-    limit: int = 5
-) -> Tuple[Optional[str], Optional[str]]:
+PLACE_CACHE_PATH = Path("data/place_ids.json")
+
+# Les identifiants de lieux sont stables : on revalide au bout de 90 jours
+PLACE_ID_TTL = 90 * 24 * 3600
+
+PLACE_CACHE = REGISTRY.counter(
+    "seloger_place_cache_total", "Résolutions de lieux par issue (hit, miss)",
+    labels=("result",),
+)
+
+_lock = threading.Lock()
+_cache = {"mtime": None, "data": {}}
+
+
+# ----------------------------------------------------------------------
+# CACHE PERSISTANT
+# ----------------------------------------------------------------------
+def _load() -> dict:
+    """Relit le cache seulement s'il a changé sur disque."""
+    try:
+        mtime = PLACE_CACHE_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        _cache["mtime"], _cache["data"] = None, {}
+        return _cache["data"]
+
+    if mtime != _cache["mtime"]:
+        try:
+            _cache["data"] = json.loads(PLACE_CACHE_PATH.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError):
+            _cache["data"] = {}
+        _cache["mtime"] = mtime
+    return _cache["data"]
+
+
+def _save(data: dict) -> None:
+    """Écriture atomique (fichier temporaire + rename)."""
+    PLACE_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = PLACE_CACHE_PATH.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(data, indent=1, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, PLACE_CACHE_PATH)
+    _cache["mtime"] = PLACE_CACHE_PATH.stat().st_mtime_ns
+    _cache["data"] = data
+
+
+def _place_key(query: str, departement: str = None) -> str:
+    """"saint denis|93" ; sans département, le seul nom canonique."""
+    key = fold_name(query)
+    return f"{key}|{departement.upper()}" if departement else key
+
+
+def cached_place(query: str, departement: str = None, ttl: int = PLACE_ID_TTL):
+    """(placeId, libellé) déjà résolus pour la requête, ou None (absent ou expiré)."""
+    with _lock:
+        entry = _load().get(_place_key(query, departement))
+    if entry is None or time.time() - entry["resolved_at"] > ttl:
+        return None
+    return entry["id"], entry["label"]
+
+
+def remember_places(places: dict) -> None:
+    """Enregistre {(requête, département ou None): (placeId, libellé)} en une seule écriture."""
+    now = time.time()
+    with _lock:
+        data = dict(_load())
+        for (query, departement), (loc_id, loc_name) in places.items():
+            data[_place_key(query, departement)] = {"id": loc_id, "label": loc_name, "resolved_at": now}
+        _save(data)
+
+
+# ----------------------------------------------------------------------
+# AUTOCOMPLÉTION
+# ----------------------------------------------------------------------
+# Résultats examinés pour retrouver un homonyme d'un département donné
+HOMONYM_LIMIT = 10
+
+_CODES = re.compile(r"\b(\d{5}|\d{2,3}|2[AB])\b", re.IGNORECASE)
+
+
+def _departement_codes(item: dict) -> set:
+    """Départements cités par un résultat (numéro ou code postal dans les libellés)."""
+    codes = set()
+    for code in _CODES.findall(" ".join(str(label) for label in item.get("labels") or [])):
+        code = code.upper()
+        if len(code) == 5:
+            # Code postal : 974xx / 971xx → DOM, 20xxx → Corse (2A ou 2B)
+            code = code[:3] if code.startswith("97") else code[:2]
+        codes.add(code)
+    return codes
+
+
+def _pick(results: list, departement: str = None) -> Optional[dict]:
+    """Premier résultat du département voulu (ou premier tout court)."""
+    if not departement:
+        return results[0]
+    departement = departement.upper()
+    wanted = {departement, "20"} if departement in ("2A", "2B") else {departement}
+    for item in results:
+        if _departement_codes(item) & wanted:
+            return item
+    # Libellés sans aucun département : impossible de départager, on garde le premier
+    if not any(_departement_codes(item) for item in results):
+        return results[0]
+    return None
+
+
+def fetch_place(query: str, client: HttpClient, limit: int = 5,
+                departement: str = None) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Interroge l'autocomplétion SeLoger (toujours un appel réseau).
+    Avec `departement`, retient le résultat de ce département (homonymes).
+    """
+    if departement:
+        limit = max(limit, HOMONYM_LIMIT)
     payload = {
         "text": query,
         "limit": limit,
@@ -25,21 +152,52 @@ def location_autocomplete(
         "locale": "fr"
     }
 
-    client = HttpClient(session)
-
     resp = client.request(
         "POST",
         AUTOCOMPLETE_URL,
-        json_body=payload
+        json_body=payload,
+        endpoint="autocomplete",
     )
 
     data = resp.json()
 
-    if not data:
+    item = _pick(data, departement) if data else None
+    if item is None:
         return None, None
 
-    loc_id = data[0].get("id")
-    labels = data[0].get("labels") or []
+    loc_id = item.get("id")
+    labels = item.get("labels") or []
     loc_name = labels[0] if labels else None
 
     return loc_id, loc_name
+
+
+def location_autocomplete(
+    query: str,
+    session: BrowserSession = None,
+    limit: int = 5,
+    client: HttpClient = None,
+    use_cache: bool = True,
+    departement: str = None,
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Retourne (placeId, libellé) de la requête, depuis le cache si possible.
+    `departement` distingue les homonymes (cache et choix du résultat).
+
+    Le client HTTP (et la session navigateur) ne sont créés qu'en cas de
+    défaut de cache ; passer `client` pour le réutiliser entre plusieurs
+    requêtes. Les requêtes sans résultat ne sont pas mises en cache.
+    """
+    if use_cache:
+        cached = cached_place(query, departement)
+        if cached is not None:
+            PLACE_CACHE.inc(result="hit")
+            return cached
+        PLACE_CACHE.inc(result="miss")
+
+    client = client or HttpClient(session or BrowserSession())
+    loc_id, loc_name = fetch_place(query, client, limit, departement)
+
+    if loc_id is not None:
+        remember_places({(query, departement): (loc_id, loc_name)})
+    return loc_id, loc_name
@@ -0,0 +1,82 @@
+# core/manifest.py
+"""
+Manifeste des jeux de données : un compteur de génération par ville.
+
+- `raw`   : incrémenté par le scraper à chaque page d'annonces sauvegardée
+- `clean` : valeur de `raw` au moment du dernier nettoyage (CSV à jour)
+
+Le couple (raw, clean) sert de jeton de version bon marché : le lire ne
+demande qu'un `stat` sur un seul fichier, aucun parcours des JSON.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+MANIFEST_PATH = Path("data/manifest.json")
+
+_lock = threading.Lock()
+_cache = {"mtime": None, "data": {}}
+
+
+def _load() -> dict:
+    """Relit le manifeste seulement s'il a changé sur disque."""
+    try:
+        mtime = MANIFEST_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        _cache["mtime"], _cache["data"] = None, {}
+        return _cache["data"]
+
+    if mtime != _cache["mtime"]:
+        try:
+            _cache["data"] = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError):
+            _cache["data"] = {}
+        _cache["mtime"] = mtime
+    return _cache["data"]
+
+
+def _save(data: dict) -> None:
+    """Écriture atomique (fichier temporaire + rename)."""
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = MANIFEST_PATH.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, MANIFEST_PATH)
+    _cache["mtime"] = MANIFEST_PATH.stat().st_mtime_ns
+    _cache["data"] = data
+
+
+def get_entry(city: str):
+    """Retourne {"raw": int, "clean": int} ou None si la ville est inconnue."""
+    with _lock:
+        entry = _load().get(city.lower())
+        return dict(entry) if entry else None
+
+
+def bump_raw(city: str) -> int:
+    """Signale de nouvelles données brutes pour la ville."""
+    with _lock:
+        data = dict(_load())
+        entry = dict(data.get(city.lower(), {"raw": 0, "clean": -1}))
+        entry["raw"] += 1
+        data[city.lower()] = entry
+        _save(data)
+        return entry["raw"]
+
+
+def mark_clean(city: str, raw_generation: int) -> None:
+    """Enregistre que le CSV reflète les données brutes de la génération donnée."""
+    with _lock:
+        data = dict(_load())
+        entry = dict(data.get(city.lower(), {"raw": raw_generation}))
+        entry["clean"] = raw_generation
+        data[city.lower()] = entry
+        _save(data)
+
+
+def version_token(city: str) -> str:
+    entry = get_entry(city)
+    if entry is None:
+        return "unknown"
+    return f"{entry['raw']}.{entry['clean']}"
@@ -0,0 +1,119 @@
+# core/progress.py
+"""
+Statut du scraping publié par le runner dans un petit fichier JSON,
+réécrit de façon atomique. La page Scrapper lit ce seul objet à chaque
+rafraîchissement au lieu de compter les JSON sur disque.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+STATUS_PATH = Path(__file__).parent.parent / "scraping_status.json"
+
+# Intervalle minimal entre deux écritures du fichier de statut
+PUBLISH_INTERVAL = 0.5
+
+
+def read_status(path: Path = STATUS_PATH) -> Optional[dict]:
+    """Lit le dernier statut publié (None si aucun scraping n'a encore tourné)."""
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+class ScrapeProgress:
+    """Compteurs en direct d'un scraping multi-villes."""
+
+    def __init__(self, cities: Dict[str, int], run_id: str = None, path: Path = STATUS_PATH):
+        """
+        Args:
+            cities: {slug de ville: nombre d'annonces déjà présentes sur disque}
+            run_id: Identifiant du lancement (permet à la page de reconnaître son scraping)
+        """
+        self.path = path
+        self.run_id = run_id
+        self.started_at = time.time()
+        self.state = "running"
+        self.error = None
+        self.clients = []
+        self._last_publish = 0.0
+        self.cities = {
+            city: {
+                "pages": 0,
+                "ads": 0,
+                "not_found": 0,
+                "existing": existing,
+                "expected": None,
+            }
+            for city, existing in cities.items()
+        }
+
+    # ------------------------------------------------------------------
+    # ÉVÉNEMENTS
+    # ------------------------------------------------------------------
+    def track_clients(self, clients) -> None:
+        """Clients HTTP dont on remonte les 403 et rafraîchissements de session."""
+        self.clients = list(clients)
+
+    def ad_fetched(self, city: str) -> None:
+        self.cities[city]["ads"] += 1
+        self.publish()
+
+    def ad_missing(self, city: str) -> None:
+        self.cities[city]["not_found"] += 1
+        self.publish()
+
+    def page_done(self, city: str, expected: Optional[int] = None) -> None:
+        self.cities[city]["pages"] += 1
+        if expected is not None:
+            self.cities[city]["expected"] = expected
+        self.publish()
+
+    def finish(self, state: str = "done", error: str = None) -> None:
+        self.state = state
+        self.error = error
+        self.publish(force=True)
+
+    # ------------------------------------------------------------------
+    # PUBLICATION
+    # ------------------------------------------------------------------
+    def snapshot(self) -> dict:
+        elapsed = max(time.time() - self.started_at, 1e-6)
+        fetched = sum(c["ads"] + c["not_found"] for c in self.cities.values())
+        rate = fetched / elapsed
+
+        # ETA seulement si l'API a annoncé le nombre total d'annonces
+        remaining = 0
+        for c in self.cities.values():
+            if c["expected"] is None:
+                remaining = None
+                break
+            remaining += max(c["expected"] - c["existing"] - c["ads"] - c["not_found"], 0)
+        eta = remaining / rate if remaining is not None and rate > 0 else None
+
+        return {
+            "run_id": self.run_id,
+            "state": self.state,
+            "error": self.error,
+            "started_at": self.started_at,
+            "updated_at": time.time(),
+            "cities": self.cities,
+            "forbidden": sum(getattr(c, "forbidden", 0) for c in self.clients),
+            "refreshes": sum(getattr(c, "refreshes", 0) for c in self.clients),
+            "rate_per_min": round(rate * 60, 1),
+            "eta_seconds": round(eta) if eta is not None else None,
+        }
+
+    def publish(self, force: bool = False) -> None:
+        now = time.time()
+        if not force and now - self._last_publish < PUBLISH_INTERVAL:
+            return
+        self._last_publish = now
+
+        tmp = self.path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(self.snapshot(), ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
@@ -1,40 +1,89 @@
-from pathlib import Path
+import os
+import time
 from typing import Dict
 from .http import BrowserSession
+from .metrics import REGISTRY, start_http_server
+from .progress import ScrapeProgress
 from .scraper import SeLogerScraper
-from .utils import get_last_scraped_page
+from .utils import count_annonces, get_last_scraped_page
 from .utils import should_stop
 
-def run_scraping(cities: Dict[str, str], size: int = 30):
-    session = BrowserSession()
 
-    scrapers = {
-        name: SeLogerScraper(name, loc, session)
-        for name, loc in cities.items()
-    }
+# Port local optionnel pour exposer /metrics pendant le scraping
+METRICS_PORT = os.environ.get("SCRAPER_METRICS_PORT")
 
-    alive = set(cities)
-    current_page = {
-        city: get_last_scraped_page(city) + 1
-        for city in cities
-    }
+SCRAPE_RUNS = REGISTRY.counter(
+    "seloger_scrape_runs_total", "Scrapings terminés par état final", labels=("state",),
+)
+SCRAPE_SECONDS = REGISTRY.counter(
+    "seloger_scrape_seconds_total", "Durée cumulée des scrapings",
+)
 
-    while alive:
 
-        if should_stop():
-            print("🛑 STOP demandé → arrêt propre")
-            return
+def run_scraping(cities: Dict[str, str], size: int = 30, run_id: str = None):
+    if METRICS_PORT:
+        start_http_server(int(METRICS_PORT))
 
-        for city in list(alive):
-            page = current_page[city]
+    started = time.perf_counter()
+    state = "error"
 
-            print(f"\n=== {city} → page {page} ===")
-            n = scrapers[city].scrape_page(page, size)
+    # Comptage initial une seule fois ; ensuite le statut est poussé par le scraper.
+    # Publié avant l'ouverture de la session : la page voit le lancement tout de suite
+    progress = ScrapeProgress(
+        {city: count_annonces(city) for city in cities},
+        run_id=run_id,
+    )
+    progress.publish(force=True)
 
-            if n == -1:  # Signal d'arrêt depuis scrape_page
+    try:
+        # Un échec ici (cookies absents ou expirés...) est publié comme les autres
+        session = BrowserSession()
+        scrapers = {
+            name: SeLogerScraper(name, loc, session, progress=progress)
+            for name, loc in cities.items()
+        }
+        progress.track_clients(s.http for s in scrapers.values())
+
+        alive = set(cities)
+        current_page = {
+            city: get_last_scraped_page(city) + 1
+            for city in cities
+        }
+
+        while alive:
+
+            if should_stop():
+                print("🛑 STOP demandé → arrêt propre")
+                state = "stopped"
+                progress.finish(state)
                 return
-            if n == 0:
-                alive.remove(city)
-            else:
-                current_page[city] += 1
 
+            for city in list(alive):
+                page = current_page[city]
+
+                print(f"\n=== {city} → page {page} ===")
+                n = scrapers[city].scrape_page(page, size)
+
+                if n == -1:  # Signal d'arrêt depuis scrape_page
+                    state = "stopped"
+                    progress.finish(state)
+                    return
+                if n == 0:
+                    alive.remove(city)
+                else:
+                    current_page[city] += 1
+
+                # Export des métriques après chaque page
+                REGISTRY.write_textfile()
+
+        state = "done"
+        progress.finish(state)
+
+    except Exception as e:
+        progress.finish("error", error=str(e))
+        raise
+
+    finally:
+        SCRAPE_RUNS.inc(state=state)
+        SCRAPE_SECONDS.inc(time.perf_counter() - started)
+        REGISTRY.write_textfile()
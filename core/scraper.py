@@ -1,7 +1,23 @@
+import time
 from typing import Dict, Any
 from .models import ScraperConfig
 from .http import HttpClient
 from .utils import save_json, should_stop
+from .manifest import bump_raw
+from .metrics import REGISTRY
+
+
+PAGES_SCRAPED = REGISTRY.counter(
+    "seloger_pages_scraped_total", "Pages de résultats traitées", labels=("city",),
+)
+PAGE_DURATION = REGISTRY.histogram(
+    "seloger_page_duration_seconds", "Durée de traitement d'une page (recherche + annonces)",
+    labels=("city",), buckets=(5, 15, 30, 60, 120, 300, 600),
+)
+ADS = REGISTRY.counter(
+    "seloger_ads_total", "Annonces par issue (fetched, not_found, skipped)",
+    labels=("city", "outcome"),
+)
 
 
 class SeLogerScraper:
@@ -9,9 +25,10 @@ class SeLogerScraper:
     SEARCH = BASE + "/serp-bff/search"
     DETAIL = BASE + "/cdp-bff/v1/classified/{}"
 
-    def __init__(self, city_name: str, location_id: str, session):
+    def __init__(self, city_name: str, location_id: str, session, progress=None):
         self.cfg = ScraperConfig.from_city(city_name, location_id)
         self.http = HttpClient(session)
+        self.progress = progress
 
         self.cfg.pages.mkdir(parents=True, exist_ok=True)
         self.cfg.annonces.mkdir(parents=True, exist_ok=True)
@@ -32,6 +49,7 @@ class SeLogerScraper:
             "POST",
             self.SEARCH,
             json_body=self.payload(page, size),
+            endpoint="search",
         )
         data = resp.json()
         return data.get("classifieds", []), data
@@ -39,21 +57,30 @@ class SeLogerScraper:
     def scrape_ad(self, ad_id: str):
         path = self.cfg.annonces / f"{ad_id}.json"
         if path.exists():
+            ADS.inc(city=self.cfg.city, outcome="skipped")
             return
 
         resp = self.http.request(
             "GET",
             self.DETAIL.format(ad_id),
+            endpoint="classified",
         )
         
         # Annonce supprimée/expirée
         if resp.status_code == 404:
             print(f"⚠️ Annonce {ad_id} introuvable (404) - ignorée")
+            ADS.inc(city=self.cfg.city, outcome="not_found")
+            if self.progress:
+                self.progress.ad_missing(self.cfg.city)
             return
         
         save_json(resp.json(), path)
+        ADS.inc(city=self.cfg.city, outcome="fetched")
+        if self.progress:
+            self.progress.ad_fetched(self.cfg.city)
 
     def scrape_page(self, page: int, size: int) -> int:
+        started = time.perf_counter()
         ads, data = self.search_page(page, size)
         if not ads:
             return 0
@@ -65,4 +92,9 @@ class SeLogerScraper:
             self.scrape_ad(str(ad["id"]))
 
         save_json(data, self.cfg.pages / f"page_{page}.json")
+        bump_raw(self.cfg.city)
+        PAGES_SCRAPED.inc(city=self.cfg.city)
+        PAGE_DURATION.observe(time.perf_counter() - started, city=self.cfg.city)
+        if self.progress:
+            self.progress.page_done(self.cfg.city, data.get("totalCount"))
         return len(ads)
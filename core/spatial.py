@@ -0,0 +1,184 @@
+# core/spatial.py
+"""
+Index spatial des annonces d'une ville (KD-tree sur coordonnées projetées).
+
+Les positions lon/lat sont projetées en mètres (équirectangulaire centrée
+sur la ville, précise à l'échelle d'une agglomération) puis indexées par un
+`scipy.spatial.cKDTree`. Requêtes par lots : rayon, rectangle lon/lat et k
+plus proches voisins. Les résultats sont des positions de lignes (`iloc`)
+dans le DataFrame nettoyé de la ville.
+
+L'index est écrit par le nettoyage à côté du CSV (`<ville>_clean.spatial.npz`)
+et rechargé via `spatial_index(city)`, avec le même cache de processus que
+les DataFrames.
+"""
+
+from pathlib import Path
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from core import manifest
+from core.cache import LRUCache
+
+EARTH_RADIUS_M = 6_371_000
+
+# Budget mémoire des index gardés en cache par le processus
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def project(lon, lat, lat0: float) -> np.ndarray:
+    """lon/lat (degrés) → x/y en mètres autour de la latitude `lat0`, tableau (n, 2)."""
+    lon = np.atleast_1d(np.asarray(lon, dtype=float))
+    lat = np.atleast_1d(np.asarray(lat, dtype=float))
+    x = np.radians(lon) * EARTH_RADIUS_M * np.cos(np.radians(lat0))
+    y = np.radians(lat) * EARTH_RADIUS_M
+    return np.column_stack([x, y])
+
+
+class SpatialIndex:
+    def __init__(self, lon, lat, rows=None, lat0: float = None):
+        """
+        Args:
+            lon, lat: Coordonnées des annonces (degrés), sans NaN
+            rows: Position de chaque point dans le DataFrame (défaut : 0..n-1)
+            lat0: Latitude de référence de la projection (défaut : moyenne)
+        """
+        lon = np.asarray(lon, dtype=float)
+        lat = np.asarray(lat, dtype=float)
+        self.rows = np.arange(len(lon)) if rows is None else np.asarray(rows, dtype=np.int64)
+        if lat0 is None:
+            lat0 = float(np.mean(lat)) if len(lat) else 0.0
+        self.lat0 = float(lat0)
+        self._cos = np.cos(np.radians(self.lat0))
+        self.xy = self.project(lon, lat)
+        self.tree = cKDTree(self.xy)
+
+    @classmethod
+    def from_frame(cls, df) -> "SpatialIndex":
+        """Index des lignes du DataFrame nettoyé ayant une position."""
+        if df.empty:
+            return cls([], [])
+        valid = df["lon"].notna().to_numpy() & df["lat"].notna().to_numpy()
+        return cls(df["lon"].to_numpy()[valid], df["lat"].to_numpy()[valid], np.flatnonzero(valid))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def nbytes(self) -> int:
+        # Points + structure de l'arbre (~ deux fois les points)
+        return self.xy.nbytes * 3 + self.rows.nbytes
+
+    def project(self, lon, lat) -> np.ndarray:
+        return project(lon, lat, self.lat0)
+
+    # ------------------------------------------------------------------
+    # REQUÊTES (par lots)
+    # ------------------------------------------------------------------
+    def within_radius(self, lon, lat, meters) -> list:
+        """
+        Annonces à moins de `meters` de chaque point.
+        `meters` : un rayon commun ou un rayon par point.
+        Retourne une liste (un tableau de positions par point).
+        """
+        centers = self.project(lon, lat)
+        radius = np.broadcast_to(np.asarray(meters, dtype=float), len(centers))
+        hits = self.tree.query_ball_point(centers, radius, workers=-1)
+        return [self.rows[np.asarray(h, dtype=np.int64)] for h in hits]
+
+    def in_bbox(self, boxes) -> list:
+        """
+        Annonces dans chaque rectangle (min_lon, min_lat, max_lon, max_lat),
+        par exemple la fenêtre visible d'une carte.
+        """
+        boxes = np.atleast_2d(np.asarray(boxes, dtype=float))
+        low = self.project(boxes[:, 0], boxes[:, 1])
+        high = self.project(boxes[:, 2], boxes[:, 3])
+        # Cercle circonscrit au rectangle, puis filtre exact
+        centers = (low + high) / 2
+        radius = np.hypot(*(high - low).T) / 2
+        hits = self.tree.query_ball_point(centers, radius, workers=-1)
+
+        results = []
+        for h, lo, hi in zip(hits, low, high):
+            h = np.asarray(h, dtype=np.int64)
+            xy = self.xy[h]
+            inside = np.all((xy >= lo) & (xy <= hi), axis=1)
+            results.append(self.rows[h[inside]])
+        return results
+
+    def nearest(self, lon, lat, k: int = 10, max_distance: float = np.inf):
+        """
+        k plus proches annonces de chaque point.
+        Retourne (distances en mètres, positions), tableaux (n, k) ; les
+        voisins manquants ont une distance infinie et la position -1.
+        """
+        distances, idx = self.tree.query(
+            self.project(lon, lat), k=k, distance_upper_bound=max_distance, workers=-1
+        )
+        if k == 1:
+            distances, idx = distances.reshape(-1, 1), idx.reshape(-1, 1)
+        # cKDTree signale un voisin manquant par l'indice n
+        return distances, np.append(self.rows, -1)[idx]
+
+    # ------------------------------------------------------------------
+    # PERSISTANCE
+    # ------------------------------------------------------------------
+    def save(self, path: Path, n_rows: int) -> None:
+        """`n_rows` : nombre de lignes du CSV indexé (contrôle de fraîcheur)."""
+        lon = np.degrees(self.xy[:, 0] / (EARTH_RADIUS_M * self._cos))
+        lat = np.degrees(self.xy[:, 1] / EARTH_RADIUS_M)
+        tmp = Path(path).with_suffix(".tmp.npz")
+        np.savez_compressed(tmp, lon=lon, lat=lat, rows=self.rows, lat0=self.lat0, n_rows=n_rows)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path, n_rows: int = None):
+        """Index sauvegardé, ou None s'il est absent ou ne correspond plus au CSV."""
+        try:
+            with np.load(path) as data:
+                if n_rows is not None and int(data["n_rows"]) != n_rows:
+                    return None
+                return cls(data["lon"], data["lat"], data["rows"], float(data["lat0"]))
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+def spatial_index_path(csv_path) -> Path:
+    """data/nice_clean.csv → data/nice_clean.spatial.npz"""
+    return Path(csv_path).with_suffix(".spatial.npz")
+
+
+def save_spatial_index(df, csv_path) -> SpatialIndex:
+    """Construit et écrit l'index à côté du CSV nettoyé."""
+    index = SpatialIndex.from_frame(df)
+    index.save(spatial_index_path(csv_path), len(df))
+    return index
+
+
+_indexes = LRUCache(MAX_CACHE_BYTES, sizeof=lambda index: index.nbytes)
+
+
+def spatial_index(city: str) -> SpatialIndex:
+    """
+    Index spatial d'une ville, aligné sur `load_city_dataframe(city)`.
+    Chargé depuis le disque (ou reconstruit s'il manque) une fois par
+    version des données.
+    """
+    from core.data_loader import city_lock, clean_csv_path, load_city_dataframe
+
+    city = city.lower()
+    df = load_city_dataframe(city)
+    key = (city, manifest.version_token(city))
+    index = _indexes.get(key)
+    if index is None:
+        csv_path = clean_csv_path(city)
+        # Même verrou que le nettoyage : un seul écrivain du .spatial.npz
+        with city_lock(city):
+            index = SpatialIndex.load(spatial_index_path(csv_path), len(df))
+            if index is None:
+                index = save_spatial_index(df, csv_path)
+        _indexes.discard(lambda k: k[0] == city)
+        _indexes.put(key, index)
+    return index
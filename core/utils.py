@@ -1,5 +1,6 @@
 import json
 import re
+import unicodedata
 from pathlib import Path
 from typing import Dict, Any
 
@@ -15,6 +16,27 @@ def normalize_city(name: str) -> str:
     return name
 
 
+# Abréviations courantes des noms de communes
+_NAME_ABBREVIATIONS = {"st": "saint", "ste": "sainte"}
+
+
+def fold_name(name: str) -> str:
+    """
+    Forme canonique d'un nom de lieu pour les recherches : minuscules, sans
+    accents, ligatures ni parenthèses, tirets/apostrophes/underscores remplacés
+    par des espaces et "St"/"Ste" développés.
+
+    >>> fold_name("St-Étienne (42)") == fold_name("saint etienne")
+    True
+    """
+    name = re.sub(r"\([^)]*\)", " ", name.lower())
+    name = name.replace("œ", "oe").replace("æ", "ae")
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    tokens = re.sub(r"[^a-z0-9]+", " ", name).split()
+    return " ".join(_NAME_ABBREVIATIONS.get(t, t) for t in tokens)
+
+
 def save_json(data: Dict[str, Any], path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text(
@@ -36,3 +58,8 @@ def get_last_scraped_page(city_slug: str) -> int:
             pass
 
     return max(pages) if pages else 0
+
+
+def count_annonces(city_slug: str) -> int:
+    p = Path("jsons") / city_slug / "annonces"
+    return sum(1 for _ in p.glob("*.json")) if p.exists() else 0
@@ -2,7 +2,12 @@
 Agent GPT – Analyse immobilière
 """
 
-from .gpt_assistant import GPTAssistant
+__all__ = ["GPTAssistant"]
 
 
-__all__ = ["GPTAssistant"]
+def __getattr__(name):
+    # Import paresseux : `gpt_agent.prompts` ne doit pas charger le SDK OpenAI
+    if name == "GPTAssistant":
+        from .gpt_assistant import GPTAssistant
+        return GPTAssistant
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
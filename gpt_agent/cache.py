@@ -0,0 +1,144 @@
+# gpt_agent/cache.py
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+CACHE_PATH = Path("cache/llm_responses.sqlite3")
+
+# Durée de validité d'une réponse et taille maximale du cache
+DEFAULT_TTL = 7 * 24 * 3600
+MAX_CACHE_BYTES = 50 * 1024 * 1024
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Ignore les différences d'indentation et d'espaces des prompts multi-lignes."""
+    return " ".join(prompt.split())
+
+
+def file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ResponseCache:
+    """
+    Cache disque (SQLite) des réponses du modèle.
+
+    Clé : modèle + prompt normalisé + hash du contenu des images + options
+    de la requête (format de sortie...).
+    Les entrées expirent après `ttl` secondes ; au-delà de `max_bytes`,
+    les moins récemment utilisées sont supprimées.
+    """
+
+    def __init__(self, path: Path = CACHE_PATH, ttl: int = DEFAULT_TTL, max_bytes: int = MAX_CACHE_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " response TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def key(model: str, prompt: str, image_hashes=(), options: dict = None) -> str:
+        h = hashlib.sha256()
+        h.update(model.encode("utf-8"))
+        h.update(b"\0")
+        h.update(normalize_prompt(prompt).encode("utf-8"))
+        for image_hash in image_hashes:
+            h.update(b"\0")
+            h.update(image_hash.encode("utf-8"))
+        # Sans options, la clé reste celle des entrées déjà en cache
+        if options:
+            h.update(b"\1")
+            h.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+        return h.hexdigest()
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+                self.misses += 1
+                return None
+
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now),
+            )
+            self._evict(now)
+            self._db.commit()
+
+    def _evict(self, now: float) -> None:
+        self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for key, size in self._db.execute(
+            "SELECT key, size FROM responses ORDER BY accessed ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> ResponseCache:
+    """Cache partagé par tous les assistants du processus."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
@@ -1,7 +1,26 @@
 # services/assistant_ai.py
 
 import base64
-from openai import OpenAI
+import os
+import threading
+import time
+
+from core.metrics import REGISTRY
+from image_service.compress import encode_for_vision
+from .cache import ResponseCache, default_cache, file_hash
+
+# Backend compatible OpenAI (ex. le serveur local tools/llm_standin.py)
+LLM_BASE_URL = os.environ.get("LLM_BASE_URL")
+
+LLM_SECONDS = REGISTRY.histogram(
+    "llm_request_seconds", "Durée des appels au modèle (réponse complète)", labels=("mode",)
+)
+LLM_FIRST_TOKEN_SECONDS = REGISTRY.histogram(
+    "llm_first_token_seconds", "Délai avant le premier fragment d'une réponse en flux"
+)
+IMAGE_ENCODE_SECONDS = REGISTRY.histogram(
+    "llm_image_encode_seconds", "Durée de préparation et d'encodage des images envoyées"
+)
 
 
 class GPTAssistant:
@@ -10,58 +29,205 @@ class GPTAssistant:
     Compatible avec le SDK OpenAI 2025 (client.responses).
     """
 
-    def __init__(self, model="gpt-5-mini"):
-        self.client = OpenAI()
+    def __init__(self, model="gpt-5-mini", timeout=120, cache: ResponseCache = None, use_cache=True,
+                 client=None, base_url=LLM_BASE_URL, max_in_flight: int = None):
+        """
+        Args:
+            model: Modèle OpenAI utilisé
+            timeout: Délai maximal d'une requête (secondes)
+            cache: Cache des réponses (par défaut, le cache disque partagé)
+            use_cache: False pour toujours interroger l'API
+            client: Client déjà construit exposant `responses.create` (prioritaire)
+            base_url: URL d'un backend compatible OpenAI (défaut : $LLM_BASE_URL, sinon l'API OpenAI)
+            max_in_flight: Nombre maximal de requêtes simultanées de cet assistant,
+                tous threads confondus (illimité par défaut)
+        """
+        if client is None:
+            # Import local : le SDK OpenAI pèse au démarrage des pages
+            from openai import OpenAI
+            client = OpenAI(timeout=timeout, base_url=base_url)
+        self.client = client
         self.model = model
-    
+        self.use_cache = use_cache
+        self.cache = (cache or default_cache()) if use_cache else None
+        self._slots = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+
     def encode_image(self, image_path):
-        """Encode une image en base64 pour inclusion dans le prompt."""
-        with open(image_path, "rb") as img_file:
-            return base64.b64encode(img_file.read()).decode('utf-8')
-    
-    def ask_with_image(self, prompt, image_path):
+        """
+        Encode une image en base64 pour inclusion dans le prompt.
+        L'image est réduite à la résolution du modèle et compressée (JPEG/WebP).
+
+        Returns:
+            (type MIME, image en base64)
+        """
+        start = time.perf_counter()
+        mime, data = encode_for_vision(image_path)
+        encoded = base64.b64encode(data).decode('utf-8')
+        IMAGE_ENCODE_SECONDS.observe(time.perf_counter() - start)
+        return mime, encoded
+
+    def _cached(self, content, prompt, image_paths=(), bypass_cache=False, **options):
+        """Retourne la réponse en cache, ou appelle l'API et la mémorise."""
+        if self.cache is None or bypass_cache:
+            return self._create(content, **options)
+
+        key = self.cache.key(self.model, prompt, [file_hash(p) for p in image_paths], options)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        text = self._create(content, **options)
+        if text:
+            self.cache.put(key, text)
+        return text
+
+    def _streamed(self, content, prompt, image_paths=(), bypass_cache=False):
+        """
+        Générateur des fragments de texte au fil de la génération.
+        Une réponse en cache est restituée d'un bloc ; seule une réponse
+        complète (événement response.completed) et non vide est mémorisée.
+        """
+        key = None
+        if self.cache is not None and not bypass_cache:
+            key = self.cache.key(self.model, prompt, [file_hash(p) for p in image_paths])
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        parts = []
+        completed = False
+        content = content()
+        self._acquire()
+        try:
+            start = time.perf_counter()
+            stream = self.client.responses.create(
+                model=self.model,
+                input=[{"role": "user", "content": content}],
+                stream=True
+            )
+            for event in stream:
+                if event.type == "response.output_text.delta":
+                    if not parts:
+                        LLM_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - start)
+                    parts.append(event.delta)
+                    yield event.delta
+                elif event.type == "response.completed":
+                    completed = True
+                elif event.type in ("response.failed", "error"):
+                    raise RuntimeError(f"Génération interrompue : {getattr(event, 'message', event.type)}")
+
+            LLM_SECONDS.observe(time.perf_counter() - start, mode="stream")
+        finally:
+            self._release()
+        # Flux interrompu (générateur fermé, exception) : on n'arrive pas ici
+        text = "".join(parts)
+        if key is not None and completed and text:
+            self.cache.put(key, text)
+
+    def _create(self, content, **options):
+        content = content()
+        self._acquire()
+        try:
+            start = time.perf_counter()
+            response = self.client.responses.create(
+                model=self.model,
+                input=[{"role": "user", "content": content}],
+                **options
+            )
+            LLM_SECONDS.observe(time.perf_counter() - start, mode="ask")
+        finally:
+            self._release()
+        return response.output_text
+
+    def _acquire(self):
+        if self._slots is not None:
+            self._slots.acquire()
+
+    def _release(self):
+        if self._slots is not None:
+            self._slots.release()
+
+    def _image_content(self, prompt, *image_paths):
+        content = [{"type": "input_text", "text": prompt}]
+        for image_path in image_paths:
+            mime, base64_image = self.encode_image(image_path)
+            content.append({
+                "type": "input_image",
+                "image_url": f"data:{mime};base64,{base64_image}"
+            })
+        return content
+
+    def ask_with_image(self, prompt, image_path, bypass_cache=False):
         """
         Envoie un prompt avec une image au modèle.
-        
+
         Args:
             prompt: Le prompt textuel
             image_path: Chemin vers l'image à analyser
-            
+            bypass_cache: True pour ignorer le cache et forcer un appel API
+
         Returns:
             La réponse du modèle
         """
-        base64_image = self.encode_image(image_path)
-        
-        response = self.client.responses.create(
-            model=self.model,
-            input=[{
-                "role": "user",
-                "content": [
-                    {"type": "input_text", "text": prompt},
-                    {
-                        "type": "input_image",
-                        "image_url": f"data:image/jpeg;base64,{base64_image}"
-                    }
-                ]
-            }]
+        # Encodage de l'image seulement en cas d'appel réel
+        return self._cached(
+            lambda: self._image_content(prompt, image_path),
+            prompt, [image_path], bypass_cache,
         )
-        return response.output_text
-    
-    def ask(self, prompt):
+
+    def ask_with_images(self, prompt, image_paths, bypass_cache=False, json_output=False):
+        """
+        Envoie un prompt avec plusieurs images dans une seule requête.
+
+        Args:
+            prompt: Le prompt textuel (doit décrire l'ordre des images)
+            image_paths: Chemins des images, dans l'ordre
+            bypass_cache: True pour ignorer le cache et forcer un appel API
+            json_output: True pour exiger un objet JSON en réponse
+
+        Returns:
+            La réponse du modèle (texte brut)
+        """
+        options = {"text": {"format": {"type": "json_object"}}} if json_output else {}
+        return self._cached(
+            lambda: self._image_content(prompt, *image_paths),
+            prompt, list(image_paths), bypass_cache, **options,
+        )
+
+    def ask(self, prompt, bypass_cache=False):
         """
         Envoie un prompt textuel simple au modèle (sans image).
-        
+
         Args:
             prompt: Le prompt textuel
-            
+            bypass_cache: True pour ignorer le cache et forcer un appel API
+
         Returns:
             La réponse du modèle
         """
-        response = self.client.responses.create(
-            model=self.model,
-            input=[{
-                "role": "user",
-                "content": [{"type": "input_text", "text": prompt}]
-            }]
+        return self._cached(
+            lambda: [{"type": "input_text", "text": prompt}],
+            prompt, (), bypass_cache,
         )
-        return response.output_text
+
+    def stream_with_image(self, prompt, image_path, bypass_cache=False):
+        """
+        Comme `ask_with_image`, mais retourne un générateur qui produit le
+        texte au fur et à mesure (ex. pour `st.write_stream`).
+        """
+        return self._streamed(
+            lambda: self._image_content(prompt, image_path),
+            prompt, [image_path], bypass_cache,
+        )
+
+    def stream(self, prompt, bypass_cache=False):
+        """Comme `ask`, mais retourne un générateur de fragments de texte."""
+        return self._streamed(
+            lambda: [{"type": "input_text", "text": prompt}],
+            prompt, (), bypass_cache,
+        )
+
+    def cache_stats(self) -> dict:
+        """Statistiques du cache (hits, misses, entrées, octets)."""
+        return self.cache.stats() if self.cache is not None else {}
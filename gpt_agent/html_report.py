@@ -0,0 +1,169 @@
+# gpt_agent/html_report.py
+"""
+Rapport comparatif au format HTML interactif.
+
+Même contenu que le rapport PDF (introduction, analyses, conclusion), mais
+les graphiques ne sont pas capturés : le JSON des figures Plotly et des
+decks Pydeck (allégés) est embarqué tel quel dans un seul fichier, avec un
+unique bundle plotly.js. Aucun navigateur headless n'est lancé ; au-delà des
+appels IA, la mise en forme prend quelques dizaines de millisecondes.
+"""
+
+import html
+import time
+from datetime import datetime
+
+from core.metrics import REGISTRY
+from .gpt_assistant import GPTAssistant
+from .pdf_generator import PDFReportGenerator, comparison_charts
+
+HTML_LAYOUT_SECONDS = REGISTRY.histogram(
+    "report_html_layout_seconds", "Durée de mise en forme et d'écriture du rapport HTML"
+)
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="fr">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+{plotlyjs}
+<style>
+  body {{ font-family: "DejaVu Sans", Arial, sans-serif; max-width: 1100px; margin: 40px auto; color: #222; }}
+  h1 {{ text-align: center; color: #0062f4; }}
+  h2 {{ color: #0062f4; border-bottom: 1px solid #ddd; padding-bottom: 4px; margin-top: 48px; }}
+  p {{ text-align: justify; line-height: 1.5; }}
+  .date {{ text-align: center; color: #777; }}
+  .chart {{ width: 100%; height: 520px; }}
+  .map {{ width: 100%; height: 520px; border: 0; }}
+</style>
+</head>
+<body>
+<h1>{heading}</h1>
+<p class="date">Rapport généré le {date}</p>
+{body}
+<script>
+  document.querySelectorAll("script.plotly-spec").forEach(function (spec) {{
+    var fig = JSON.parse(spec.textContent);
+    var div = document.getElementById(spec.dataset.target);
+    Plotly.newPlot(div, fig.data, fig.layout, {{responsive: true, displaylogo: false}});
+  }});
+</script>
+</body>
+</html>
+"""
+
+
+def _paragraphs(text: str) -> str:
+    paragraphs = [" ".join(p.split()) for p in (text or "").split("\n\n")]
+    return "\n".join(f"<p>{html.escape(p)}</p>" for p in paragraphs if p)
+
+
+def _plotly_block(figure, div_id: str) -> str:
+    from viz.cache import figure_json
+
+    # JSON déjà calculé par le cache de figures ; "</" fermerait la balise <script>
+    spec = figure_json(figure).replace("</", "<\\/")
+    return (
+        f'<div id="{div_id}" class="chart"></div>\n'
+        f'<script type="application/json" class="plotly-spec" data-target="{div_id}">{spec}</script>'
+    )
+
+
+def _deck_block(deck) -> str:
+    # Page Pydeck autonome (spec JSON + chargeur deck.gl) isolée dans une iframe
+    page = deck.to_html(as_string=True, notebook_display=False)
+    return f'<iframe class="map" srcdoc="{html.escape(page, quote=True)}"></iframe>'
+
+
+def _plotlyjs_tag(include_plotlyjs: str) -> str:
+    if include_plotlyjs == "cdn":
+        from plotly.offline import get_plotlyjs_version
+        return f'<script src="https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"></script>'
+    from plotly.offline import get_plotlyjs
+    return f"<script>{get_plotlyjs()}</script>"
+
+
+def render_html_report(output_path: str, city1: str, city2: str, sections: dict,
+                       charts_data: list, figures: list, include_plotlyjs: str = "inline") -> str:
+    """
+    Écrit le rapport HTML à partir du texte des sections et des figures.
+
+    Args:
+        sections: {"intro", "global", "chart_i", "conclusion": texte}
+        charts_data: Graphiques du rapport (voir `comparison_charts`)
+        figures: Figure Plotly ou deck Pydeck de chaque graphique, même ordre
+        include_plotlyjs: "inline" (fichier autonome) ou "cdn"
+    """
+    start = time.perf_counter()
+
+    body = [
+        "<h2>Introduction</h2>", _paragraphs(sections["intro"]),
+        "<h2>Vue d'ensemble</h2>", _paragraphs(sections["global"]),
+    ]
+    for i, (chart, figure) in enumerate(zip(charts_data, figures)):
+        body.append(f"<h2>{i + 1}. {html.escape(chart['name'])}</h2>")
+        if chart['type'] == "map":
+            body.append(_deck_block(figure))
+        else:
+            body.append(_plotly_block(figure, f"chart-{i}"))
+        body.append(_paragraphs(sections[f"chart_{i}"]))
+    body += ["<h2>Conclusion</h2>", _paragraphs(sections["conclusion"])]
+
+    title = f"{city1.capitalize()} vs {city2.capitalize()}"
+    page = PAGE_TEMPLATE.format(
+        title=html.escape(title),
+        heading=f"Analyse Comparative du Marché Immobilier<br>{html.escape(title)}",
+        date=datetime.now().strftime('%d/%m/%Y'),
+        plotlyjs=_plotlyjs_tag(include_plotlyjs),
+        body="\n".join(body),
+    )
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(page)
+
+    HTML_LAYOUT_SECONDS.observe(time.perf_counter() - start)
+    print(f"✅ Rapport HTML généré : {output_path}")
+    return output_path
+
+
+def generate_html_report(
+    city1: str,
+    city2: str,
+    df1,
+    df2,
+    stats1: dict,
+    stats2: dict,
+    weekly1: list,
+    weekly2: list,
+    question: str,
+    plots: list,
+    decks: list,
+    output_path: str = "imgs/rapport_comparatif.html",
+    progress_callback = None,
+    assistant: GPTAssistant = None,
+    section_callback = None,
+    include_plotlyjs: str = "inline"
+):
+    """
+    Génère le rapport HTML interactif (mêmes sections que le PDF, sans capture).
+
+    `plots` et `decks` sont les figures de `viz.dashboard.dashboard_figures`.
+    Les analyses partent du contexte chiffré de chaque graphique, sans image.
+    """
+    charts_data = comparison_charts(city1, city2, df1, df2, stats1, stats2, weekly1, weekly2, image_dir=None)
+
+    def on_section(key, name, text):
+        if section_callback:
+            section_callback(name, text)
+
+    generator = PDFReportGenerator(assistant=assistant)
+    sections = generator.generate_sections(
+        city1, city2, stats1, stats2, weekly1, weekly2, question, charts_data,
+        update_progress=progress_callback,
+        on_section=on_section,
+    )
+
+    if progress_callback:
+        progress_callback(97, "🌐 Finalisation du rapport HTML...")
+    return render_html_report(output_path, city1, city2, sections, charts_data,
+                              list(plots) + list(decks), include_plotlyjs)
@@ -7,40 +7,74 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Page
 from reportlab.lib.enums import TA_JUSTIFY, TA_CENTER
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
 from datetime import datetime
+import json
+import re
+import time
 from pathlib import Path
 
+from core.metrics import REGISTRY
+from image_service.compress import (
+    EXTENSIONS, IMAGE_FORMAT, PDF_IMAGE_DPI, PDF_IMAGE_FORMAT, PDF_IMAGE_QUALITY, prepare_for_print,
+)
 from .gpt_assistant import GPTAssistant
-from .prompts import build_dashboard_analysis_prompt, build_single_chart_analysis_prompt
+from .prompts import (
+    build_batched_chart_analysis_prompt,
+    build_city_map_analysis_prompt,
+    build_dashboard_analysis_prompt,
+    build_single_chart_analysis_prompt,
+)
 
+PDF_LAYOUT_SECONDS = REGISTRY.histogram(
+    "report_pdf_layout_seconds", "Durée de mise en page et d'écriture du PDF"
+)
 
-# Enregistrer une police Unicode-complète
-try:
-    # Tester différents chemins selon l'OS
-    font_paths = [
-        # Linux
-        '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
-        # Mac
-        '/System/Library/Fonts/Supplemental/Arial Unicode.ttf',
-        '/Library/Fonts/Arial Unicode.ttf',
-        # Windows
-        'C:/Windows/Fonts/arial.ttf',
-    ]
-    
-    for font_path in font_paths:
+# Polices Unicode-complètes, dans l'ordre de préférence selon l'OS
+FONT_PATHS = [
+    # Linux
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+    # Mac
+    '/System/Library/Fonts/Supplemental/Arial Unicode.ttf',
+    '/Library/Fonts/Arial Unicode.ttf',
+    # Windows
+    'C:/Windows/Fonts/arial.ttf',
+]
+
+_fonts = None
+
+
+def register_fonts():
+    """
+    Enregistre la police Unicode au premier rapport (et non à l'import :
+    le parsing du TTF coûte à chaque démarrage). Retourne (normale, grasse).
+    """
+    global _fonts
+    if _fonts is not None:
+        return _fonts
+
+    # Fallback sur Helvetica (police par défaut de reportlab, support Unicode limité)
+    _fonts = ('Helvetica', 'Helvetica-Bold')
+    for font_path in FONT_PATHS:
         if Path(font_path).exists():
             font_name = 'DejaVuSans' if 'DejaVu' in font_path else 'ArialUnicode'
-            pdfmetrics.registerFont(TTFont(font_name, font_path))
-            DEFAULT_FONT = font_name
-            DEFAULT_FONT_BOLD = font_name
+            try:
+                pdfmetrics.registerFont(TTFont(font_name, font_path))
+            except Exception:
+                continue
+            _fonts = (font_name, font_name)
             break
-    else:
-        # Aucune police trouvée, utiliser Helvetica
-        raise FileNotFoundError
-except:
-    # Fallback sur Helvetica (police par défaut de reportlab, support Unicode limité)
-    DEFAULT_FONT = 'Helvetica'
-    DEFAULT_FONT_BOLD = 'Helvetica-Bold'
+    return _fonts
+
+
+# Appels IA simultanés et délai maximal de la phase d'analyse (secondes)
+LLM_CONCURRENCY = 4
+LLM_TIMEOUT = 180
+
+UNAVAILABLE_TEXT = "Analyse indisponible : le service IA n'a pas répondu à temps."
+
+# Analyses des graphiques en une seule requête multi-images (repli graphique par graphique)
+BATCH_CHART_ANALYSES = True
 
 
 def format_text_for_pdf(text: str) -> str:
@@ -102,23 +136,66 @@ def format_text_for_pdf(text: str) -> str:
     return text
 
 
+def parse_batched_analyses(text: str, keys: list):
+    """
+    Extrait {clé: analyse} d'une réponse JSON (éventuellement entourée d'un
+    bloc ```json). Retourne None si une clé manque ou n'est pas du texte.
+    """
+    if not isinstance(text, str):
+        return None
+    
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return None
+    
+    if not isinstance(data, dict):
+        return None
+    analyses = {}
+    for key in keys:
+        value = data.get(key)
+        if not isinstance(value, str) or not value.strip():
+            return None
+        analyses[key] = value.strip()
+    return analyses
+
+
 class PDFReportGenerator:
     """
     Générateur de rapports PDF avec analyses IA.
     """
     
-    def __init__(self, assistant: GPTAssistant = None):
+    def __init__(self, assistant: GPTAssistant = None,
+                 max_concurrency: int = LLM_CONCURRENCY, timeout: float = LLM_TIMEOUT,
+                 image_dpi: int = PDF_IMAGE_DPI, image_format: str = PDF_IMAGE_FORMAT,
+                 image_quality: int = PDF_IMAGE_QUALITY):
+        """
+        Args:
+            image_dpi: Résolution des graphiques à leur taille imprimée
+            image_format: "JPEG" ou "PNG" (compression Flate, sans perte)
+            image_quality: Qualité JPEG
+        """
         self.assistant = assistant or GPTAssistant()
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.image_dpi = image_dpi
+        self.image_format = image_format
+        self.image_quality = image_quality
         self.styles = getSampleStyleSheet()
         self._setup_custom_styles()
     
     def _setup_custom_styles(self):
         """Configure les styles personnalisés avec support Unicode."""
+        font, font_bold = register_fonts()
+
         # Style titre
         self.styles.add(ParagraphStyle(
             name='CustomTitle',
             parent=self.styles['Heading1'],
-            fontName=DEFAULT_FONT_BOLD,
+            fontName=font_bold,
             fontSize=24,
             textColor="#0f489d",
             spaceAfter=30,
@@ -129,7 +206,7 @@ class PDFReportGenerator:
         self.styles.add(ParagraphStyle(
             name='CustomHeading',
             parent=self.styles['Heading2'],
-            fontName=DEFAULT_FONT_BOLD,
+            fontName=font_bold,
             fontSize=16,
             textColor="#32597f",
             spaceBefore=20,
@@ -140,14 +217,14 @@ class PDFReportGenerator:
         self.styles.add(ParagraphStyle(
             name='Justified',
             parent=self.styles['BodyText'],
-            fontName=DEFAULT_FONT,
+            fontName=font,
             alignment=TA_JUSTIFY,
             fontSize=11,
             leading=16
         ))
         
         # Modifier le style Normal aussi
-        self.styles['Normal'].fontName = DEFAULT_FONT
+        self.styles['Normal'].fontName = font
     
     def _generate_introduction(self, city1, city2):
         """Génère l'introduction du rapport."""
@@ -162,7 +239,7 @@ class PDFReportGenerator:
         
         Texte fluide, pas de titre, pas de formule générique.
         """
-        return self.assistant.ask(prompt)
+        return self._collect(self.assistant.stream(prompt))
     
     def _generate_global_analysis(self, city1, city2, stats1, stats2, weekly1, weekly2, question, dashboard_image_path):
         """Génère l'analyse globale avec l'image complète du dashboard."""
@@ -170,12 +247,38 @@ class PDFReportGenerator:
             city1, city2, stats1, stats2, weekly1, weekly2, question
         )
         # Utiliser l'image complète du dashboard pour l'analyse globale
-        return self.assistant.ask_with_image(prompt, dashboard_image_path)
+        return self._collect(self.assistant.stream_with_image(prompt, dashboard_image_path))
     
-    def _generate_chart_analysis(self, chart_name, chart_type, city1, city2, image_path, context):
-        """Génère l'analyse d'un graphique spécifique."""
-        prompt = build_single_chart_analysis_prompt(chart_type, city1, city2, context)
-        return self.assistant.ask_with_image(prompt, image_path)
+    def _generate_chart_analysis(self, chart_name, chart_type, city1, city2, image_path, context,
+                                 city_maps=False):
+        """Génère l'analyse d'un graphique spécifique (sur son seul contexte si pas d'image)."""
+        if chart_type == "map" and city_maps:
+            # Ne dépend que d'une ville : réponse réutilisée (cache) dans toutes ses comparaisons
+            prompt = build_city_map_analysis_prompt(context.get('city', city1), context)
+        else:
+            prompt = build_single_chart_analysis_prompt(chart_type, city1, city2, context)
+        if not image_path:
+            return self._collect(self.assistant.stream(prompt))
+        return self._collect(self.assistant.stream_with_image(prompt, image_path))
+    
+    def _generate_batched_chart_analyses(self, city1, city2, charts_data: dict):
+        """
+        Analyse plusieurs graphiques ({"chart_i": chart}) en une requête multi-images.
+        Retourne {"chart_i": texte}, ou None si la réponse est inexploitable.
+        """
+        charts = [
+            {'id': key, 'name': chart['name'], 'type': chart['type'],
+             'context': chart.get('context', {})}
+            for key, chart in charts_data.items()
+        ]
+        prompt = build_batched_chart_analysis_prompt(city1, city2, charts)
+        text = self.assistant.ask_with_images(
+            prompt, [chart['image_path'] for chart in charts_data.values()], json_output=True
+        )
+        analyses = parse_batched_analyses(text, [chart['id'] for chart in charts])
+        if analyses is None:
+            print("⚠️ Réponse groupée non exploitable, repli graphique par graphique")
+        return analyses
     
     def _generate_conclusion(self, city1, city2, all_analyses):
         """Génère la conclusion du rapport."""
@@ -192,7 +295,126 @@ class PDFReportGenerator:
         
         Texte fluide, pas de titre, pas de formule type "En conclusion".
         """
-        return self.assistant.ask(prompt)
+        return self._collect(self.assistant.stream(prompt))
+    
+    @staticmethod
+    def _collect(stream) -> str:
+        """Assemble le texte d'une réponse en flux."""
+        return "".join(stream)
+    
+    def generate_sections(
+        self,
+        city1: str,
+        city2: str,
+        stats1: dict,
+        stats2: dict,
+        weekly1: list,
+        weekly2: list,
+        question: str,
+        charts_data: list[dict],
+        dashboard_image_path: str = None,
+        update_progress = None,
+        on_section = None,
+        batch_charts: bool = BATCH_CHART_ANALYSES,
+        city_maps: bool = False
+    ) -> dict:
+        """
+        Rédige le contenu du rapport, indépendamment de sa mise en forme (PDF ou HTML).
+        
+        Sans `image_path` (ou sans `dashboard_image_path`), les analyses se
+        fondent sur le seul contexte chiffré, sans envoyer d'image.
+        
+        `city_maps` (rapports en lot) : chaque carte est analysée à part avec
+        un prompt qui ne cite que sa ville, réutilisé par le cache IA dans
+        toutes les paires de cette ville. Par défaut les cartes partent dans
+        la requête groupée (un seul aller-retour de vision).
+        
+        Returns:
+            {"intro", "global", "chart_0"..., "conclusion": texte}
+        """
+        update_progress = update_progress or (lambda *_: None)
+        on_section = on_section or (lambda *_: None)
+        
+        # ========== APPELS IA EN PARALLÈLE ==========
+        # Introduction, vue d'ensemble et analyses des graphiques sont
+        # indépendantes : elles partent en même temps (concurrence bornée).
+        # Seule la conclusion attend les autres résultats.
+        update_progress(25, "📝 Rédaction des analyses...")
+        
+        def global_analysis_task():
+            if dashboard_image_path:
+                return self._generate_global_analysis(
+                    city1, city2, stats1, stats2, weekly1, weekly2, question, dashboard_image_path
+                )
+            # Fallback sans image si non fournie
+            prompt = build_dashboard_analysis_prompt(
+                city1, city2, stats1, stats2, weekly1, weekly2, question
+            )
+            return self._collect(self.assistant.stream(prompt))
+        
+        tasks = {
+            "intro": ("Introduction", lambda: self._generate_introduction(city1, city2)),
+            "global": ("Vue d'ensemble", global_analysis_task),
+        }
+        chart_tasks = {}
+        for i, chart in enumerate(charts_data):
+            chart_tasks[f"chart_{i}"] = (chart['name'], lambda chart=chart: self._generate_chart_analysis(
+                chart['name'],
+                chart['type'],
+                city1,
+                city2,
+                chart.get('image_path'),
+                chart.get('context', {}),
+                city_maps=city_maps,
+            ))
+        
+        # Avec `city_maps`, les cartes (une seule ville) sont analysées à part ;
+        # les autres graphiques partent ensemble dans une seule requête
+        pair_charts = {
+            f"chart_{i}": chart for i, chart in enumerate(charts_data)
+            if not (city_maps and chart['type'] == "map")
+        }
+        batched = (batch_charts and len(pair_charts) > 1
+                   and all(chart.get('image_path') for chart in pair_charts.values()))
+        if batched:
+            tasks["charts"] = ("Analyses des graphiques", lambda: self._generate_batched_chart_analyses(
+                city1, city2, pair_charts
+            ))
+            tasks.update({key: task for key, task in chart_tasks.items() if key not in pair_charts})
+        else:
+            tasks.update(chart_tasks)
+        
+        def on_result(key: str, name: str, text):
+            # La requête groupée livre toutes les analyses de graphiques d'un coup
+            if key == "charts":
+                if isinstance(text, dict):
+                    for chart_key, chart_text in text.items():
+                        on_section(chart_key, chart_tasks[chart_key][0], chart_text)
+                return
+            on_section(key, name, text)
+        
+        results = self._run_concurrently(tasks, update_progress, start=25, end=90, on_result=on_result)
+        
+        if batched:
+            charts_result = results.pop("charts")
+            if isinstance(charts_result, dict):
+                results.update(charts_result)
+            else:
+                update_progress(75, "↩️ Réponse groupée illisible, analyse graphique par graphique...")
+                results.update(self._run_concurrently(
+                    {key: chart_tasks[key] for key in pair_charts},
+                    update_progress, start=75, end=90, on_result=on_section
+                ))
+        
+        # ========== CONCLUSION ==========
+        update_progress(92, "✍️ Rédaction de la conclusion...")
+        all_analyses = [results["global"]] + [results[f"chart_{i}"] for i in range(len(charts_data))]
+        conclusion_text = self._run_with_timeout(
+            lambda: self._generate_conclusion(city1, city2, "\n\n".join(all_analyses))
+        )
+        on_section("conclusion", "Conclusion", conclusion_text)
+        results["conclusion"] = conclusion_text
+        return results
     
     def save_to_pdf(
         self,
@@ -206,7 +428,10 @@ class PDFReportGenerator:
         question: str,
         charts_data: list[dict],
         dashboard_image_path: str = None,
-        progress_callback = None
+        progress_callback = None,
+        section_callback = None,
+        batch_charts: bool = BATCH_CHART_ANALYSES,
+        city_maps: bool = False
     ):
         """
         Génère un rapport PDF complet avec analyses IA.
@@ -226,15 +451,42 @@ class PDFReportGenerator:
                 }
             dashboard_image_path: Chemin de l'image complète du dashboard (optionnel)
             progress_callback: Fonction callback(progress: int, message: str) pour le suivi
+            section_callback: Fonction callback(name: str, text: str) appelée dès
+                qu'une section est rédigée, avant la fin des autres
+            batch_charts: Analyser tous les graphiques en une seule requête
+                (repli sur une requête par graphique si la réponse est illisible)
+            city_maps: Analyser les cartes à part, par ville (rapports en lot)
         """
         def update_progress(progress: int, message: str):
             if progress_callback:
                 progress_callback(progress, message)
         
+        # Chaque section est mise en forme dès que sa réponse est complète
+        sections = {}
+        
+        def on_section(key: str, name: str, text: str):
+            sections[key] = Paragraph(format_text_for_pdf(text), self.styles['Justified'])
+            if section_callback:
+                section_callback(name, text)
+        
+        self.generate_sections(
+            city1, city2, stats1, stats2, weekly1, weekly2, question, charts_data,
+            dashboard_image_path=dashboard_image_path,
+            update_progress=update_progress,
+            on_section=on_section,
+            batch_charts=batch_charts,
+            city_maps=city_maps,
+        )
+        
+        # ========== MISE EN PAGE ==========
+        update_progress(97, "📄 Finalisation du PDF...")
+        layout_start = time.perf_counter()
+        
         # Créer le document
         doc = SimpleDocTemplate(output_path, pagesize=A4,
                                 rightMargin=72, leftMargin=72,
-                                topMargin=72, bottomMargin=18)
+                                topMargin=72, bottomMargin=18,
+                                pageCompression=1)
         
         # Conteneur pour les éléments du PDF
         story = []
@@ -256,36 +508,17 @@ class PDFReportGenerator:
         story.append(PageBreak())
         
         # ========== INTRODUCTION ==========
-        update_progress(25, "📝 Rédaction de l'introduction...")
         story.append(Paragraph("Introduction", self.styles['CustomHeading']))
-        intro_text = self._generate_introduction(city1, city2)
-        story.append(Paragraph(format_text_for_pdf(intro_text), self.styles['Justified']))
+        story.append(sections["intro"])
         story.append(Spacer(1, 0.3*inch))
         
         # ========== ANALYSE GLOBALE ==========
-        update_progress(35, "🔍 Analyse globale du dashboard...")
         story.append(Paragraph("Vue d'ensemble", self.styles['CustomHeading']))
-        if dashboard_image_path:
-            global_analysis = self._generate_global_analysis(
-                city1, city2, stats1, stats2, weekly1, weekly2, question, dashboard_image_path
-            )
-        else:
-            # Fallback sans image si non fournie
-            prompt = build_dashboard_analysis_prompt(
-                city1, city2, stats1, stats2, weekly1, weekly2, question
-            )
-            global_analysis = self.assistant.ask(prompt)
-        story.append(Paragraph(format_text_for_pdf(global_analysis), self.styles['Justified']))
+        story.append(sections["global"])
         story.append(PageBreak())
         
         # ========== ANALYSES GRAPHIQUE PAR GRAPHIQUE ==========
-        all_analyses = [global_analysis]
-        
         for i, chart in enumerate(charts_data):
-            # Progression pour chaque graphique
-            progress = 45 + int((i / len(charts_data)) * 45)
-            update_progress(progress, f"📊 Analyse: {chart['name']}... ({i+1}/{len(charts_data)})")
-            
             # Titre du graphique
             story.append(Paragraph(
                 f"{i+1}. {chart['name']}", 
@@ -294,40 +527,12 @@ class PDFReportGenerator:
             story.append(Spacer(1, 0.2*inch))
             
             # Image du graphique (garder le ratio d'aspect)
-            if Path(chart['image_path']).exists():
-                # Charger l'image pour obtenir ses dimensions réelles
-                from PIL import Image as PILImage
-                pil_img = PILImage.open(chart['image_path'])
-                img_width, img_height = pil_img.size
-                
-                # Calculer le ratio d'aspect
-                aspect_ratio = img_height / img_width
-                
-                # Définir la largeur max et calculer la hauteur en conséquence
-                max_width = 5.5 * inch
-                calculated_height = max_width * aspect_ratio
-                
-                # Limiter la hauteur max pour éviter les images trop grandes
-                max_height = 4 * inch
-                if calculated_height > max_height:
-                    calculated_height = max_height
-                    max_width = calculated_height / aspect_ratio
-                
-                img = Image(chart['image_path'], width=max_width, height=calculated_height)
-                story.append(img)
+            if chart.get('image_path') and Path(chart['image_path']).exists():
+                story.append(self._chart_image(chart['image_path']))
                 story.append(Spacer(1, 0.2*inch))
             
             # Analyse du graphique
-            chart_analysis = self._generate_chart_analysis(
-                chart['name'],
-                chart['type'],
-                city1,
-                city2,
-                chart['image_path'],
-                chart.get('context', {})
-            )
-            story.append(Paragraph(format_text_for_pdf(chart_analysis), self.styles['Justified']))
-            all_analyses.append(chart_analysis)
+            story.append(sections[f"chart_{i}"])
             
             # Saut de page sauf pour le dernier
             if i < len(charts_data) - 1:
@@ -336,58 +541,103 @@ class PDFReportGenerator:
                 story.append(Spacer(1, 0.5*inch))
         
         # ========== CONCLUSION ==========
-        update_progress(92, "✍️ Rédaction de la conclusion...")
         story.append(PageBreak())
         story.append(Paragraph("Conclusion", self.styles['CustomHeading']))
-        conclusion_text = self._generate_conclusion(
-            city1, city2, 
-            "\n\n".join(all_analyses)
-        )
-        story.append(Paragraph(format_text_for_pdf(conclusion_text), self.styles['Justified']))
+        story.append(sections["conclusion"])
         
-        # ========== GÉNÉRATION DU PDF ==========
-        update_progress(97, "📄 Finalisation du PDF...")
         # ========== GÉNÉRATION DU PDF ==========
         doc.build(story)
+        PDF_LAYOUT_SECONDS.observe(time.perf_counter() - layout_start)
         print(f"✅ Rapport PDF généré : {output_path}")
+    
+    def _chart_image(self, image_path):
+        """
+        Image d'un graphique à la largeur de la page, ratio d'aspect préservé,
+        rééchantillonnée à sa taille imprimée et recompressée.
+        """
+        # Lire les dimensions réelles (en-tête seulement)
+        from PIL import Image as PILImage
+        with PILImage.open(image_path) as pil_img:
+            img_width, img_height = pil_img.size
+        
+        # Calculer le ratio d'aspect
+        aspect_ratio = img_height / img_width
+        
+        # Définir la largeur max et calculer la hauteur en conséquence
+        max_width = 5.5 * inch
+        calculated_height = max_width * aspect_ratio
+        
+        # Limiter la hauteur max pour éviter les images trop grandes
+        max_height = 4 * inch
+        if calculated_height > max_height:
+            calculated_height = max_height
+            max_width = calculated_height / aspect_ratio
+        
+        print_path = prepare_for_print(image_path, max_width, calculated_height,
+                                       self.image_dpi, self.image_format, self.image_quality)
+        return Image(print_path, width=max_width, height=calculated_height)
+    
+    def _run_concurrently(self, tasks: dict, update_progress, start: int, end: int,
+                          on_result=None) -> dict:
+        """
+        Exécute les appels IA indépendants en parallèle (au plus
+        `max_concurrency` à la fois) et retourne {clé: texte}.
+        Un appel en erreur ou hors délai est remplacé par un texte de repli.
+        `on_result(clé, nom, texte)` est appelé à chaque résultat, dans
+        l'ordre d'arrivée.
+        """
+        def deliver(key, name, text):
+            results[key] = text
+            if on_result:
+                on_result(key, name, text)
+        
+        results = {}
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        futures = {executor.submit(fn): (key, name) for key, (name, fn) in tasks.items()}
+        
+        try:
+            for done, future in enumerate(as_completed(futures, timeout=self.timeout), start=1):
+                key, name = futures[future]
+                try:
+                    text = future.result()
+                except Exception as e:
+                    print(f"❌ Analyse '{name}' en erreur : {e}")
+                    text = UNAVAILABLE_TEXT
+                deliver(key, name, text)
+                progress = start + int(done / len(futures) * (end - start))
+                update_progress(progress, f"📊 Analyse terminée : {name} ({done}/{len(futures)})")
+        except FuturesTimeout:
+            for future, (key, name) in futures.items():
+                if key not in results:
+                    print(f"⏱️ Analyse '{name}' hors délai ({self.timeout}s)")
+                    future.cancel()
+                    deliver(key, name, UNAVAILABLE_TEXT)
+        finally:
+            # Ne pas bloquer sur les appels restés en vol après le délai
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        return results
+    
+    def _run_with_timeout(self, fn) -> str:
+        """Un appel IA isolé, borné par le même délai que les autres."""
+        results = self._run_concurrently({"call": ("Conclusion", fn)}, lambda *_: None, 0, 0)
+        return results["call"]
 
 
-def generate_comparison_report(
-    city1: str,
-    city2: str,
-    df1,
-    df2,
-    stats1: dict,
-    stats2: dict,
-    weekly1: list,
-    weekly2: list,
-    question: str,
-    output_path: str = "imgs/rapport_comparatif.pdf",
-    progress_callback = None
-):
+def comparison_charts(city1, city2, df1, df2, stats1, stats2, weekly1, weekly2, image_dir="imgs"):
     """
-    Fonction helper pour générer un rapport complet.
-    
-    Usage:
-        generate_comparison_report(
-            city1="Lyon",
-            city2="Paris",
-            df1=df_lyon,
-            df2=df_paris,
-            stats1=stats_lyon,
-            stats2=stats_paris,
-            weekly1=weekly_lyon,
-            weekly2=weekly_paris,
-            question="Quelle ville est la plus attractive?",
-            output_path="rapport.pdf"
-        )
+    Graphiques du rapport comparatif, dans l'ordre de `dashboard_figures`
+    (camembert, nuage de points, évolution, carte ville 1, carte ville 2).
+    Avec `image_dir=None`, aucune capture n'est associée (analyses sur le contexte).
     """
-    # Préparer les données des graphiques
-    charts_data = [
+    def image(name):
+        return f"{image_dir}/{name}" if image_dir else None
+    
+    charts = [
         {
             'name': 'Distribution des annonces',
             'type': 'pie',
-            'image_path': 'imgs/plotly_screenshot_0.png',
+            'image_path': image('plotly_screenshot_0.png'),
             'context': {
                 'count_city1': len(df1),
                 'count_city2': len(df2)
@@ -396,7 +646,7 @@ def generate_comparison_report(
         {
             'name': 'Prix au m² vs Surface',
             'type': 'scatter',
-            'image_path': 'imgs/plotly_screenshot_1.png',
+            'image_path': image('plotly_screenshot_1.png'),
             'context': {
                 'median_price_city1': stats1['median'],
                 'median_price_city2': stats2['median']
@@ -405,7 +655,7 @@ def generate_comparison_report(
         {
             'name': 'Évolution temporelle des prix',
             'type': 'temporal',
-            'image_path': 'imgs/plotly_screenshot_2.png',
+            'image_path': image('plotly_screenshot_2.png'),
             'context': {
                 'trend_city1': 'stable' if len(weekly1) > 0 else 'unknown',
                 'trend_city2': 'stable' if len(weekly2) > 0 else 'unknown'
@@ -414,19 +664,69 @@ def generate_comparison_report(
         {
             'name': f'Distribution géographique - {city1}',
             'type': 'map',
-            'image_path': 'imgs/pydeck_screenshot_0.png',
+            'image_path': image('pydeck_screenshot_0.png'),
             'context': {'city': city1}
         },
         {
             'name': f'Distribution géographique - {city2}',
             'type': 'map',
-            'image_path': 'imgs/pydeck_screenshot_1.png',
+            'image_path': image('pydeck_screenshot_1.png'),
             'context': {'city': city2}
         }
     ]
     
+    if image_dir is None:
+        # Sans capture, le modèle ne voit que le contexte : on le complète
+        charts[1]['context'].update({'mean_price_city1': stats1['mean'], 'mean_price_city2': stats2['mean']})
+        charts[2]['context'].update({'weekly_city1': weekly1, 'weekly_city2': weekly2})
+    return charts
+
+
+def generate_comparison_report(
+    city1: str,
+    city2: str,
+    df1,
+    df2,
+    stats1: dict,
+    stats2: dict,
+    weekly1: list,
+    weekly2: list,
+    question: str,
+    output_path: str = "imgs/rapport_comparatif.pdf",
+    progress_callback = None,
+    dashboard_image_path: str = f"imgs/dashboard_image{EXTENSIONS.get(IMAGE_FORMAT, '.png')}",
+    assistant: GPTAssistant = None,
+    section_callback = None,
+    image_dir: str = "imgs",
+    max_concurrency: int = LLM_CONCURRENCY,
+    batch_charts: bool = BATCH_CHART_ANALYSES,
+    city_maps: bool = False
+):
+    """
+    Fonction helper pour générer un rapport complet.
+    
+    Usage:
+        generate_comparison_report(
+            city1="Lyon",
+            city2="Paris",
+            df1=df_lyon,
+            df2=df_paris,
+            stats1=stats_lyon,
+            stats2=stats_paris,
+            weekly1=weekly_lyon,
+            weekly2=weekly_paris,
+            question="Quelle ville est la plus attractive?",
+            output_path="rapport.pdf"
+        )
+    
+    Les captures des graphiques sont lues dans `image_dir` (celui passé à
+    `dashboard_to_image`).
+    """
+    # Préparer les données des graphiques
+    charts_data = comparison_charts(city1, city2, df1, df2, stats1, stats2, weekly1, weekly2, image_dir)
+    
     # Générer le PDF
-    generator = PDFReportGenerator()
+    generator = PDFReportGenerator(assistant=assistant, max_concurrency=max_concurrency)
     generator.save_to_pdf(
         output_path=output_path,
         city1=city1,
@@ -437,8 +737,11 @@ def generate_comparison_report(
         weekly2=weekly2,
         question=question,
         charts_data=charts_data,
-        dashboard_image_path="imgs/dashboard_image.png",
-        progress_callback=progress_callback
+        dashboard_image_path=dashboard_image_path,
+        progress_callback=progress_callback,
+        section_callback=section_callback,
+        batch_charts=batch_charts,
+        city_maps=city_maps
     )
     
     return output_path
@@ -95,6 +95,69 @@ def build_single_chart_analysis_prompt(chart_type, city1, city2, context):
     return prompt.strip()
 
 
+def build_city_map_analysis_prompt(city, context):
+    """
+    Construit un prompt pour l'analyse de la carte des annonces d'une ville.
+    Le prompt ne cite que cette ville : la réponse est la même quelle que
+    soit la ville comparée.
+    """
+    prompt = f"""
+    Tu es un expert en analyse immobilière. Analyse cette carte des annonces 
+    locatives de {city}, où chaque point est une annonce colorée selon son prix au m² 
+    (bleu : moins cher, rouge : plus cher).
+    
+    Contexte additionnel :
+    {json.dumps(context, indent=2, ensure_ascii=False)}
+    
+    Rédige une analyse en 2-3 paragraphes courts et fluides.
+    Décris la répartition géographique de l'offre, les quartiers chers et abordables, et les conclusions pratiques.
+    Il s'agit d'un rapport destiné à des clients non techniques. Les données proviennent d'un dashboard immobilier locatif.
+    Format :
+    - Texte en paragraphes (pas de listes, pas de numérotation)
+    - Sauts de ligne entre paragraphes
+    - Pas de formules génériques ("cette carte montre que...", "en conclusion...")
+    """
+    
+    return prompt.strip()
+
+
+def build_batched_chart_analysis_prompt(city1, city2, charts):
+    """
+    Construit un prompt unique pour analyser plusieurs graphiques en une requête.
+    
+    Args:
+        city1, city2: Noms des villes
+        charts: Liste de dicts {'id', 'name', 'type', 'context'}, dans l'ordre
+            des images jointes
+    """
+    descriptions = "\n".join(
+        f"""
+    Image {i + 1} — clé "{chart['id']}" : {chart['name']} (graphique de type "{chart['type']}")
+    Contexte : {json.dumps(chart.get('context', {}), ensure_ascii=False)}"""
+        for i, chart in enumerate(charts)
+    )
+    keys = ", ".join(f'"{chart["id"]}"' for chart in charts)
+    
+    prompt = f"""
+    Tu es un expert en analyse immobilière. Les {len(charts)} images jointes sont des 
+    graphiques d'un dashboard comparant {city1} et {city2}, dans cet ordre :
+    {descriptions}
+    
+    Pour chaque graphique, rédige une analyse en 2-3 paragraphes courts et fluides.
+    Décris ce que montre le graphique, les insights clés, et les conclusions pratiques.
+    Il s'agit d'un rapport destiné à des clients non techniques. Les données proviennent d'un dashboard immobilier locatif.
+    Format de chaque analyse :
+    - Texte en paragraphes (pas de listes, pas de numérotation)
+    - Sauts de ligne entre paragraphes
+    - Pas de formules génériques ("ce graphique montre que...", "en conclusion...")
+    
+    Réponds UNIQUEMENT avec un objet JSON dont les clés sont {keys} 
+    et les valeurs le texte de l'analyse correspondante.
+    """
+    
+    return prompt.strip()
+
+
 def build_pdf_report_prompt(city1, city2, all_stats):
     """
     Construit un prompt pour générer un rapport PDF complet.
@@ -0,0 +1,263 @@
+# gpt_agent/report_jobs.py
+"""
+File locale de génération des rapports (PDF ou HTML interactif).
+
+Les rapports sont générés hors du thread Streamlit par un pool de workers.
+Chaque job écrit ses captures et son rapport dans son propre dossier
+(imgs/jobs/<id>/) : deux utilisateurs ne s'écrasent plus. La page soumet un
+job puis interroge `status(job_id)` à chaque rafraîchissement.
+
+Un rapport déjà généré (ou en cours) pour les mêmes villes, la même version
+des données, la même question et le même format est réutilisé au lieu
+d'être régénéré.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+JOBS_DIR = Path("imgs/jobs")
+
+# Rapports générés simultanément et nombre de dossiers de jobs conservés
+REPORT_WORKERS = int(os.environ.get("REPORT_WORKERS", "2"))
+MAX_JOBS_KEPT = 50
+
+DEFAULT_QUESTION = "Quelle ville est la plus attractive pour investir ?"
+
+
+class ReportJob:
+    """État d'un rapport : en file, en cours, terminé ou en erreur."""
+
+    def __init__(self, job_id, cities, question, use_log, key, output_dir, fmt="pdf"):
+        self.id = job_id
+        self.cities = list(cities)
+        self.question = question
+        self.use_log = use_log
+        self.format = fmt
+        self.key = key
+        self.output_dir = output_dir
+        self.state = "queued"
+        self.progress = 0
+        self.message = "⏳ En attente d'un worker..."
+        self.sections = []
+        self.report_path = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def update(self, progress: int, message: str) -> None:
+        self.progress = progress
+        self.message = message
+
+    def add_section(self, name: str, text: str) -> None:
+        self.sections.append({"name": name, "text": text})
+
+    def snapshot(self) -> dict:
+        return {
+            "id": self.id,
+            "cities": self.cities,
+            "question": self.question,
+            "format": self.format,
+            "state": self.state,
+            "progress": self.progress,
+            "message": self.message,
+            "sections": list(self.sections),
+            "report_path": self.report_path,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+def job_key(cities, question: str, use_log: bool = True, fmt: str = "pdf") -> str:
+    """Clé de déduplication : villes, version des données, question, échelle, format."""
+    from core.data_loader import dataset_version  # pandas : pas au chargement de la page
+
+    versions = [dataset_version(city) for city in cities]
+    normalized = " ".join((question or DEFAULT_QUESTION).split()).lower()
+    return json.dumps([[c.lower() for c in cities], versions, normalized, use_log, fmt])
+
+
+class ReportQueue:
+    def __init__(self, max_workers: int = REPORT_WORKERS, root: Path = JOBS_DIR):
+        self.root = root
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report")
+        self._jobs = {}
+        self._by_key = {}
+        self._lock = threading.Lock()
+        self._load_finished()
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+    def submit(self, cities, question: str = None, use_log: bool = True,
+               use_cache: bool = True, force: bool = False, fmt: str = "pdf") -> str:
+        """
+        Met un rapport en file et retourne l'identifiant du job.
+        Un job identique terminé ou en cours est réutilisé, sauf `force`.
+        `fmt` : "pdf" (captures des graphiques) ou "html" (figures interactives).
+        """
+        question = question or DEFAULT_QUESTION
+        key = job_key(cities, question, use_log, fmt)
+
+        with self._lock:
+            existing = self._jobs.get(self._by_key.get(key))
+            if existing and existing.state != "error" and not force:
+                if existing.state != "done" or Path(existing.report_path).exists():
+                    return existing.id
+
+            job_id = uuid.uuid4().hex[:12]
+            job = ReportJob(job_id, cities, question, use_log, key, self.root / job_id, fmt)
+            self._jobs[job_id] = job
+            self._by_key[key] = job_id
+
+        self._executor.submit(self._run, job, use_cache)
+        return job_id
+
+    def status(self, job_id: str):
+        """Instantané du job (None si inconnu)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job.snapshot() if job else None
+
+    # ------------------------------------------------------------------
+    # WORKER
+    # ------------------------------------------------------------------
+    def _run(self, job: ReportJob, use_cache: bool) -> None:
+        # Imports locaux : ces modules tirent Plotly, Selenium et reportlab
+        from core.geo import get_city_coords
+        from image_service.dashboard_to_image import dashboard_to_image
+        from viz.compare import load_comparison
+        from viz.dashboard import dashboard_figures
+        from .gpt_assistant import GPTAssistant
+        from .html_report import generate_html_report
+        from .pdf_generator import generate_comparison_report
+
+        job.state = "running"
+        output_dir = str(job.output_dir)
+        try:
+            job.update(5, "📂 Chargement des données...")
+            city1, city2 = job.cities
+            pair = load_comparison(job.cities)
+            coords1 = get_city_coords(city1.lower())
+            coords2 = get_city_coords(city2.lower())
+
+            plots, decks = dashboard_figures(pair, job.use_log, coords1, coords2)
+            report_args = dict(
+                city1=city1,
+                city2=city2,
+                df1=pair.frame(city1),
+                df2=pair.frame(city2),
+                stats1=pair.stats[city1],
+                stats2=pair.stats[city2],
+                weekly1=pair.weekly_prices(city1),
+                weekly2=pair.weekly_prices(city2),
+                question=job.question,
+                progress_callback=job.update,
+                assistant=GPTAssistant(use_cache=use_cache),
+                section_callback=job.add_section,
+            )
+
+            if job.format == "html":
+                # Figures embarquées telles quelles : aucune capture
+                job.output_dir.mkdir(parents=True, exist_ok=True)
+                job.update(20, "🌐 Génération du rapport HTML...")
+                job.report_path = generate_html_report(
+                    plots=plots,
+                    decks=decks,
+                    output_path=os.path.join(output_dir, "rapport_comparatif.html"),
+                    **report_args,
+                )
+            else:
+                job.update(10, "📸 Génération des images...")
+                dash_img = dashboard_to_image(plt=plots, pdk=decks, output_dir=output_dir)
+
+                job.update(20, "📄 Génération du rapport PDF...")
+                job.report_path = generate_comparison_report(
+                    output_path=os.path.join(output_dir, "rapport_comparatif.pdf"),
+                    dashboard_image_path=dash_img,
+                    image_dir=output_dir,
+                    **report_args,
+                )
+            job.update(100, "✅ Rapport terminé !")
+            job.state = "done"
+        except Exception as e:
+            print(f"❌ Rapport {job.id} en erreur : {e}")
+            job.error = str(e)
+            job.state = "error"
+        finally:
+            job.finished_at = time.time()
+            self._save(job)
+            self._prune()
+
+    # ------------------------------------------------------------------
+    # PERSISTANCE
+    # ------------------------------------------------------------------
+    def _save(self, job: ReportJob) -> None:
+        """Écrit job.json dans le dossier du job (rapports réutilisables après redémarrage)."""
+        job.output_dir.mkdir(parents=True, exist_ok=True)
+        data = job.snapshot()
+        data["key"] = job.key
+        data["use_log"] = job.use_log
+        path = job.output_dir / "job.json"
+        tmp = path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def _load_finished(self) -> None:
+        for path in self.root.glob("*/job.json"):
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                continue
+            if data.get("state") != "done":
+                continue
+
+            job = ReportJob(data["id"], data["cities"], data["question"],
+                            data.get("use_log", True), data["key"], path.parent,
+                            data.get("format", "pdf"))
+            job.state = "done"
+            job.progress = 100
+            job.message = "✅ Rapport terminé !"
+            job.sections = data.get("sections", [])
+            job.report_path = data["report_path"]
+            job.created_at = data.get("created_at", 0)
+            job.finished_at = data.get("finished_at")
+            self._jobs[job.id] = job
+            current = self._jobs.get(self._by_key.get(job.key))
+            if current is None or (current.finished_at or 0) < (job.finished_at or 0):
+                self._by_key[job.key] = job.id
+
+    def _prune(self) -> None:
+        """Supprime les plus anciens jobs terminés au-delà de MAX_JOBS_KEPT."""
+        with self._lock:
+            finished = sorted(
+                (job for job in self._jobs.values() if job.finished_at),
+                key=lambda job: job.finished_at,
+            )
+            stale = finished[:max(0, len(finished) - MAX_JOBS_KEPT)]
+            for job in stale:
+                del self._jobs[job.id]
+                if self._by_key.get(job.key) == job.id:
+                    del self._by_key[job.key]
+
+        for job in stale:
+            shutil.rmtree(job.output_dir, ignore_errors=True)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def report_queue() -> ReportQueue:
+    """File partagée par toutes les sessions du processus."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = ReportQueue()
+        return _queue
@@ -0,0 +1,110 @@
+# image_service/compress.py
+"""
+Dimensionnement et compression des images envoyées au modèle de vision.
+
+Le modèle ramène toute image à 2048 px sur le grand côté puis 768 px sur le
+petit côté : envoyer davantage de pixels n'apporte rien et alourdit la
+requête.
+"""
+
+import hashlib
+import io
+import mimetypes
+import os
+from pathlib import Path
+
+from PIL import Image
+
+from .snapshot_cache import SnapshotCache
+
+VISION_MAX_SIDE = 2048
+VISION_SHORT_SIDE = 768
+
+# Format et qualité de sortie (JPEG ou WEBP), configurables par variables d'env
+IMAGE_FORMAT = os.environ.get("IMAGE_FORMAT", "JPEG").upper()
+IMAGE_QUALITY = int(os.environ.get("IMAGE_QUALITY", "85"))
+
+EXTENSIONS = {"JPEG": ".jpg", "WEBP": ".webp", "PNG": ".png"}
+
+# Images des PDF : résolution d'impression et compression (JPEG ou PNG/Flate)
+PDF_IMAGE_DPI = int(os.environ.get("PDF_IMAGE_DPI", "150"))
+PDF_IMAGE_FORMAT = os.environ.get("PDF_IMAGE_FORMAT", "JPEG").upper()
+PDF_IMAGE_QUALITY = int(os.environ.get("PDF_IMAGE_QUALITY", "80"))
+
+# Images déjà préparées pour l'impression (clé : contenu source + réglages ;
+# l'extension suit le format demandé à chaque appel)
+print_cache = SnapshotCache(root=Path("imgs/.print"), max_bytes=100 * 1024 * 1024)
+
+
+def vision_scale(width: int, height: int) -> float:
+    """Facteur (≤ 1) qui ramène une image à la résolution utilisée par le modèle."""
+    return min(
+        1.0,
+        VISION_MAX_SIDE / max(width, height),
+        VISION_SHORT_SIDE / min(width, height),
+    )
+
+
+def save_compressed(img: Image.Image, output, image_format: str = IMAGE_FORMAT,
+                    quality: int = IMAGE_QUALITY) -> None:
+    """Enregistre en JPEG/WEBP compressé (PNG sans perte en dernier recours)."""
+    if image_format in ("JPEG", "WEBP"):
+        img.convert("RGB").save(output, format=image_format, quality=quality, optimize=True)
+    else:
+        img.save(output, format=image_format, optimize=True)
+
+
+def encode_for_vision(image_path: str):
+    """
+    Retourne (type MIME, octets) d'une image prête pour le modèle de vision.
+
+    Une image déjà à la bonne taille et dans un format compressé est envoyée
+    telle quelle ; sinon elle est réduite et recompressée en mémoire.
+    """
+    with Image.open(image_path) as img:
+        scale = vision_scale(img.width, img.height)
+        if scale >= 1.0 and img.format in ("JPEG", "WEBP"):
+            mime = mimetypes.guess_type(image_path)[0] or f"image/{img.format.lower()}"
+            with open(image_path, "rb") as f:
+                return mime, f.read()
+
+        if scale < 1.0:
+            size = (max(1, int(img.width * scale)), max(1, int(img.height * scale)))
+            img.draft("RGB", size)
+            img = img.resize(size, Image.LANCZOS)
+
+        buffer = io.BytesIO()
+        save_compressed(img, buffer)
+        return f"image/{IMAGE_FORMAT.lower()}", buffer.getvalue()
+
+
+def prepare_for_print(image_path: str, width_pt: float, height_pt: float,
+                      dpi: int = PDF_IMAGE_DPI, image_format: str = PDF_IMAGE_FORMAT,
+                      quality: int = PDF_IMAGE_QUALITY) -> str:
+    """
+    Retourne le chemin d'une copie de l'image réduite pour tenir dans sa
+    taille imprimée (`width_pt` x `height_pt` points à `dpi`, proportions
+    conservées) et recompressée. Le résultat est mis en cache : une même
+    capture n'est préparée qu'une fois.
+    """
+    h = hashlib.sha256()
+    with open(image_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+
+    size = (max(1, round(width_pt / 72 * dpi)), max(1, round(height_pt / 72 * dpi)))
+    key = print_cache.key(h.hexdigest(), size=size, format=image_format, quality=quality)
+
+    suffix = EXTENSIONS.get(image_format, ".png")
+    root, _ = os.path.splitext(image_path)
+    output_path = f"{root}.print{suffix}"
+    if print_cache.fetch(key, output_path, suffix):
+        return output_path
+
+    with Image.open(image_path) as img:
+        # Réduction seulement, dans la boîte imprimée
+        img.thumbnail(size, Image.LANCZOS)
+        save_compressed(img, output_path, image_format, quality)
+
+    print_cache.store(key, output_path, suffix)
+    return output_path
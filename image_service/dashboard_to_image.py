@@ -1,120 +1,303 @@
 import plotly.graph_objects as go
+import plotly.io as pio
 import pydeck as pdk
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
 from PIL import Image
 
+from core.metrics import REGISTRY
+from viz.cache import figure_json
+from .render_pool import BrowserPool, RENDER_POOL_SIZE, WINDOW_WIDTH, WINDOW_HEIGHT, new_headless_driver
+from .renderer_service import RendererClient
+from .snapshot_cache import snapshot_cache
+from .compress import EXTENSIONS, IMAGE_FORMAT, IMAGE_QUALITY, save_compressed, vision_scale
+
+# Export statique Plotly sans navigateur piloté (kaleido), optionnel
+try:
+    import kaleido  # noqa: F401
+    HAS_KALEIDO = True
+except ImportError:
+    HAS_KALEIDO = False
+
+# Largeur d'export des figures Plotly
+PLOTLY_WIDTH = 1200
+
+# Attente maximale du signal de rendu (secondes)
+PLOTLY_RENDER_TIMEOUT = 10
+DECK_RENDER_TIMEOUT = 20
+
+# Les tuiles de la carte sont considérées chargées quand le nombre de
+# ressources réseau reste stable pendant cette durée
+DECK_SETTLE_TIME = 0.5
+POLL_INTERVAL = 0.1
+
+RENDER_SECONDS = REGISTRY.histogram(
+    "dashboard_render_seconds", "Durée de rendu et de fusion des images du dashboard"
+)
+
+
 def save_plotly_figure(fig: go.Figure, path: str):
     fig.write_html(path)
-    
+
 def save_pydeck_deck(deck: pdk.Deck, path: str):
     deck.to_html(path)
-    
-def screenshot_dashboard(url: str, output_path: str, wait_time: int = 2, driver=None):
+
+
+def export_plotly_figure(fig: go.Figure, output_path: str):
+    """Exporte une figure Plotly directement en PNG/SVG (format déduit de l'extension)."""
+    height = fig.layout.height or WINDOW_HEIGHT
+    fig.write_image(output_path, width=PLOTLY_WIDTH, height=height)
+
+
+def export_plotly_figures(figs: list, output_paths: list):
+    """
+    Exporte plusieurs figures en un seul lot : kaleido répartit le rendu
+    sur plusieurs onglets de son navigateur.
     """
-    Prend un screenshot d'une page HTML.
+    if not hasattr(pio, "write_images"):
+        for fig, path in zip(figs, output_paths):
+            export_plotly_figure(fig, path)
+        return
+
+    specs = []
+    for fig in figs:
+        spec = fig.to_dict()
+        spec["layout"]["width"] = PLOTLY_WIDTH
+        spec["layout"].setdefault("height", WINDOW_HEIGHT)
+        specs.append(spec)
+    pio.write_images(specs, output_paths)
+
+
+# ----------------------------------------------------------------------
+# SIGNAUX DE FIN DE RENDU
+# ----------------------------------------------------------------------
+def plotly_rendered(driver) -> bool:
+    """Plotly a fini de dessiner le graphique."""
+    return driver.execute_script(
+        "return document.readyState === 'complete'"
+        " && document.querySelector('.js-plotly-plot .main-svg') !== null;"
+    )
+
+
+def deck_rendered(driver) -> bool:
+    """
+    Le canvas deck.gl existe et plus aucune ressource (tuiles, scripts)
+    n'est en cours de chargement depuis DECK_SETTLE_TIME.
+    """
+    ready = driver.execute_script(
+        "return document.readyState === 'complete'"
+        " && document.querySelector('canvas') !== null;"
+    )
+    if not ready:
+        return False
+
+    count_js = "return performance.getEntriesByType('resource').length;"
+    before = driver.execute_script(count_js)
+    time.sleep(DECK_SETTLE_TIME)
+    return driver.execute_script(count_js) == before
+
+
+def screenshot_dashboard(url: str, output_path: str, wait_for=deck_rendered,
+                         timeout: int = DECK_RENDER_TIMEOUT, driver=None):
+    """
+    Prend un screenshot d'une page HTML dès que `wait_for(driver)` est vrai.
     Si driver est fourni, réutilise la session Selenium existante.
     Sinon, crée une nouvelle session (plus lent).
     """
     should_quit = False
-    
+
     if driver is None:
-        options = Options()
-        options.add_argument("--headless")
-        options.add_argument("--window-size=1920,1080")
-        driver = webdriver.Chrome(options=options)
+        driver = new_headless_driver()
         should_quit = True
-    
-    driver.get(url)
-    time.sleep(wait_time)
-    driver.save_screenshot(output_path)
-    
-    if should_quit:
-        driver.quit()
-    
-def merge_images(image_paths: list, output_path: str, columns: int = 2):
+
+    try:
+        driver.get(url)
+        try:
+            WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(wait_for)
+        except TimeoutException:
+            print(f"⚠️ Rendu incomplet après {timeout}s : {url}")
+        driver.save_screenshot(output_path)
+    finally:
+        if should_quit:
+            driver.quit()
+
+def merge_images(image_paths: list, output_path: str, columns: int = 2,
+                 image_format: str = IMAGE_FORMAT, quality: int = IMAGE_QUALITY):
     """
     Fusionne les images en grille avec un nombre défini de colonnes.
     Par défaut, crée une grille 2x2 (ou 2xN selon le nombre d'images).
+
+    Chaque tuile est réduite à la résolution réellement exploitée par le
+    modèle de vision, et les images sont ouvertes une à une : on ne garde
+    jamais toutes les captures pleine résolution en mémoire.
     """
-    images = [Image.open(p) for p in image_paths]
-    
-    if not images:
+    if not image_paths:
         return
-    
-    # Calculer la largeur et hauteur max de chaque image
-    max_width = max(img.width for img in images)
-    max_height = max(img.height for img in images)
-    
+
+    # Lire uniquement les en-têtes pour dimensionner la grille
+    sizes = []
+    for p in image_paths:
+        with Image.open(p) as img:
+            sizes.append(img.size)
+    max_width = max(w for w, _ in sizes)
+    max_height = max(h for _, h in sizes)
+
     # Calculer le nombre de lignes nécessaires
-    rows = (len(images) + columns - 1) // columns  # Arrondi supérieur
-    
+    rows = (len(image_paths) + columns - 1) // columns  # Arrondi supérieur
+
+    # Taille des tuiles pour que la grille tienne dans la résolution du modèle
+    scale = vision_scale(max_width * columns, max_height * rows)
+    tile_width = max(1, int(max_width * scale))
+    tile_height = max(1, int(max_height * scale))
+
     # Créer une nouvelle image vide (grille)
-    merged_width = max_width * columns
-    merged_height = max_height * rows
-    merged_image = Image.new('RGB', (merged_width, merged_height), color='white')
+    merged_image = Image.new('RGB', (tile_width * columns, tile_height * rows), color='white')
 
-    # Coller les images en grille
-    for idx, img in enumerate(images):
+    # Coller les images en grille, une seule ouverte à la fois
+    for idx, p in enumerate(image_paths):
         row = idx // columns
         col = idx % columns
-        x = col * max_width
-        y = row * max_height
-        merged_image.paste(img, (x, y))
+        with Image.open(p) as img:
+            img.draft("RGB", (tile_width, tile_height))
+            img.thumbnail((tile_width, tile_height), Image.LANCZOS)
+            merged_image.paste(img.convert("RGB"), (col * tile_width, row * tile_height))
 
-    # Sauvegarder l'image fusionnée
-    merged_image.save(output_path)
+    # Sauvegarder l'image fusionnée, compressée
+    save_compressed(merged_image, output_path, image_format=image_format, quality=quality)
+
+def _render_with_service(renderer, plotly_jobs, deck_jobs, pool_size):
+    """Soumet les rendus au service de rendu chaud, en parallèle."""
+    def render_figure(fig, spec_json, path):
+        height = fig.layout.height or WINDOW_HEIGHT
+        Path(path).write_bytes(renderer.render_figure(spec_json, PLOTLY_WIDTH, height))
+
+    def render_deck(deck, path):
+        html = deck.to_html(as_string=True)
+        Path(path).write_bytes(renderer.render_html(html, WINDOW_WIDTH, WINDOW_HEIGHT, wait="deck"))
+
+    with ThreadPoolExecutor(max_workers=max(pool_size, 1)) as executor:
+        futures = [executor.submit(render_figure, fig, spec, path) for fig, spec, path, _ in plotly_jobs]
+        futures += [executor.submit(render_deck, deck, path) for deck, _, path, _ in deck_jobs]
+        for future in as_completed(futures):
+            future.result()
+
+
+def _render_locally(plotly_jobs, deck_jobs, pool_size):
+    """Rendu sans service : kaleido pour Plotly, pool de navigateurs pour Pydeck."""
+    # Listes pour tracker les fichiers temporaires
+    temp_files = []
+
+    def capture(obj, save, html_path, output_path, wait_for, timeout):
+        save(obj, html_path)
+        # Convertir en chemin absolu pour file://
+        abs_path = os.path.abspath(html_path)
+        with pool.driver() as driver:
+            screenshot_dashboard(url=f"file://{abs_path}", output_path=output_path,
+                                 wait_for=wait_for, timeout=timeout, driver=driver)
+
+    browser_jobs = len(deck_jobs) + (0 if HAS_KALEIDO else len(plotly_jobs))
+    pool = BrowserPool(size=min(pool_size, max(browser_jobs, 1)))
 
-def dashboard_to_image(plt , pdk):
-    """
-    Génère une image fusionnée du dashboard en réutilisant une seule session Selenium.
-    """
-    # Créer le dossier imgs s'il n'existe pas
-    Path("imgs").mkdir(exist_ok=True)
-    
-    # Créer une seule session Selenium pour tous les screenshots
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("--window-size=1920,1080")
-    driver = webdriver.Chrome(options=options)
-    
     try:
-        # Listes pour tracker les fichiers temporaires
-        temp_files = []
-        
-        # Sauvegarder les visualisations en tant que fichiers HTML temporaires
-        for i, fig in enumerate(plt):
-            plotly_path = f"imgs/temp_plotly_{i}.html"
-            temp_files.append(plotly_path)
-            save_plotly_figure(fig, plotly_path)
-            # Convertir en chemin absolu pour file://
-            abs_path = os.path.abspath(plotly_path)
-            screenshot_dashboard(url=f"file://{abs_path}", output_path=f"imgs/plotly_screenshot_{i}.png", driver=driver)
-        
-        for j, deck in enumerate(pdk):
-            pydeck_path = f"imgs/temp_pydeck_{j}.html"
-            temp_files.append(pydeck_path)
-            save_pydeck_deck(deck, pydeck_path)
-            # Convertir en chemin absolu pour file://
-            abs_path = os.path.abspath(pydeck_path)
-            # Plus de temps pour les cartes (chargement des tiles)
-            screenshot_dashboard(url=f"file://{abs_path}", output_path=f"imgs/pydeck_screenshot_{j}.png", wait_time=5, driver=driver)
-
-        # Fusionner les captures d'écran en une seule image
-        merged_output_path = "imgs/dashboard_image.png"
-        to_merge = [f"imgs/plotly_screenshot_{i}.png" for i in range(len(plt))] + [f"imgs/pydeck_screenshot_{j}.png" for j in range(len(pdk))]
-        merge_images(to_merge, merged_output_path)
-        
+        with ThreadPoolExecutor(max_workers=max(pool_size, 1) + 1) as executor:
+            futures = []
+
+            if HAS_KALEIDO and plotly_jobs:
+                futures.append(executor.submit(
+                    export_plotly_figures,
+                    [fig for fig, _, _, _ in plotly_jobs],
+                    [path for _, _, path, _ in plotly_jobs],
+                ))
+            elif plotly_jobs:
+                # Repli sans kaleido : capture du HTML dans Chrome
+                for fig, _, path, key in plotly_jobs:
+                    html_path = os.path.join(os.path.dirname(path), f"temp_plotly_{key[:12]}.html")
+                    temp_files.append(html_path)
+                    futures.append(executor.submit(
+                        capture, fig, save_plotly_figure, html_path, path,
+                        plotly_rendered, PLOTLY_RENDER_TIMEOUT,
+                    ))
+
+            for deck, _, path, key in deck_jobs:
+                html_path = os.path.join(os.path.dirname(path), f"temp_pydeck_{key[:12]}.html")
+                temp_files.append(html_path)
+                # Capture dès que la carte et ses tuiles sont chargées
+                futures.append(executor.submit(
+                    capture, deck, save_pydeck_deck, html_path, path,
+                    deck_rendered, DECK_RENDER_TIMEOUT,
+                ))
+
+            # Récupérer les rendus au fil de l'eau (propage la première erreur)
+            for future in as_completed(futures):
+                future.result()
+
+    finally:
         # Nettoyer les fichiers HTML temporaires
         for temp_file in temp_files:
             if os.path.exists(temp_file):
                 os.remove(temp_file)
-        
-        return merged_output_path
-    
-    finally:
-        # Fermer la session Selenium
-        driver.quit()
\ No newline at end of file
+
+        # Fermer les navigateurs du pool
+        pool.close()
+
+
+def dashboard_to_image(plt , pdk, pool_size: int = RENDER_POOL_SIZE, output_dir: str = "imgs"):
+    """
+    Génère une image fusionnée du dashboard.
+
+    Chaque rendu est d'abord cherché dans le cache disque adressé par le hash
+    du JSON de la figure et des options de rendu : si tout y est, aucun
+    navigateur n'est lancé. Les rendus manquants sont soumis au service de
+    rendu chaud (image_service.renderer_service) s'il tourne ; sinon les
+    figures Plotly sont exportées dans le processus (kaleido) et les cartes
+    Pydeck capturées en parallèle sur un pool local de navigateurs headless
+    (`pool_size`).
+
+    Les captures et l'image fusionnée sont écrites dans `output_dir`.
+    """
+    start = time.perf_counter()
+
+    # Créer le dossier de sortie s'il n'existe pas
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+    plotly_paths = [f"{output_dir}/plotly_screenshot_{i}.png" for i in range(len(plt))]
+    pydeck_paths = [f"{output_dir}/pydeck_screenshot_{j}.png" for j in range(len(pdk))]
+    merged_output_path = f"{output_dir}/dashboard_image{EXTENSIONS.get(IMAGE_FORMAT, '.png')}"
+
+    # Jobs (objet, JSON, chemin de sortie, clé de cache)
+    plotly_jobs = []
+    for fig, path in zip(plt, plotly_paths):
+        spec = figure_json(fig)
+        key = snapshot_cache.key(spec, kind="plotly", kaleido=HAS_KALEIDO,
+                                 width=PLOTLY_WIDTH, height=fig.layout.height or WINDOW_HEIGHT)
+        plotly_jobs.append((fig, spec, path, key))
+
+    deck_jobs = []
+    for deck, path in zip(pdk, pydeck_paths):
+        spec = figure_json(deck)
+        key = snapshot_cache.key(spec, kind="deck", width=WINDOW_WIDTH, height=WINDOW_HEIGHT)
+        deck_jobs.append((deck, spec, path, key))
+
+    # Seuls les rendus absents du cache passent par un navigateur
+    plotly_jobs = [job for job in plotly_jobs if not snapshot_cache.fetch(job[3], job[2])]
+    deck_jobs = [job for job in deck_jobs if not snapshot_cache.fetch(job[3], job[2])]
+
+    if plotly_jobs or deck_jobs:
+        renderer = RendererClient.connect_or_none()
+        if renderer is not None:
+            _render_with_service(renderer, plotly_jobs, deck_jobs, pool_size)
+        else:
+            _render_locally(plotly_jobs, deck_jobs, pool_size)
+
+        for _, _, path, key in plotly_jobs + deck_jobs:
+            snapshot_cache.store(key, path)
+
+    # Fusionner les captures d'écran en une seule image
+    merge_images(plotly_paths + pydeck_paths, merged_output_path)
+
+    RENDER_SECONDS.observe(time.perf_counter() - start)
+    return merged_output_path
@@ -0,0 +1,98 @@
+# image_service/render_pool.py
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException
+
+# Taille de fenêtre des navigateurs headless
+WINDOW_WIDTH = 1920
+WINDOW_HEIGHT = 1080
+
+# Nombre de navigateurs rendus en parallèle (configurable par variable d'env)
+RENDER_POOL_SIZE = int(os.environ.get("RENDER_POOL_SIZE", "3"))
+
+
+def new_headless_driver():
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument(f"--window-size={WINDOW_WIDTH},{WINDOW_HEIGHT}")
+    return webdriver.Chrome(options=options)
+
+
+class BrowserPool:
+    """
+    Pool de navigateurs headless partagé entre threads.
+
+    Les navigateurs sont créés à la demande (au plus `size`) et réutilisés ;
+    un navigateur qui plante pendant un rendu est fermé et remplacé au
+    prochain emprunt.
+    """
+
+    def __init__(self, size: int = RENDER_POOL_SIZE, factory=new_headless_driver):
+        self.size = max(1, size)
+        self.factory = factory
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+
+            if create:
+                try:
+                    return self.factory()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+
+            # Pool plein : on attend qu'un navigateur se libère (ou soit remplacé)
+            try:
+                return self._idle.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+    def _discard(self, driver):
+        with self._lock:
+            self._created -= 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @contextmanager
+    def driver(self):
+        """Emprunte un navigateur pour la durée du bloc."""
+        driver = self._acquire()
+        try:
+            yield driver
+        except WebDriverException:
+            # Contexte navigateur potentiellement mort → on le remplace
+            self._discard(driver)
+            raise
+        except BaseException:
+            self._idle.put(driver)
+            raise
+        else:
+            self._idle.put(driver)
+
+    def close(self):
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
@@ -0,0 +1,237 @@
+# image_service/renderer_service.py
+"""
+Service de rendu local qui garde des navigateurs headless chauds.
+
+Lancer une fois :
+    python -m image_service.renderer_service --pool-size 3
+
+Le Visualiser et les rapports en lot lui soumettent ensuite leurs rendus
+(HTML ou JSON de figure Plotly + taille) via une socket locale et reçoivent
+les octets PNG, sans payer le démarrage de Chrome à chaque appel.
+
+Les connexions sont authentifiées dans les deux sens par une clé aléatoire
+propre à l'installation (config/renderer.key, lisible par son seul
+propriétaire), à créer une fois :
+    python -m image_service.renderer_service --init-key
+
+Les messages sont du JSON et des octets bruts (jamais de pickle) : une
+requête est un objet JSON, une réponse un objet JSON suivi des octets PNG.
+"""
+
+import argparse
+import json
+import os
+import secrets
+import tempfile
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+
+from selenium.common.exceptions import WebDriverException
+
+from .render_pool import BrowserPool, RENDER_POOL_SIZE
+
+RENDERER_ADDRESS = ("127.0.0.1", int(os.environ.get("RENDERER_PORT", "6077")))
+RENDERER_KEY_PATH = Path(os.environ.get("RENDERER_KEY_PATH", "config/renderer.key"))
+
+# Taille maximale d'un message (page HTML avec plotly.js intégré, PNG)
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+# Nombre de tentatives d'un rendu (un contexte navigateur mort est remplacé entre deux)
+MAX_ATTEMPTS = 2
+
+
+# ----------------------------------------------------------------------
+# CLÉ PARTAGÉE
+# ----------------------------------------------------------------------
+def create_authkey(path: Path = RENDERER_KEY_PATH) -> bytes:
+    """Génère la clé de l'installation (fichier 0600, jamais écrasé)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    key = secrets.token_hex(32)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(key)
+    return key.encode()
+
+
+def load_authkey(path: Path = RENDERER_KEY_PATH):
+    """Clé de l'installation, ou None si elle n'a pas été créée."""
+    try:
+        key = path.read_text().strip()
+    except FileNotFoundError:
+        return None
+    if path.stat().st_mode & 0o077:
+        raise PermissionError(f"❌ {path} est lisible par d'autres utilisateurs (chmod 600 {path})")
+    return key.encode() or None
+
+
+def _send_json(conn, message: dict) -> None:
+    conn.send_bytes(json.dumps(message).encode())
+
+
+def _recv_json(conn) -> dict:
+    message = json.loads(conn.recv_bytes(MAX_MESSAGE_BYTES))
+    if not isinstance(message, dict):
+        raise ValueError("message JSON inattendu")
+    return message
+
+
+# ----------------------------------------------------------------------
+# CLIENT
+# ----------------------------------------------------------------------
+class RendererClient:
+    """Client du service de rendu (une connexion par rendu, utilisable entre threads)."""
+
+    def __init__(self, address=RENDERER_ADDRESS, authkey: bytes = None):
+        self.address = address
+        self.authkey = authkey
+
+    @classmethod
+    def connect_or_none(cls, address=RENDERER_ADDRESS, authkey: bytes = None):
+        """Retourne un client si le service répond avec la clé de l'installation, sinon None."""
+        try:
+            authkey = authkey or load_authkey()
+        except OSError as e:
+            print(f"⚠️ Service de rendu ignoré : {e}")
+            return None
+        if authkey is None:
+            return None
+
+        client = cls(address, authkey)
+        try:
+            client._call({"kind": "ping"})
+        except (OSError, EOFError, ValueError, AuthenticationError):
+            return None
+        return client
+
+    def _call(self, job: dict):
+        with Client(self.address, authkey=self.authkey) as conn:
+            _send_json(conn, job)
+            reply = _recv_json(conn)
+            if not reply.get("ok"):
+                raise RuntimeError(f"Rendu échoué : {reply.get('error')}")
+            return conn.recv_bytes(MAX_MESSAGE_BYTES) if reply.get("png") else None
+
+    def render_html(self, html: str, width: int, height: int, wait: str = "deck") -> bytes:
+        return self._call({"kind": "html", "content": html, "width": width, "height": height, "wait": wait})
+
+    def render_figure(self, figure_json: str, width: int, height: int) -> bytes:
+        return self._call({"kind": "plotly", "content": figure_json, "width": width, "height": height})
+
+
+# ----------------------------------------------------------------------
+# SERVEUR
+# ----------------------------------------------------------------------
+class RendererService:
+    def __init__(self, pool_size: int = RENDER_POOL_SIZE):
+        self.pool = BrowserPool(size=pool_size)
+
+    def _render_html(self, html: str, width: int, height: int, wait: str) -> bytes:
+        # Import local : dashboard_to_image importe ce module (client)
+        from .dashboard_to_image import (
+            deck_rendered, plotly_rendered, screenshot_dashboard,
+            DECK_RENDER_TIMEOUT, PLOTLY_RENDER_TIMEOUT,
+        )
+        wait_for, timeout = (
+            (plotly_rendered, PLOTLY_RENDER_TIMEOUT) if wait == "plotly"
+            else (deck_rendered, DECK_RENDER_TIMEOUT)
+        )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            html_path = os.path.join(tmp, "page.html")
+            png_path = os.path.join(tmp, "page.png")
+            with open(html_path, "w", encoding="utf-8") as f:
+                f.write(html)
+
+            for attempt in range(1, MAX_ATTEMPTS + 1):
+                try:
+                    with self.pool.driver() as driver:
+                        driver.set_window_size(width, height)
+                        screenshot_dashboard(f"file://{html_path}", png_path,
+                                             wait_for=wait_for, timeout=timeout, driver=driver)
+                    break
+                except WebDriverException as e:
+                    # Le pool a fermé le navigateur fautif : on réessaie avec un neuf
+                    print(f"⚠️ Contexte navigateur perdu (tentative {attempt}/{MAX_ATTEMPTS}) : {e}")
+                    if attempt == MAX_ATTEMPTS:
+                        raise
+
+            with open(png_path, "rb") as f:
+                return f.read()
+
+    def _render_figure(self, figure_json: str, width: int, height: int) -> bytes:
+        import plotly.io as pio
+        from .dashboard_to_image import HAS_KALEIDO
+
+        fig = pio.from_json(figure_json)
+        if HAS_KALEIDO:
+            return pio.to_image(fig, format="png", width=width, height=height)
+        html = pio.to_html(fig, include_plotlyjs=True, full_html=True)
+        return self._render_html(html, width, height, wait="plotly")
+
+    def handle(self, job: dict) -> dict:
+        kind = job.get("kind")
+        try:
+            if kind == "ping":
+                return {"ok": True}
+            if kind == "html":
+                png = self._render_html(job["content"], job["width"], job["height"], job.get("wait", "deck"))
+            elif kind == "plotly":
+                png = self._render_figure(job["content"], job["width"], job["height"])
+            else:
+                return {"ok": False, "error": f"type de rendu inconnu : {kind}"}
+            return {"ok": True, "png": png}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    def _serve_connection(self, conn):
+        with conn:
+            try:
+                job = _recv_json(conn)
+            except (EOFError, OSError, ValueError) as e:
+                print(f"⚠️ Requête illisible : {e}")
+                return
+            reply = self.handle(job)
+            png = reply.pop("png", None)
+            _send_json(conn, {**reply, "png": png is not None})
+            if png is not None:
+                conn.send_bytes(png)
+
+    def serve_forever(self, address=RENDERER_ADDRESS, authkey: bytes = None):
+        authkey = authkey or load_authkey()
+        if authkey is None:
+            raise SystemExit(
+                f"❌ Clé du service de rendu absente ({RENDERER_KEY_PATH}) : "
+                "python -m image_service.renderer_service --init-key"
+            )
+
+        print(f"🖼️ Service de rendu en écoute sur {address[0]}:{address[1]}")
+        with Listener(address, authkey=authkey) as listener:
+            try:
+                while True:
+                    try:
+                        conn = listener.accept()
+                    except Exception as e:
+                        # Client non authentifié ou connexion avortée
+                        print(f"⚠️ Connexion refusée : {e}")
+                        continue
+                    threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+            finally:
+                self.pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Service de rendu headless ImmoGuide")
+    parser.add_argument("--pool-size", type=int, default=RENDER_POOL_SIZE)
+    parser.add_argument("--init-key", action="store_true", help=f"créer la clé partagée ({RENDERER_KEY_PATH})")
+    args = parser.parse_args()
+
+    if args.init_key:
+        if RENDERER_KEY_PATH.exists():
+            print(f"🔑 Clé déjà présente : {RENDERER_KEY_PATH}")
+        else:
+            create_authkey()
+            print(f"🔑 Clé créée : {RENDERER_KEY_PATH}")
+    else:
+        RendererService(pool_size=args.pool_size).serve_forever()
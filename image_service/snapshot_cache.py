@@ -0,0 +1,84 @@
+# image_service/snapshot_cache.py
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+
+SNAPSHOT_DIR = Path("imgs/.snapshots")
+
+# Taille maximale du cache disque des rendus
+MAX_CACHE_BYTES = 200 * 1024 * 1024
+
+
+class SnapshotCache:
+    """
+    Cache disque adressé par contenu des rendus (PNG par défaut).
+
+    La clé est le hash du JSON sérialisé de la figure (ou du deck) et des
+    options de rendu ; un même graphique n'est donc rendu qu'une fois.
+    L'éviction LRU s'appuie sur la date de modification, rafraîchie à
+    chaque lecture.
+    """
+
+    def __init__(self, root: Path = SNAPSHOT_DIR, max_bytes: int = MAX_CACHE_BYTES, suffix: str = ".png"):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(spec_json: str, **options) -> str:
+        h = hashlib.sha256()
+        h.update(spec_json.encode("utf-8"))
+        h.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+        return h.hexdigest()
+
+    def _path(self, key: str, suffix: str = None) -> Path:
+        return self.root / f"{key}{suffix or self.suffix}"
+
+    def fetch(self, key: str, output_path: str, suffix: str = None) -> bool:
+        """
+        Copie le rendu en cache vers `output_path` ; False si absent.
+        `suffix` : extension de l'entrée si elle diffère de celle du cache.
+        """
+        path = self._path(key, suffix)
+        try:
+            shutil.copyfile(path, output_path)
+            os.utime(path)  # marque l'entrée comme récemment utilisée
+            return True
+        except FileNotFoundError:
+            return False
+
+    def store(self, key: str, rendered_path: str, suffix: str = None) -> None:
+        """Ajoute un rendu au cache puis évince les plus anciens si besoin."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(key, suffix)
+        tmp = path.with_name(f"{path.name}.tmp")
+        shutil.copyfile(rendered_path, tmp)
+        os.replace(tmp, path)
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            # Toutes extensions confondues (hors écritures en cours)
+            for p in self.root.iterdir():
+                if p.suffix == ".tmp":
+                    continue
+                try:
+                    stat = p.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, p))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, p in sorted(entries, key=lambda e: e[0]):
+                if total <= self.max_bytes:
+                    break
+                p.unlink(missing_ok=True)
+                total -= size
+
+
+snapshot_cache = SnapshotCache()
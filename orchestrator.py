@@ -4,8 +4,10 @@ from core.runner import run_scraping
 def run_with_auto_refresh(
     cities: dict,
     size: int = 30,
+    run_id: str = None,
 ):
     run_scraping(
         cities=cities,
         size=size,
+        run_id=run_id,
     )
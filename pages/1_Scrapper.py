@@ -1,19 +1,20 @@
-import sys
 import threading
+import uuid
 from pathlib import Path
 
-import pandas as pd
 import streamlit as st
 from streamlit_extras.stylable_container import stylable_container
 from streamlit_autorefresh import st_autorefresh
+from st_keyup import st_keyup
 
 # ─────────────────────────────
 # CORE / ORCHESTRATION
 # ─────────────────────────────
-from orchestrator import run_with_auto_refresh
-from core.location import location_autocomplete
-from core.http import BrowserSession
-from core.utils import normalize_city
+# Le client HTTP et le runner (requests, scraper) sont importés au clic
+# sur START : l'affichage de la page n'en a pas besoin
+from core.commune_index import search_communes
+from core.progress import read_status
+from core.utils import count_annonces, normalize_city
 
 # ─────────────────────────────
 # CONFIG
@@ -32,23 +33,50 @@ defaults = {
     "scraping_city2": None,
     "scraping_city1_raw": None,
     "scraping_city2_raw": None,
+    "scraping_run_id": None,
 }
 
 for k, v in defaults.items():
     st.session_state.setdefault(k, v)
 
+# Statut publié par le runner (un seul petit fichier JSON)
+status = read_status()
+if status and status.get("run_id") != st.session_state.scraping_run_id:
+    status = None
+
+if st.session_state.is_scraping and status and status["state"] != "running":
+    st.session_state.is_scraping = False
+
 if st.session_state.is_scraping:
     st_autorefresh(interval=2000, key="scrape_refresh")
 
 # ─────────────────────────────
-# DATA : communes
+# RECHERCHE : communes
 # ─────────────────────────────
-@st.cache_data
-def load_communes():
-    df = pd.read_csv("data/merged_cities_communes.csv")
-    return df["city"].unique().tolist()
+def commune_picker(label: str, key: str, exclude=None):
+    """
+    Recherche au fil de la frappe dans l'index des communes (partagé par le
+    processus) : seules les meilleures correspondances partent au navigateur.
+    """
+    query = st_keyup(
+        label,
+        key=f"{key}_query",
+        debounce=250,
+        placeholder="Tapez le nom d'une commune…",
+        disabled=st.session_state.is_scraping,
+    )
+    matches = [c for c in search_communes(query) if c != exclude] if query else []
+    return st.selectbox(
+        f"{label} – commune",
+        matches,
+        index=0 if matches else None,
+        format_func=lambda c: c.label,
+        placeholder="Aucune commune" if query else "Saisissez au moins une lettre",
+        label_visibility="collapsed",
+        key=f"{key}_choice",
+        disabled=st.session_state.is_scraping,
+    )
 
-communes = load_communes()
 
 # ─────────────────────────────
 # UI : Sélection villes
@@ -58,11 +86,8 @@ st.title("🏠 Scraping SeLoger")
 col1, col2, col3 = st.columns([2, 1, 2])
 
 with col1:
-    city1 = st.selectbox(
-        "Ville 1",
-        [""] + communes,
-        disabled=st.session_state.is_scraping,
-    )
+    commune1 = commune_picker("Ville 1", "city1")
+    city1 = commune1.name if commune1 else ""
 
 with col2:
     st.markdown(
@@ -72,13 +97,9 @@ with col2:
     )
 
 with col3:
-    # Exclure city1 de la liste
-    available_cities = [""] + [c for c in communes if c != city1]
-    city2 = st.selectbox(
-        "Ville 2",
-        available_cities,
-        disabled=st.session_state.is_scraping,
-    )
+    # Exclure la commune 1 des résultats
+    commune2 = commune_picker("Ville 2", "city2", exclude=commune1)
+    city2 = commune2.name if commune2 else ""
 
 st.markdown("<br>", unsafe_allow_html=True)
 
@@ -110,11 +131,18 @@ with col_btn[1]:
                 if not city1 or not city2:
                     st.error("⚠️ Veuillez renseigner les deux villes")
                 else:
+                    from orchestrator import run_with_auto_refresh
+                    from core.location import location_autocomplete
+
                     try:
-                        session = BrowserSession()
+                        # Villes déjà résolues : lues dans le cache, sans appel réseau ;
+                        # le département départage les homonymes
+                        id1, api_name1 = location_autocomplete(city1, departement=commune1.departement)
+                        id2, api_name2 = location_autocomplete(city2, departement=commune2.departement)
 
-                        id1, api_name1 = location_autocomplete(city1, session)
-                        id2, api_name2 = location_autocomplete(city2, session)
+                        unresolved = [c.label for c, i in ((commune1, id1), (commune2, id2)) if i is None]
+                        if unresolved:
+                            raise ValueError(f"commune introuvable sur SeLoger : {', '.join(unresolved)}")
 
                         clean1 = normalize_city(api_name1)
                         clean2 = normalize_city(api_name2)
@@ -123,18 +151,21 @@ with col_btn[1]:
                         st.session_state.scraping_city2 = clean2
                         st.session_state.scraping_city1_raw = api_name1
                         st.session_state.scraping_city2_raw = api_name2
+                        st.session_state.scraping_run_id = uuid.uuid4().hex
                         st.session_state.is_scraping = True
 
                         STOP_FLAG.unlink(missing_ok=True)
 
                         cities = {clean1: id1, clean2: id2}
+                        run_id = st.session_state.scraping_run_id
 
+                        # Le thread ne touche pas st.session_state : la fin du
+                        # scraping est lue dans le statut publié par le runner
                         def scrape_thread():
                             try:
-                                run_with_auto_refresh(cities, size=30)
+                                run_with_auto_refresh(cities, size=30, run_id=run_id)
                             finally:
                                 STOP_FLAG.unlink(missing_ok=True)   # ← NETTOYAGE
-                                st.session_state.is_scraping = False
 
 
                         threading.Thread(
@@ -162,29 +193,64 @@ else:
 # ─────────────────────────────
 # STATS
 # ─────────────────────────────
-def count_annonces(slug: str) -> int:
-    if not slug:
-        return 0
-    p = Path("jsons") / slug / "annonces"
-    return len(list(p.glob("*.json"))) if p.exists() else 0
+def format_eta(seconds) -> str:
+    if seconds is None:
+        return "—"
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}" if hours else f"{minutes} min {secs:02d} s"
+
+
+@st.cache_data(ttl=60)
+def scraped_cities_history():
+    root = Path("jsons")
+    if not root.exists():
+        return []
+    return [
+        {
+            "Ville": d.name.replace("_", " ").title(),
+            "Dossier": d.name,
+            "Annonces": count_annonces(d.name),
+        }
+        for d in sorted(root.iterdir())
+        if d.is_dir()
+    ]
+
 
 st.markdown("---")
 st.subheader("📊 Statistiques")
 
-col_m1, col_m2 = st.columns(2)
-
 c1 = st.session_state.scraping_city1
 c2 = st.session_state.scraping_city2
 
-with col_m1:
-    st.metric("Annonces – Ville 1", count_annonces(c1))
-    if c1:
-        st.caption(st.session_state.scraping_city1_raw)
-
-with col_m2:
-    st.metric("Annonces – Ville 2", count_annonces(c2))
-    if c2:
-        st.caption(st.session_state.scraping_city2_raw)
+if status:
+    col_m1, col_m2 = st.columns(2)
+
+    for col, slug, raw in (
+        (col_m1, c1, st.session_state.scraping_city1_raw),
+        (col_m2, c2, st.session_state.scraping_city2_raw),
+    ):
+        city_status = status["cities"].get(slug, {})
+        with col:
+            st.metric(
+                raw or slug,
+                city_status.get("existing", 0) + city_status.get("ads", 0),
+                delta=f"+{city_status.get('ads', 0)} cette session",
+            )
+            st.caption(
+                f"Pages : {city_status.get('pages', 0)} · "
+                f"404 : {city_status.get('not_found', 0)}"
+            )
+
+    col_r1, col_r2, col_r3 = st.columns(3)
+    col_r1.metric("Débit", f"{status['rate_per_min']} annonces/min")
+    col_r2.metric("Fin estimée", format_eta(status["eta_seconds"]))
+    col_r3.metric("403 / rafraîchissements", f"{status['forbidden']} / {status['refreshes']}")
+
+    if status["state"] == "error":
+        st.error(f"❌ Scraping interrompu : {status['error']}")
+else:
+    st.info("Aucune statistique pour le moment.")
 
 # ─────────────────────────────
 # HISTORIQUE
@@ -192,20 +258,8 @@ with col_m2:
 st.markdown("---")
 st.subheader("🗂️ Villes déjà scrapées")
 
-root = Path("jsons")
-if root.exists():
-    rows = []
-    for d in sorted(root.iterdir()):
-        if d.is_dir():
-            rows.append({
-                "Ville": d.name.replace("_", " ").title(),
-                "Dossier": d.name,
-                "Annonces": count_annonces(d.name),
-            })
-
-    if rows:
-        st.dataframe(rows, use_container_width=True, hide_index=True)
-    else:
-        st.info("Aucune ville scrapée")
+rows = scraped_cities_history()
+if rows:
+    st.dataframe(rows, use_container_width=True, hide_index=True)
 else:
     st.info("Aucune ville scrapée")
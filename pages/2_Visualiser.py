@@ -1,22 +1,16 @@
 import streamlit as st
-import pandas as pd
 import os
 import json
-import streamlit.components.v1 as components
+import math
+import uuid
 
-from streamlit_extras.stylable_container import stylable_container
+from streamlit_autorefresh import st_autorefresh
 from pathlib import Path
 
-from core.data_loader import load_city_dataframe
-from core.geo import get_city_coords
-from viz.maps import make_price_map
-from viz.plots import price_surface_scatter, weekly_price_evolution, annonces_distribution_pie
-from viz.stats import basic_stats, weekly_median
-from gpt_agent.gpt_assistant import GPTAssistant 
-from gpt_agent.prompts import build_dashboard_analysis_prompt
-from gpt_agent.pdf_generator import generate_comparison_report
+from gpt_agent.report_jobs import report_queue
 
-from image_service.dashboard_to_image import dashboard_to_image
+# Plotly, Pydeck, OpenAI et Selenium sont importés dans les branches qui
+# les utilisent : le premier affichage de la page ne les charge pas
 
 # -------------------------------------------------------------------
 # CONFIG
@@ -43,15 +37,12 @@ if not cities:
 # UI — Sélection
 # -------------------------------------------------------------------
 st.markdown("---")
-col1, col2, col3 = st.columns([2, 2, 1])
+col1, col2 = st.columns([4, 1])
 
 with col1:
-    city1 = st.selectbox("Ville 1", cities)
+    selected = st.multiselect("Villes à comparer", cities, default=cities[:2])
 
 with col2:
-    city2 = st.selectbox("Ville 2", [c for c in cities if c != city1])
-
-with col3:
     st.markdown("<br>", unsafe_allow_html=True)
     launch = st.button("Visualiser", use_container_width=True)
 
@@ -60,13 +51,13 @@ with col3:
 # LOAD DATA
 # -------------------------------------------------------------------
 if launch:
-    with st.spinner("Chargement des données…"):
-        # Convertir en minuscules pour accéder aux dossiers (jsons/lyon, jsons/paris, etc.)
-        df1 = load_city_dataframe(city1.lower())
-        df2 = load_city_dataframe(city2.lower())
+    if len(selected) < 2:
+        st.warning("⚠️ Sélectionnez au moins deux villes.")
+        st.stop()
 
-    st.session_state.df1 = df1
-    st.session_state.df2 = df2
+    # On ne garde que la sélection en session : les données sont partagées
+    # par le cache du processus (core.data_loader / viz.compare)
+    st.session_state.compared_cities = selected
     st.session_state.show = True
 
 
@@ -74,48 +65,55 @@ if launch:
 # VISUALISATION
 # -------------------------------------------------------------------
 if st.session_state.get("show", False):
-    df1 = st.session_state.df1
-    df2 = st.session_state.df2
+    from core.geo import get_city_coords
+    from viz.compare import load_comparison
+    from viz.dashboard import cached_figure, cached_map, dashboard_figures
+    from viz.plots import price_surface_scatter, weekly_price_evolution, annonces_distribution_pie
 
-    st.success(f"📊 {city1} vs {city2}")
+    with st.spinner("Chargement des données…"):
+        # Chaque ville est chargée une seule fois, toutes les agrégations en une passe
+        try:
+            comparison = load_comparison(st.session_state.compared_cities)
+        except ValueError as e:
+            st.warning(str(e))
+            st.stop()
+    selected = comparison.cities
+
+    st.success("📊 " + " vs ".join(selected))
+    empty = [city for city in selected if comparison.counts[city] == 0]
+    if empty:
+        st.warning("⚠️ Aucune annonce pour : " + ", ".join(empty))
 
     # Stats
-    s1 = basic_stats(df1)
-    s2 = basic_stats(df2)
-
-    colA, colB, colC = st.columns([3, 2, 2])
+    colA, colB = st.columns([3, 4])
     with colA:
-        st.plotly_chart(annonces_distribution_pie(df1, df2, city1, city2), use_container_width=True)
+        st.plotly_chart(
+            cached_figure("pie", comparison, lambda: annonces_distribution_pie(comparison)),
+            use_container_width=True,
+        )
     with colB:
-        st.metric(f"{city1} – Prix médian", f"{s1['median']:,.0f} € / m²")
-        st.metric(f"{city1} – Annonces", s1["count"])
-    with colC:
-        st.metric(f"{city2} – Prix médian", f"{s2['median']:,.0f} € / m²")
-        st.metric(f"{city2} – Annonces", s2["count"])
+        metric_cols = st.columns(min(len(selected), 4))
+        for i, city in enumerate(selected):
+            with metric_cols[i % len(metric_cols)]:
+                median = comparison.stats[city]["median"]
+                st.metric(f"{city} – Prix médian", "—" if median is None else f"{median:,.0f} € / m²")
+                st.metric(f"{city} – Annonces", comparison.stats[city]["count"])
 
     st.header("📉 Prix / Surface")
 
     use_log = st.checkbox("Échelle Logarithmique", value=True)
     
     st.plotly_chart(
-        price_surface_scatter(df1, df2, city1, city2, use_log=use_log),
+        cached_figure("scatter", comparison, lambda: price_surface_scatter(comparison, use_log=use_log), use_log=use_log),
         use_container_width=True,
     )
 
-
-
     # Weekly
     st.header("📈 Évolution temporelle")
-    date1 = "update_date" if "update_date" in df1.columns else "creation_date"
-    date2 = "update_date" if "update_date" in df2.columns else "creation_date"
-
-    weekly_all = pd.concat([
-    weekly_median(df1, city1, date1).assign(city_role=city1),
-    weekly_median(df2, city2, date2).assign(city_role=city2),
-])
-
-
-    st.plotly_chart(weekly_price_evolution(weekly_all), use_container_width=True)
+    st.plotly_chart(
+        cached_figure("weekly", comparison, lambda: weekly_price_evolution(comparison)),
+        use_container_width=True,
+    )
 
     # Maps
     st.header("🗺️ Cartes")
@@ -126,26 +124,95 @@ if st.session_state.get("show", False):
         horizontal=True,
     )
     
-    colA, colB = st.columns(2)
-
-    with colA:
-        coords1 = get_city_coords(city1.lower())
-        if map_mode == "Densité":
-            st.pydeck_chart(make_price_map(df1, coords1["lat"], coords1["lon"]))
-        else:
-            st.pydeck_chart(make_price_map(df1, coords1["lat"], coords1["lon"], show_heatmap=False))
-
-    with colB:
-        coords2 = get_city_coords(city2.lower())
-        if map_mode == "Densité":
-            st.pydeck_chart(make_price_map(df2, coords2["lat"], coords2["lon"]))
+    coords = {}
+    for city in selected:
+        try:
+            coords[city] = get_city_coords(city.lower())
+        except KeyError as e:
+            st.warning(f"⚠️ {e.args[0]} : carte indisponible")
+    map_cols = st.columns(2)
+
+    # Villes sans annonce : rien à cartographier
+    for i, city in enumerate(c for c in comparison.with_listings() if c in coords):
+        with map_cols[i % 2]:
+            st.caption(city)
+            st.pydeck_chart(cached_map(comparison, city, coords[city], show_heatmap=(map_mode == "Densité")))
+            
+    # Estimation de loyer
+    st.markdown("---")
+    st.header("🏷️ Estimation de loyer")
+    st.caption("Loyer au m² d'un logement d'après les annonces comparables les plus proches "
+               "(position, surface, pièces).")
+
+    from core.data_loader import load_city_dataframe
+    from core.estimator import rent_estimator
+
+    with st.columns(4)[0]:
+        est_city = st.selectbox("Ville", selected, key="estimate_city")
+    # Même DataFrame (partagé par le processus) que celui indexé par l'estimateur
+    est_df = load_city_dataframe(est_city.lower())
+    zip_codes = sorted(est_df["zip_code"].dropna().astype(str).unique()) if not est_df.empty else []
+
+    if not zip_codes:
+        st.info(f"ℹ️ Aucune annonce avec code postal pour {est_city} : estimation indisponible.")
+    else:
+        est_cols = st.columns(3)
+        with est_cols[0]:
+            est_zip = st.selectbox("Code postal", zip_codes, key="estimate_zip")
+        with est_cols[1]:
+            est_surface = st.number_input("Surface (m²)", min_value=9.0, max_value=400.0, value=40.0, step=1.0)
+        with est_cols[2]:
+            est_rooms = st.number_input("Pièces", min_value=1, max_value=10, value=2, step=1)
+
+        # Position : centre des annonces du code postal (sinon de la ville), ajustable
+        center = est_df.loc[est_df["zip_code"].astype(str) == est_zip, ["lat", "lon"]].median().to_dict()
+        if any(math.isnan(v) for v in center.values()):
+            center = coords.get(est_city, center)
+
+        if any(math.isnan(v) for v in center.values()):
+            st.info(f"ℹ️ Position inconnue pour {est_zip} : estimation indisponible.")
         else:
-            st.pydeck_chart(make_price_map(df2, coords2["lat"], coords2["lon"], show_heatmap=False))
+            with st.expander("📍 Coordonnées précises"):
+                lat_col, lon_col = st.columns(2)
+                est_lat = lat_col.number_input("Latitude", value=float(center["lat"]), format="%.5f")
+                est_lon = lon_col.number_input("Longitude", value=float(center["lon"]), format="%.5f")
+
+            try:
+                estimate = rent_estimator(est_city).estimate(est_lon, est_lat, est_surface, est_rooms)
+            except (KeyError, ValueError) as e:
+                st.warning(str(e.args[0] if e.args else e))
+            else:
+                m1, m2, m3 = st.columns(3)
+                m1.metric("Loyer estimé", f"{estimate.rent:,.0f} € / mois")
+                m2.metric("Prix au m²", f"{estimate.price_m2:,.1f} € / m²")
+                m3.metric("Fourchette (quartiles)", f"{estimate.low_m2:,.0f} – {estimate.high_m2:,.0f} € / m²")
+
+                comparables = est_df.iloc[estimate.comparables][
+                    ["title", "zip_code", "livingSpace", "numberOfRooms", "price_value", "price_m2"]
+                ].assign(distance_m=estimate.distances_m.round(0))
+                with st.expander(f"🏘️ {len(comparables)} annonces comparables"):
+                    st.dataframe(comparables, use_container_width=True, hide_index=True)
             
     # IA
     st.markdown("---")
     st.header("🤖 Assistant IA")
 
+    # L'assistant et le rapport PDF comparent exactement deux villes
+    if len(selected) != 2:
+        st.info("ℹ️ L'assistant IA compare deux villes : sélectionnez-en exactement deux.")
+        st.stop()
+
+    city1, city2 = selected
+    if len(comparison.with_listings()) < 2:
+        st.info("ℹ️ L'assistant IA compare deux villes ayant des annonces.")
+        st.stop()
+    if city1 not in coords or city2 not in coords:
+        st.warning("⚠️ Coordonnées introuvables : les cartes de l'assistant ne peuvent pas être générées.")
+        st.stop()
+    pair = comparison.subset([city1, city2])
+    s1, s2 = pair.stats[city1], pair.stats[city2]
+    coords1, coords2 = coords[city1], coords[city2]
+
     key_file = Path("config/api_key.json")
     if key_file.exists():
         st.session_state["openai_api_key"] = json.loads(key_file.read_text()).get("openai_api_key")
@@ -155,11 +222,14 @@ if st.session_state.get("show", False):
         st.stop()
 
     os.environ["OPENAI_API_KEY"] = st.session_state["openai_api_key"]
-    assistant = GPTAssistant()
+
+    # Dossier d'images propre à la session (pas d'écrasement entre utilisateurs)
+    session_dir = st.session_state.setdefault("session_dir", f"imgs/sessions/{uuid.uuid4().hex[:12]}")
 
     question = st.text_area("Question à l’assistant")
+    refresh_ai = st.checkbox("Ignorer le cache IA (forcer de nouvelles réponses)", value=False)
     
-    col_btn1, col_btn2 = st.columns(2)
+    col_btn1, col_btn2, col_btn3 = st.columns(3)
     
     with col_btn1:
         analyze_btn = st.button("Analyser", use_container_width=True)
@@ -167,84 +237,70 @@ if st.session_state.get("show", False):
     with col_btn2:
         pdf_btn = st.button("Générer un Rapport PDF", use_container_width=True)
     
+    with col_btn3:
+        html_btn = st.button("Rapport HTML interactif", use_container_width=True)
+    
     if analyze_btn:
+        from gpt_agent.gpt_assistant import GPTAssistant
+        from gpt_agent.prompts import build_dashboard_analysis_prompt
+        from image_service.dashboard_to_image import dashboard_to_image
         
-        with st.spinner("Génération de l'image…"):
-            # Utiliser le mode choisi par l'utilisateur
-            use_heatmap = (map_mode == "Densité")
-            dash_img = dashboard_to_image(
-                plt=[
-                    annonces_distribution_pie(df1, df2, city1, city2),
-                    price_surface_scatter(df1, df2, city1, city2, use_log=use_log), 
-                    weekly_price_evolution(weekly_all)
-                ], 
-                pdk=[make_price_map(df1, coords1["lat"], coords1["lon"], show_heatmap=False, zoom=13), 
-                     make_price_map(df2, coords2["lat"], coords2["lon"], show_heatmap=False, zoom=13)]
-            )
-        st.success("Image sauvegardée dans le dossier imgs/")
-        
-        with st.spinner("Analyse…"):
-            # Construire le prompt avec la fonction dédiée
-            prompt = build_dashboard_analysis_prompt(
-                city1, city2,
-                s1, s2,
-                weekly_all[weekly_all.city == city1]["median_price_m2"].tolist(),
-                weekly_all[weekly_all.city == city2]["median_price_m2"].tolist(),
-                question
-            )
-            
-            # Appeler l'assistant avec le prompt et l'image
-            result = assistant.ask_with_image(prompt, dash_img)
-
-        st.write(result)
-    
-    if pdf_btn:
-        # Créer les éléments de progression
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+        assistant = GPTAssistant(use_cache=not refresh_ai)
         
-        def update_progress(progress: int, message: str):
-            progress_bar.progress(progress)
-            status_text.text(message)
+        with st.spinner("Génération de l'image…"):
+            plots, decks = dashboard_figures(pair, use_log, coords1, coords2)
+            dash_img = dashboard_to_image(plt=plots, pdk=decks, output_dir=session_dir)
+        st.success(f"Image sauvegardée dans le dossier {session_dir}/")
         
-        update_progress(10, "📸 Génération des images...")
-        dash_img = dashboard_to_image(
-            plt=[
-                annonces_distribution_pie(df1, df2, city1, city2),
-                price_surface_scatter(df1, df2, city1, city2, use_log=use_log), 
-                weekly_price_evolution(weekly_all)
-            ], 
-            pdk=[make_price_map(df1, coords1["lat"], coords1["lon"], show_heatmap=False, zoom=13), 
-                 make_price_map(df2, coords2["lat"], coords2["lon"], show_heatmap=False, zoom=13)]
+        # Construire le prompt avec la fonction dédiée
+        prompt = build_dashboard_analysis_prompt(
+            city1, city2,
+            s1, s2,
+            pair.weekly_prices(city1),
+            pair.weekly_prices(city2),
+            question
         )
         
-        update_progress(20, "📄 Génération du rapport PDF...")
-        pdf_path = generate_comparison_report(
-            city1=city1,
-            city2=city2,
-            df1=df1,
-            df2=df2,
-            stats1=s1,
-            stats2=s2,
-            weekly1=weekly_all[weekly_all.city == city1]["median_price_m2"].tolist(),
-            weekly2=weekly_all[weekly_all.city == city2]["median_price_m2"].tolist(),
-            question=question or "Quelle ville est la plus attractive pour investir ?",
-            output_path="imgs/rapport_comparatif.pdf",
-            progress_callback=update_progress
+        # Afficher la réponse au fil de sa génération
+        result = st.write_stream(assistant.stream_with_image(prompt, dash_img))
+        stats = assistant.cache_stats()
+        if stats:
+            st.caption(f"Cache IA : {stats['hits']} hits / {stats['misses']} misses · {stats['entries']} réponses")
+    
+    if pdf_btn or html_btn:
+        # Le rapport est généré en arrière-plan dans son propre dossier ;
+        # un rapport identique déjà produit est réutilisé
+        st.session_state.report_job = report_queue().submit(
+            [city1, city2], question, use_log=use_log,
+            use_cache=not refresh_ai, force=refresh_ai,
+            fmt="html" if html_btn else "pdf",
         )
+    
+    job = report_queue().status(st.session_state.get("report_job")) if st.session_state.get("report_job") else None
+    if job and job["cities"] == [city1, city2]:
+        if job["state"] in ("queued", "running"):
+            st_autorefresh(interval=1500, key="report_refresh")
         
-        progress_bar.progress(100)
-        status_text.text("✅ Rapport terminé !")
-        st.success(f"✅ Rapport PDF généré : {pdf_path}")
+        st.progress(job["progress"])
+        st.text(job["message"])
         
-        # Télécharger le PDF
-        with open(pdf_path, "rb") as pdf_file:
-            st.download_button(
-                label="📥 Télécharger le rapport PDF",
-                data=pdf_file,
-                file_name=f"rapport_{city1}_vs_{city2}.pdf",
-                mime="application/pdf",
-                use_container_width=True
-            )
-
-
+        # Sections affichées dès qu'elles sont rédigées
+        for section in job["sections"]:
+            with st.expander(section["name"]):
+                st.write(section["text"])
+        
+        if job["state"] == "error":
+            st.error(f"❌ Échec du rapport : {job['error']}")
+        elif job["state"] == "done":
+            is_html = job["format"] == "html"
+            st.success(f"✅ Rapport {'HTML' if is_html else 'PDF'} généré : {job['report_path']}")
+            
+            # Télécharger le rapport
+            with open(job["report_path"], "rb") as report_file:
+                st.download_button(
+                    label=f"📥 Télécharger le rapport {'HTML' if is_html else 'PDF'}",
+                    data=report_file,
+                    file_name=f"rapport_{city1}_vs_{city2}.{'html' if is_html else 'pdf'}",
+                    mime="text/html" if is_html else "application/pdf",
+                    use_container_width=True
+                )
@@ -0,0 +1,50 @@
+"""
+Tests unitaires de la lecture des analyses groupées du rapport
+(gpt_agent.pdf_generator.parse_batched_analyses)
+"""
+
+import pytest
+
+from gpt_agent.pdf_generator import parse_batched_analyses
+
+KEYS = ["prix", "surface"]
+
+
+def test_plain_json():
+    text = '{"prix": " Les prix montent. ", "surface": "Surfaces stables."}'
+
+    assert parse_batched_analyses(text, KEYS) == {
+        "prix": "Les prix montent.",
+        "surface": "Surfaces stables.",
+    }
+
+
+def test_fenced_json_with_surrounding_text():
+    text = (
+        "Voici les analyses :\n"
+        "```json\n"
+        '{\n  "prix": "Hausse à Nice.",\n  "surface": "Plus grand à Annecy.",\n  "autre": "ignorée"\n}\n'
+        "```\n"
+    )
+
+    assert parse_batched_analyses(text, KEYS) == {
+        "prix": "Hausse à Nice.",
+        "surface": "Plus grand à Annecy.",
+    }
+
+
+@pytest.mark.parametrize("text", [
+    '{"prix": "Hausse."}',                          # clé manquante
+    '{"prix": "Hausse.", "surface": "   "}',        # analyse vide
+    '{"prix": "Hausse.", "surface": 42}',           # pas du texte
+    '{"prix": "Hausse.", "surface": "Stable."',     # JSON tronqué
+    "Pas de JSON ici.",
+    "",
+    None,
+])
+def test_incomplete_answer_returns_none(text):
+    assert parse_batched_analyses(text, KEYS) is None
+
+
+def test_no_keys():
+    assert parse_batched_analyses("{}", []) == {}
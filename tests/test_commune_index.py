@@ -0,0 +1,141 @@
+"""
+Tests unitaires de la recherche des communes au fil de la frappe
+(core.commune_index.CommuneIndex)
+- Classement : nom exact, début du nom, début d'un mot, population
+- Filtre par département
+- Repli par trigrammes (fautes de frappe)
+"""
+
+import csv
+
+import pytest
+
+from core.commune_index import CommuneIndex
+
+COMMUNES = [
+    # Commune, Département (numéro), Département (nom), Région, cleaned_city_name
+    ("Saint-Denis", "93", "Seine-Saint-Denis", "Île-de-France", "Saint-Denis"),
+    ("Saint-Denis", "11", "Aude", "Occitanie", "Saint-Denis"),
+    ("Saint-Denis-en-Val", "45", "Loiret", "Centre-Val de Loire", "Saint-Denis-en-Val"),
+    ("Saint-Étienne", "42", "Loire", "Auvergne-Rhône-Alpes", "Saint-Étienne"),
+    ("Saint-Étienne-de-Tinée", "06", "Alpes-Maritimes", "Provence-Alpes-Côte d'Azur", "Saint-Étienne-de-Tinée"),
+    ("Ajaccio", "2A", "Corse-du-Sud", "Corse", "Ajaccio"),
+    ("Lyon 01", "69", "Rhône", "Auvergne-Rhône-Alpes", "Lyon"),
+]
+
+POPULATION = [
+    # city, admin_name, Département (numéro), population
+    ("Saint-Denis", "Île-de-France", "93", 110000),
+    # Département de la jointure par nom erroné : rattrapé par la région
+    ("Saint-Étienne", "Auvergne-Rhône-Alpes", "06", 170000),
+    ("Saint-Denis-en-Val", "Centre-Val de Loire", "45", 500000),
+    ("Ajaccio", "Corsica", "2A", 70000),
+    ("Lyon", "Auvergne-Rhône-Alpes", "69", 520000),
+]
+
+
+def write_csv(path, header, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return path
+
+
+@pytest.fixture
+def index(tmp_path):
+    communes = write_csv(
+        tmp_path / "communes.csv",
+        ["Commune", "Département (numéro)", "Département (nom)", "Région", "cleaned_city_name"],
+        COMMUNES,
+    )
+    population = write_csv(
+        tmp_path / "population.csv",
+        ["city", "admin_name", "Département (numéro)", "population"],
+        POPULATION,
+    )
+    return CommuneIndex(communes, population)
+
+
+def labels(communes):
+    return [c.label for c in communes]
+
+
+# -------------------------------------------------------------------
+# Population
+# -------------------------------------------------------------------
+
+def test_population_joined_on_departement(index):
+    population = {c.label: c.population for c in index.communes}
+
+    assert population["Saint-Denis (93)"] == 110000
+    assert population["Saint-Denis (11)"] == 0
+    assert population["Saint-Étienne (42)"] == 170000
+    assert population["Saint-Étienne-de-Tinée (06)"] == 0
+    assert population["Ajaccio (2A)"] == 70000
+
+
+# -------------------------------------------------------------------
+# Classement
+# -------------------------------------------------------------------
+
+def test_prefix_ranked_by_population(index):
+    assert labels(index.search("saint", limit=3)) == [
+        "Saint-Denis-en-Val (45)", "Saint-Étienne (42)", "Saint-Denis (93)",
+    ]
+
+
+def test_exact_name_first(index):
+    # Nom exact avant un nom plus long mais plus peuplé
+    assert labels(index.search("Saint Denis")) == [
+        "Saint-Denis (93)", "Saint-Denis (11)", "Saint-Denis-en-Val (45)",
+    ]
+
+
+def test_word_prefix(index):
+    assert labels(index.search("etien")) == ["Saint-Étienne (42)", "Saint-Étienne-de-Tinée (06)"]
+    assert labels(index.search("tinee")) == ["Saint-Étienne-de-Tinée (06)"]
+
+
+def test_accents_and_abbreviations(index):
+    assert labels(index.search("St-Étienne", limit=1)) == ["Saint-Étienne (42)"]
+
+
+def test_cleaned_name(index):
+    assert [c.name for c in index.search("lyon")][:1] == ["Lyon"]
+
+
+def test_limit_and_empty_query(index):
+    assert len(index.search("saint", limit=2)) == 2
+    assert index.search("") == []
+    assert index.search("  -  ") == []
+
+
+# -------------------------------------------------------------------
+# Département
+# -------------------------------------------------------------------
+
+def test_departement_filter(index):
+    assert labels(index.search("saint denis 11")) == ["Saint-Denis (11)"]
+    assert labels(index.search("ajaccio 2a")) == ["Ajaccio (2A)"]
+
+
+def test_unknown_departement_returns_nothing(index):
+    assert index.search("saint denis 75") == []
+
+
+# -------------------------------------------------------------------
+# Fautes de frappe
+# -------------------------------------------------------------------
+
+def test_typo_fallback(index):
+    assert labels(index.search("sant etienne", limit=1)) == ["Saint-Étienne (42)"]
+
+
+def test_no_match(index):
+    assert index.search("zzzz") == []
+
+
+def test_similar(index):
+    assert labels(index.similar("ajacio", limit=1)) == ["Ajaccio (2A)"]
+    assert index.similar("") == []
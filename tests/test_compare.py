@@ -0,0 +1,109 @@
+"""
+Tests unitaires de la comparaison N villes (viz.compare.compare_cities)
+- Agrégats (count, médiane, moyenne) et séries hebdomadaires
+- Villes sans annonce
+- subset / with_listings
+"""
+
+import math
+
+import pandas as pd
+import pytest
+
+from viz.compare import CITY_PALETTE, compare_cities
+
+
+def listings(prices, dates):
+    return pd.DataFrame({"price_m2": prices, "update_date": dates})
+
+
+@pytest.fixture
+def frames():
+    return {
+        "nice": listings(
+            [10.0, 20.0, 30.0, 40.0],
+            ["2024-01-01", "2024-01-02", "2024-01-08", "2024-01-09"],
+        ),
+        "annecy": listings([15.0, 25.0, 50.0], ["2024-01-01", "2024-01-01", "2024-01-15"]),
+        "vide": pd.DataFrame(columns=["price_m2", "update_date"]),
+    }
+
+
+# -------------------------------------------------------------------
+# Agrégats
+# -------------------------------------------------------------------
+
+def test_stats_match_pandas(frames):
+    comparison = compare_cities(frames)
+
+    assert comparison.cities == ["nice", "annecy", "vide"]
+    for city in ("nice", "annecy"):
+        prices = frames[city]["price_m2"]
+        assert comparison.stats[city]["count"] == len(prices)
+        assert math.isclose(comparison.stats[city]["median"], prices.median())
+        assert math.isclose(comparison.stats[city]["mean"], prices.mean())
+    assert comparison.counts == {"nice": 4, "annecy": 3, "vide": 0}
+
+
+def test_weekly_median_per_city(frames):
+    comparison = compare_cities(frames)
+
+    # Semaines du lundi 1er et du lundi 8 janvier
+    assert comparison.weekly_prices("nice") == [15.0, 35.0]
+    assert comparison.weekly_prices("annecy") == [20.0, 50.0]
+    assert comparison.weekly_prices("vide") == []
+
+
+def test_frame_and_colors(frames):
+    comparison = compare_cities(frames)
+
+    assert comparison.frame("annecy")["price_m2"].tolist() == [15.0, 25.0, 50.0]
+    assert (comparison.frame("nice")["city"] == "nice").all()
+    assert comparison.colors == {
+        "nice": CITY_PALETTE[0], "annecy": CITY_PALETTE[1], "vide": CITY_PALETTE[2],
+    }
+
+
+# -------------------------------------------------------------------
+# Villes sans annonce
+# -------------------------------------------------------------------
+
+def test_empty_city_has_unknown_stats(frames):
+    stats = compare_cities(frames).stats["vide"]
+
+    # Médiane et moyenne inconnues, pas 0
+    assert stats == {"count": 0, "median": None, "mean": None}
+
+
+def test_with_listings_skips_empty_cities(frames):
+    comparison = compare_cities(frames)
+
+    assert comparison.with_listings() == ["nice", "annecy"]
+    assert comparison.with_listings(["vide", "annecy"]) == ["annecy"]
+
+
+def test_all_cities_empty():
+    empty = pd.DataFrame(columns=["price_m2", "update_date"])
+
+    with pytest.raises(ValueError):
+        compare_cities({"a": empty, "b": empty.copy()})
+
+
+# -------------------------------------------------------------------
+# Sous-ensemble
+# -------------------------------------------------------------------
+
+def test_subset_keeps_aggregates(frames):
+    comparison = compare_cities(frames)
+    comparison.versions = {"nice": "1.1", "annecy": "2.2", "vide": "unknown"}
+
+    pair = comparison.subset(["annecy", "vide"])
+
+    assert pair.cities == ["annecy", "vide"]
+    assert pair.stats == {c: comparison.stats[c] for c in ("annecy", "vide")}
+    assert pair.counts == {"annecy": 3, "vide": 0}
+    assert set(pair.data["city_role"]) == {"annecy"}
+    assert set(pair.weekly["city"]) == {"annecy"}
+    assert pair.colors == {c: comparison.colors[c] for c in ("annecy", "vide")}
+    assert pair.version_of(["vide", "annecy"]) == ["unknown", "2.2"]
+    assert pair.with_listings() == ["annecy"]
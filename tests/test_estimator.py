@@ -0,0 +1,135 @@
+"""
+Tests unitaires de l'estimation du loyer au m² (core.estimator)
+- Médiane et quartiles pondérés
+- Sélection des comparables
+- Estimations groupées
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.estimator import RentEstimator, _weighted_quantiles
+from core.spatial import project
+
+
+def weighted_quantile(values, weights, q):
+    """Première valeur (triée) dont le poids cumulé normalisé atteint q."""
+    order = np.argsort(values)
+    cumulative = np.cumsum(np.asarray(weights, dtype=float)[order])
+    return np.asarray(values)[order][np.argmax(cumulative / cumulative[-1] >= q)]
+
+
+def listings(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "lon": 7.26 + rng.uniform(-0.05, 0.05, n),
+        "lat": 43.70 + rng.uniform(-0.04, 0.04, n),
+        "livingSpace": rng.uniform(15, 120, n),
+        "numberOfRooms": rng.integers(1, 6, n),
+        "price_m2": rng.uniform(10, 30, n),
+    })
+
+
+# -------------------------------------------------------------------
+# Quantiles pondérés
+# -------------------------------------------------------------------
+
+def test_equal_weights():
+    values = np.array([[5.0, 1.0, 4.0, 2.0, 3.0]])
+    low, median, high = _weighted_quantiles(values, np.ones_like(values), (0.25, 0.5, 0.75))
+
+    assert (low[0], median[0], high[0]) == (2.0, 3.0, 4.0)
+
+
+def test_heavy_weight_pulls_median():
+    values = np.array([[10.0, 20.0, 30.0]])
+    (median,) = _weighted_quantiles(values, np.array([[1.0, 1.0, 5.0]]), (0.5,))
+
+    assert median[0] == 30.0
+
+
+def test_rows_against_reference():
+    rng = np.random.default_rng(0)
+    values = rng.uniform(0, 100, (50, 15))
+    weights = rng.uniform(0.1, 2, (50, 15))
+
+    results = _weighted_quantiles(values, weights, (0.25, 0.5, 0.75))
+
+    for q, result in zip((0.25, 0.5, 0.75), results):
+        expected = [weighted_quantile(v, w, q) for v, w in zip(values, weights)]
+        np.testing.assert_array_equal(result, expected)
+
+
+# -------------------------------------------------------------------
+# Estimateur
+# -------------------------------------------------------------------
+
+def test_estimate_is_weighted_median_of_comparables():
+    df = listings()
+    estimator = RentEstimator(df)
+
+    estimate = estimator.estimate(7.26, 43.70, 45, 2, k=15)
+
+    rows = estimate.comparables
+    prices = df["price_m2"].to_numpy()[rows]
+    # Mêmes poids que l'estimateur : inverse de la distance dans l'espace des caractéristiques
+    features = RentEstimator._features(
+        project(df["lon"].to_numpy()[rows], df["lat"].to_numpy()[rows], estimator.lat0),
+        df["livingSpace"].to_numpy()[rows],
+        df["numberOfRooms"].to_numpy()[rows],
+    )
+    query = RentEstimator._features(project([7.26], [43.70], estimator.lat0), [45], [2])
+    weights = 1.0 / (np.linalg.norm(features - query, axis=1) + 0.5)
+
+    assert len(estimate.comparables) == 15
+    assert estimate.price_m2 == weighted_quantile(prices, weights, 0.5)
+    assert estimate.low_m2 == weighted_quantile(prices, weights, 0.25)
+    assert estimate.high_m2 == weighted_quantile(prices, weights, 0.75)
+    assert estimate.low_m2 <= estimate.price_m2 <= estimate.high_m2
+    assert estimate.rent == pytest.approx(estimate.price_m2 * 45)
+
+
+def test_uniform_market():
+    df = listings()
+    df["price_m2"] = 20.0
+    estimate = RentEstimator(df).estimate(7.26, 43.70, 60, 3)
+
+    assert (estimate.price_m2, estimate.low_m2, estimate.high_m2) == (20.0, 20.0, 20.0)
+    assert estimate.rent == pytest.approx(1200.0)
+
+
+def test_comparables_exclude_invalid_listings():
+    df = listings(100)
+    df.loc[0, "livingSpace"] = 5           # trop petit
+    df.loc[1, "numberOfRooms"] = 0
+    df.loc[2, "lon"] = np.nan
+    df.loc[3, "price_m2"] = 5000           # prix aberrant
+    estimator = RentEstimator(df)
+
+    assert not {0, 1, 2, 3} & set(estimator.rows)
+    estimate = estimator.estimate(df.loc[0, "lon"], df.loc[0, "lat"], 40, 2, k=len(estimator))
+    assert not {0, 1, 2, 3} & set(estimate.comparables)
+
+
+def test_estimate_many_matches_single_estimates():
+    df = listings()
+    estimator = RentEstimator(df)
+    lon, lat = [7.25, 7.27, 7.30], [43.69, 43.71, 43.72]
+    surface, rooms = [30, 55, 90], [1, 2, 4]
+
+    batch = estimator.estimate_many(lon, lat, surface, rooms, k=10)
+
+    assert batch["comparables"].shape == batch["distances_m"].shape == (3, 10)
+    for i in range(3):
+        single = estimator.estimate(lon[i], lat[i], surface[i], rooms[i], k=10)
+        assert batch["price_m2"][i] == single.price_m2
+        np.testing.assert_array_equal(batch["comparables"][i], single.comparables)
+
+
+def test_no_comparables():
+    estimator = RentEstimator(listings().iloc[:0])
+
+    assert len(estimator) == 0
+    with pytest.raises(ValueError):
+        estimator.estimate(7.26, 43.70, 45, 2)
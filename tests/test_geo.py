@@ -0,0 +1,144 @@
+"""
+Tests unitaires de la recherche des villes par nom (core.geo)
+- Forme canonique des noms (fold_name)
+- Homonymes et filtre par département "(dep)"
+- Repli approché sur les fautes de frappe
+"""
+
+import csv
+
+import pytest
+
+from core import geo
+from core.geo import CityIndex
+from core.utils import fold_name
+
+CITIES = [
+    # city, admin_name, lat, lng
+    ("Saint-Denis", "Île-de-France", 48.9356, 2.3539),
+    ("Saint-Étienne", "Auvergne-Rhône-Alpes", 45.4347, 4.3903),
+    ("Ajaccio", "Corsica", 41.9267, 8.7369),
+]
+
+COMMUNES = [
+    # Commune, cleaned_city_name, Département (numéro), Région
+    ("Saint-Denis", "Saint-Denis", "93", "Île-de-France"),
+    ("Saint-Denis", "Saint-Denis", "11", "Occitanie"),
+    ("Saint-Étienne", "Saint-Étienne", "42", "Auvergne-Rhône-Alpes"),
+    ("Ajaccio", "Ajaccio", "2A", "Corse"),
+    ("Lyon 01", "Lyon", "69", "Auvergne-Rhône-Alpes"),
+]
+
+
+def write_csv(path, header, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return path
+
+
+@pytest.fixture
+def index(tmp_path):
+    cities = write_csv(tmp_path / "cities_loc.csv", ["city", "admin_name", "lat", "lng"], CITIES)
+    communes = write_csv(
+        tmp_path / "communes.csv",
+        ["Commune", "cleaned_city_name", "Département (numéro)", "Région"],
+        COMMUNES,
+    )
+    return CityIndex(cities, communes)
+
+
+# -------------------------------------------------------------------
+# fold_name
+# -------------------------------------------------------------------
+
+@pytest.mark.parametrize("name, expected", [
+    ("Saint-Étienne", "saint etienne"),
+    ("St-Étienne (42)", "saint etienne"),
+    ("Ste Maxime", "sainte maxime"),
+    ("L'Haÿ-les-Roses", "l hay les roses"),
+    ("Œuilly", "oeuilly"),
+    ("aix_en_provence", "aix en provence"),
+    ("  PARIS  ", "paris"),
+])
+def test_fold_name(name, expected):
+    assert fold_name(name) == expected
+
+
+# -------------------------------------------------------------------
+# Homonymes
+# -------------------------------------------------------------------
+
+def test_homonyms_located_city_first(index):
+    places = index.lookup("saint denis")
+
+    assert [p.departement for p in places] == ["93", "11"]
+    # La ville de cities_loc a hérité du département de même région
+    assert places[0].has_coords
+    assert not places[1].has_coords
+
+
+def test_departement_filter(index):
+    (place,) = index.lookup("Saint-Denis (11)")
+
+    assert place.departement == "11"
+    assert place.region == "Occitanie"
+
+
+def test_unknown_departement_returns_nothing(index):
+    # Aucun homonyme en repli
+    assert index.lookup("Saint-Denis (75)") == []
+
+
+def test_region_alias(index):
+    (place,) = index.lookup("Ajaccio (2a)")
+
+    assert place.departement == "2A"
+    assert place.has_coords
+
+
+def test_cleaned_name_is_indexed(index):
+    (place,) = index.lookup("Lyon")
+
+    assert place.departement == "69"
+
+
+# -------------------------------------------------------------------
+# Repli approché
+# -------------------------------------------------------------------
+
+def test_typo_matches_located_city(index):
+    (place,) = index.lookup("Saint-Etiene")
+
+    assert place.name == "Saint-Étienne"
+
+
+def test_no_fuzzy_match(index):
+    assert index.lookup("Saint-Etiene", fuzzy=False) == []
+
+
+# -------------------------------------------------------------------
+# get_city_coords
+# -------------------------------------------------------------------
+
+@pytest.fixture
+def shared_index(index, monkeypatch, tmp_path):
+    monkeypatch.setattr(geo, "_index", index)
+    # Aucune annonce scrapée : pas de position de repli
+    monkeypatch.chdir(tmp_path)
+    return index
+
+
+def test_coords_of_homonym(shared_index):
+    assert geo.get_city_coords("Saint-Denis (93)") == {"lat": 48.9356, "lon": 2.3539}
+
+
+def test_coords_unknown_departement(shared_index):
+    with pytest.raises(KeyError):
+        geo.get_city_coords("Saint-Denis (75)")
+
+
+def test_coords_without_position(shared_index):
+    with pytest.raises(KeyError):
+        geo.get_city_coords("Saint-Denis (11)")
@@ -0,0 +1,128 @@
+"""
+Tests unitaires du cache disque des réponses LLM (gpt_agent.cache.ResponseCache)
+- Clé : modèle, prompt normalisé, images, options
+- Expiration (TTL)
+- Éviction LRU au-delà du budget
+"""
+
+import pytest
+
+from gpt_agent import cache as cache_module
+from gpt_agent.cache import ResponseCache
+
+
+class Clock:
+    """Horloge manuelle pour time.time()."""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    return clock
+
+
+# -------------------------------------------------------------------
+# Clé
+# -------------------------------------------------------------------
+
+def test_key_ignores_prompt_whitespace():
+    assert ResponseCache.key("m", "Analyse\n    ce  graphique") == ResponseCache.key("m", "Analyse ce graphique")
+
+
+def test_key_depends_on_model_prompt_and_images():
+    base = ResponseCache.key("m", "prompt", ["a"])
+
+    assert ResponseCache.key("autre", "prompt", ["a"]) != base
+    assert ResponseCache.key("m", "autre prompt", ["a"]) != base
+    assert ResponseCache.key("m", "prompt", ["b"]) != base
+    assert ResponseCache.key("m", "prompt", ["a", "b"]) != base
+    assert ResponseCache.key("m", "prompt") != base
+
+
+def test_key_depends_on_options():
+    base = ResponseCache.key("m", "prompt", ["a"])
+    json_key = ResponseCache.key("m", "prompt", ["a"], {"response_format": "json"})
+
+    assert json_key != base
+    assert json_key != ResponseCache.key("m", "prompt", ["a"], {"response_format": "text"})
+    # Ordre des options indifférent
+    assert (ResponseCache.key("m", "p", options={"a": 1, "b": 2})
+            == ResponseCache.key("m", "p", options={"b": 2, "a": 1}))
+    # Sans options : même clé que les entrées déjà en cache
+    assert ResponseCache.key("m", "prompt", ["a"], {}) == base
+    assert ResponseCache.key("m", "prompt", ["a"], None) == base
+
+
+# -------------------------------------------------------------------
+# Lecture / expiration
+# -------------------------------------------------------------------
+
+def test_get_put_and_counters(tmp_path, clock):
+    cache = ResponseCache(tmp_path / "cache.sqlite3")
+
+    assert cache.get("k") is None
+    cache.put("k", "réponse")
+    assert cache.get("k") == "réponse"
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["bytes"] == len("réponse".encode("utf-8"))
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = ResponseCache(tmp_path / "cache.sqlite3", ttl=60)
+    cache.put("k", "réponse")
+
+    clock.now += 60
+    assert cache.get("k") == "réponse"
+
+    clock.now += 1
+    assert cache.get("k") is None
+    # L'entrée expirée est supprimée
+    assert cache.stats()["entries"] == 0
+
+
+def test_put_drops_expired_entries(tmp_path, clock):
+    cache = ResponseCache(tmp_path / "cache.sqlite3", ttl=60)
+    cache.put("ancienne", "x")
+
+    clock.now += 61
+    cache.put("nouvelle", "y")
+
+    assert cache.stats()["entries"] == 1
+    assert cache.get("nouvelle") == "y"
+
+
+# -------------------------------------------------------------------
+# Éviction
+# -------------------------------------------------------------------
+
+def test_evicts_least_recently_used(tmp_path, clock):
+    cache = ResponseCache(tmp_path / "cache.sqlite3", max_bytes=25)
+    for key in ("a", "b"):
+        cache.put(key, "x" * 10)
+        clock.now += 1
+
+    # "a" relue : "b" devient la moins récemment utilisée
+    assert cache.get("a") is not None
+    clock.now += 1
+    cache.put("c", "x" * 10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["bytes"] <= 25
+
+
+def test_persists_across_instances(tmp_path, clock):
+    path = tmp_path / "cache.sqlite3"
+    ResponseCache(path).put("k", "réponse")
+
+    assert ResponseCache(path).get("k") == "réponse"
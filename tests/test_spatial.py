@@ -0,0 +1,144 @@
+"""
+Tests unitaires de l'index spatial (core.spatial.SpatialIndex),
+comparé à un calcul exhaustif sur les mêmes points projetés
+- Rayon, rectangle lon/lat, k plus proches voisins
+- Persistance
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.spatial import SpatialIndex, project, save_spatial_index, spatial_index_path
+
+LAT0 = 43.70
+
+
+@pytest.fixture
+def points():
+    # Annonces autour de Nice (~10 km × 10 km)
+    rng = np.random.default_rng(0)
+    lon = 7.26 + rng.uniform(-0.06, 0.06, 500)
+    lat = LAT0 + rng.uniform(-0.045, 0.045, 500)
+    return lon, lat
+
+
+@pytest.fixture
+def queries():
+    rng = np.random.default_rng(1)
+    return 7.26 + rng.uniform(-0.05, 0.05, 20), LAT0 + rng.uniform(-0.04, 0.04, 20)
+
+
+def distances(points, lon, lat):
+    """Distances (m) de chaque requête à chaque point, (n requêtes, n points)."""
+    xy = project(*points, LAT0)
+    centers = project(lon, lat, LAT0)
+    return np.hypot(*(xy[None, :, :] - centers[:, None, :]).transpose(2, 0, 1))
+
+
+# -------------------------------------------------------------------
+# Requêtes
+# -------------------------------------------------------------------
+
+def test_projection_scale():
+    # 0,01° de latitude ≈ 1,11 km
+    xy = project([7.26, 7.26], [LAT0, LAT0 + 0.01], LAT0)
+    assert np.hypot(*(xy[1] - xy[0])) == pytest.approx(1112, rel=1e-3)
+
+
+def test_within_radius(points, queries):
+    index = SpatialIndex(*points, lat0=LAT0)
+    expected = distances(points, *queries) <= 800
+
+    hits = index.within_radius(*queries, 800)
+
+    assert len(hits) == len(queries[0])
+    for found, mask in zip(hits, expected):
+        assert sorted(found) == list(np.flatnonzero(mask))
+
+
+def test_within_radius_per_point(points, queries):
+    index = SpatialIndex(*points, lat0=LAT0)
+    radius = np.linspace(100, 2000, len(queries[0]))
+    expected = distances(points, *queries) <= radius[:, None]
+
+    for found, mask in zip(index.within_radius(*queries, radius), expected):
+        assert sorted(found) == list(np.flatnonzero(mask))
+
+
+def test_in_bbox(points):
+    index = SpatialIndex(*points, lat0=LAT0)
+    lon, lat = points
+    boxes = [(7.22, 43.68, 7.25, 43.72), (7.25, 43.66, 7.32, 43.67), (8.0, 44.0, 8.1, 44.1)]
+
+    for found, (min_lon, min_lat, max_lon, max_lat) in zip(index.in_bbox(boxes), boxes):
+        inside = (lon >= min_lon) & (lon <= max_lon) & (lat >= min_lat) & (lat <= max_lat)
+        assert sorted(found) == list(np.flatnonzero(inside))
+
+
+def test_nearest(points, queries):
+    index = SpatialIndex(*points, lat0=LAT0)
+    expected = distances(points, *queries)
+
+    dist, rows = index.nearest(*queries, k=5)
+
+    assert dist.shape == rows.shape == (len(queries[0]), 5)
+    np.testing.assert_allclose(dist, np.sort(expected, axis=1)[:, :5])
+    np.testing.assert_array_equal(rows, np.argsort(expected, axis=1)[:, :5])
+
+
+def test_nearest_k1_and_missing_neighbours(points):
+    index = SpatialIndex(*points, lat0=LAT0)
+
+    dist, rows = index.nearest([7.26], [LAT0], k=1)
+    assert dist.shape == rows.shape == (1, 1)
+
+    # Aucun voisin à moins d'1 m d'un point en mer
+    dist, rows = index.nearest([7.5], [43.5], k=3, max_distance=1)
+    assert np.isinf(dist).all()
+    assert (rows == -1).all()
+
+
+# -------------------------------------------------------------------
+# DataFrame et persistance
+# -------------------------------------------------------------------
+
+def test_from_frame_skips_missing_positions():
+    df = pd.DataFrame({"lon": [7.26, np.nan, 7.27, 7.28], "lat": [43.70, 43.71, np.nan, 43.72]})
+    index = SpatialIndex.from_frame(df)
+
+    # Positions iloc du DataFrame, lignes sans coordonnées ignorées
+    assert list(index.rows) == [0, 3]
+    (found,) = index.within_radius([7.28], [43.72], 10)
+    assert list(found) == [3]
+
+
+def test_empty_frame():
+    index = SpatialIndex.from_frame(pd.DataFrame(columns=["lon", "lat"]))
+
+    assert len(index) == 0
+    (found,) = index.within_radius([7.26], [LAT0], 1000)
+    assert len(found) == 0
+
+
+def test_save_and_load(points, queries, tmp_path):
+    df = pd.DataFrame({"lon": points[0], "lat": points[1]})
+    csv_path = tmp_path / "nice_clean.csv"
+    index = save_spatial_index(df, csv_path)
+
+    loaded = SpatialIndex.load(spatial_index_path(csv_path), len(df))
+
+    assert loaded is not None
+    np.testing.assert_array_equal(loaded.rows, index.rows)
+    for a, b in zip(loaded.within_radius(*queries, 500), index.within_radius(*queries, 500)):
+        assert sorted(a) == sorted(b)
+
+
+def test_load_rejects_stale_index(points, tmp_path):
+    df = pd.DataFrame({"lon": points[0], "lat": points[1]})
+    csv_path = tmp_path / "nice_clean.csv"
+    save_spatial_index(df, csv_path)
+
+    # CSV réécrit depuis : nombre de lignes différent
+    assert SpatialIndex.load(spatial_index_path(csv_path), len(df) + 1) is None
+    assert SpatialIndex.load(tmp_path / "absent.spatial.npz") is None
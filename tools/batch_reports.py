@@ -0,0 +1,176 @@
+# tools/batch_reports.py
+"""
+Génération en lot des rapports comparatifs, sans passer par l'interface.
+
+    python -m tools.batch_reports annecy nice marseille        # toutes les paires
+    python -m tools.batch_reports --pairs annecy:nice lyon:paris
+    python -m tools.batch_reports --all --workers 3            # toutes les villes scrapées
+
+Chaque ville est chargée et agrégée une seule fois (une comparaison sur
+l'ensemble des villes, restreinte ensuite à chaque paire). Les cartes d'une
+ville sont construites et rendues une fois (caches de figures et de rendus),
+et son analyse de carte est servie par le cache des réponses IA dans toutes
+ses paires. Les rapports tournent en parallèle sous des limites globales :
+`--workers` rapports, `--llm-concurrency` appels IA et `--render-jobs`
+rendus simultanés.
+
+Les rapports sont écrits dans `<output-dir>/<ville1>_vs_<ville2>/` ; une
+paire dont le PDF existe déjà est sautée (sauf `--force`), ce qui permet de
+reprendre un lot interrompu.
+"""
+
+import argparse
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+from pathlib import Path
+
+from core.geo import get_city_coords
+from gpt_agent.gpt_assistant import GPTAssistant
+from gpt_agent.pdf_generator import LLM_CONCURRENCY, generate_comparison_report
+from gpt_agent.report_jobs import DEFAULT_QUESTION
+from image_service.dashboard_to_image import dashboard_to_image
+from viz.compare import load_comparison
+from viz.dashboard import dashboard_figures
+
+REPORTS_DIR = Path("reports")
+
+
+def scraped_cities() -> list:
+    root = Path("jsons")
+    return sorted(d.name for d in root.iterdir() if d.is_dir()) if root.exists() else []
+
+
+def parse_pairs(args) -> list:
+    """Paires (ville1, ville2) à générer, dans l'ordre, sans doublon."""
+    if args.pairs:
+        pairs = []
+        for spec in args.pairs:
+            city1, sep, city2 = spec.partition(":")
+            if not sep or not city1 or not city2:
+                raise SystemExit(f"❌ Paire invalide : {spec!r} (attendu ville1:ville2)")
+            pairs.append((city1, city2))
+    else:
+        cities = scraped_cities() if args.all else args.cities
+        pairs = list(itertools.combinations(cities, 2))
+
+    pairs = [(c1.capitalize(), c2.capitalize()) for c1, c2 in pairs]
+    return list(dict.fromkeys(p for p in pairs if p[0] != p[1]))
+
+
+class BatchRunner:
+    def __init__(self, output_dir: Path, question: str, use_log: bool,
+                 llm_concurrency: int, render_jobs: int, force: bool = False):
+        self.output_dir = output_dir
+        self.question = question
+        self.use_log = use_log
+        self.force = force
+        # Un seul assistant : limite globale des appels IA et cache partagé
+        self.assistant = GPTAssistant(max_in_flight=llm_concurrency)
+        self.llm_concurrency = llm_concurrency
+        self._render_slots = threading.BoundedSemaphore(render_jobs)
+        self._coords = {}
+        self._coords_lock = threading.Lock()
+        self.comparison = None
+
+    def load(self, cities) -> None:
+        """Charge et agrège toutes les villes en une fois."""
+        self.comparison = load_comparison(sorted(set(cities)))
+
+    def coords(self, city: str) -> dict:
+        with self._coords_lock:
+            if city not in self._coords:
+                self._coords[city] = get_city_coords(city.lower())
+            return self._coords[city]
+
+    def run_pair(self, city1: str, city2: str) -> str:
+        pair_dir = self.output_dir / f"{city1.lower()}_vs_{city2.lower()}"
+        pdf_path = pair_dir / "rapport_comparatif.pdf"
+        if pdf_path.exists() and not self.force:
+            return "sauté"
+
+        pair = self.comparison.subset([city1, city2])
+        if len(pair.with_listings()) < 2:
+            return "sauté (aucune annonce)"
+        plots, decks = dashboard_figures(pair, self.use_log, self.coords(city1), self.coords(city2))
+        with self._render_slots:
+            dash_img = dashboard_to_image(plt=plots, pdk=decks, output_dir=str(pair_dir))
+
+        generate_comparison_report(
+            city1=city1,
+            city2=city2,
+            df1=pair.frame(city1),
+            df2=pair.frame(city2),
+            stats1=pair.stats[city1],
+            stats2=pair.stats[city2],
+            weekly1=pair.weekly_prices(city1),
+            weekly2=pair.weekly_prices(city2),
+            question=self.question,
+            output_path=str(pdf_path),
+            dashboard_image_path=dash_img,
+            assistant=self.assistant,
+            image_dir=str(pair_dir),
+            max_concurrency=self.llm_concurrency,
+            # Cartes analysées par ville : une seule analyse par ville pour tout le lot
+            city_maps=True,
+        )
+        return "généré"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génération en lot des rapports comparatifs")
+    parser.add_argument("cities", nargs="*", help="villes à comparer deux à deux")
+    parser.add_argument("--pairs", nargs="+", metavar="VILLE1:VILLE2", help="paires explicites")
+    parser.add_argument("--all", action="store_true", help="toutes les villes scrapées (jsons/)")
+    parser.add_argument("--question", default=DEFAULT_QUESTION)
+    parser.add_argument("--output-dir", type=Path, default=REPORTS_DIR / date.today().isoformat())
+    parser.add_argument("--workers", type=int, default=2, help="rapports générés simultanément")
+    parser.add_argument("--llm-concurrency", type=int, default=LLM_CONCURRENCY,
+                        help="appels IA simultanés, tous rapports confondus")
+    parser.add_argument("--render-jobs", type=int, default=1,
+                        help="rendus de dashboard simultanés (chacun avec son pool de navigateurs)")
+    parser.add_argument("--linear", action="store_true", help="échelle linéaire du nuage de points")
+    parser.add_argument("--force", action="store_true", help="régénérer les rapports existants")
+    args = parser.parse_args()
+
+    pairs = parse_pairs(args)
+    if not pairs:
+        parser.error("aucune paire à générer (donner au moins deux villes, --pairs ou --all)")
+
+    if not os.environ.get("OPENAI_API_KEY") and not os.environ.get("LLM_BASE_URL"):
+        parser.error("OPENAI_API_KEY (ou LLM_BASE_URL) requis")
+
+    runner = BatchRunner(args.output_dir, args.question, not args.linear,
+                         args.llm_concurrency, args.render_jobs, args.force)
+
+    start = time.perf_counter()
+    cities = {city for pair in pairs for city in pair}
+    print(f"📂 Chargement de {len(cities)} villes...")
+    runner.load(cities)
+
+    print(f"📄 {len(pairs)} rapports → {args.output_dir}")
+    outcomes = {}
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(runner.run_pair, *pair): pair for pair in pairs}
+        for done, future in enumerate(as_completed(futures), start=1):
+            city1, city2 = futures[future]
+            try:
+                outcome = future.result()
+                print(f"✅ [{done}/{len(pairs)}] {city1} vs {city2} : {outcome}")
+            except Exception as e:
+                outcome = "erreur"
+                print(f"❌ [{done}/{len(pairs)}] {city1} vs {city2} : {e}")
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    stats = runner.assistant.cache_stats()
+    print(f"\n🏁 Terminé en {time.perf_counter() - start:.0f}s : "
+          + ", ".join(f"{n} {outcome}" for outcome, n in outcomes.items()))
+    if stats:
+        print(f"   Cache IA : {stats['hits']} hits / {stats['misses']} misses")
+
+
+if __name__ == "__main__":
+    main()
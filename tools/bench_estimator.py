@@ -0,0 +1,79 @@
+# tools/bench_estimator.py
+"""
+Benchmark de l'estimateur de loyer par comparables (core/estimator.py).
+
+Les requêtes sont tirées des annonces de la ville (position décalée de
+~300 m, surface de ±15 %) pour ressembler à de vrais logements. Le script
+affiche le temps de construction de l'index, la latence d'une requête
+isolée et le débit des requêtes groupées selon la taille du lot.
+
+    python -m tools.bench_estimator nice
+    python -m tools.bench_estimator marseille --queries 50000 --k 20
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from core.data_loader import load_city_dataframe
+from core.estimator import DEFAULT_K, RentEstimator
+
+BATCH_SIZES = [1, 10, 100, 1000, 10000]
+
+
+def sample_queries(df, n: int, seed: int = 0):
+    """(lon, lat, surface, pièces) réalistes, tirés des annonces de la ville."""
+    rng = np.random.default_rng(seed)
+    sample = df.dropna(subset=["lon", "lat", "livingSpace"]).sample(n, replace=True, random_state=seed)
+    lon = sample["lon"].to_numpy() + rng.normal(0, 0.003, n)
+    lat = sample["lat"].to_numpy() + rng.normal(0, 0.003, n)
+    surface = np.clip(sample["livingSpace"].to_numpy() * rng.uniform(0.85, 1.15, n), 9, 400)
+    rooms = np.clip(sample["numberOfRooms"].fillna(2).to_numpy(), 1, 10)
+    return lon, lat, surface, rooms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'estimateur de loyer")
+    parser.add_argument("city")
+    parser.add_argument("--queries", type=int, default=10000, help="requêtes par mesure de débit")
+    parser.add_argument("--single", type=int, default=2000, help="requêtes isolées mesurées")
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help="comparables par estimation")
+    args = parser.parse_args()
+
+    df = load_city_dataframe(args.city.lower())
+    if df.empty:
+        raise SystemExit(f"❌ Aucune donnée pour {args.city}")
+
+    start = time.perf_counter()
+    estimator = RentEstimator(df)
+    build = time.perf_counter() - start
+    print(f"🏗️ Index : {len(estimator)} comparables sur {len(df)} annonces en {build * 1000:.1f} ms")
+
+    lon, lat, surface, rooms = sample_queries(df, max(args.queries, args.single))
+
+    # Requêtes isolées (cas de l'interface)
+    latencies = []
+    for i in range(args.single):
+        t = time.perf_counter()
+        estimator.estimate(lon[i], lat[i], surface[i], rooms[i], k=args.k)
+        latencies.append(time.perf_counter() - t)
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f"⏱️ Requête isolée : médiane {statistics.median(latencies) * 1e6:.0f} µs, "
+          f"p99 {p99 * 1e6:.0f} µs ({len(latencies) / sum(latencies):,.0f} req/s)")
+
+    # Requêtes groupées
+    print(f"\n{'lot':>8}{'durée':>12}{'req/s':>14}")
+    for batch in [b for b in BATCH_SIZES if b <= args.queries]:
+        t = time.perf_counter()
+        for i in range(0, args.queries, batch):
+            j = slice(i, i + batch)
+            estimator.estimate_many(lon[j], lat[j], surface[j], rooms[j], k=args.k)
+        elapsed = time.perf_counter() - t
+        print(f"{batch:>8}{elapsed * 1000:>10.1f}ms{args.queries / elapsed:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# tools/bench_report.py
+"""
+Benchmark de bout en bout de la génération d'un rapport comparatif.
+
+Chaque passe charge les données, rend le dashboard en images puis appelle
+`generate_comparison_report`, et affiche le temps passé par phase :
+rendu, encodage des images, appels LLM et mise en page du PDF.
+
+Par défaut les appels LLM partent vers le serveur local de substitution
+(tools/llm_standin.py, démarré dans le processus) et le cache des réponses
+est ignoré, pour des mesures reproductibles et sans coût.
+
+Chaque passe part à froid : caches de figures, de comparaisons et de
+DataFrames vidés, caches disque des rendus (snapshots, images d'impression)
+redirigés vers un dossier neuf. Avec `--warm`, les caches sont conservés
+entre les passes : la première est froide, les suivantes chaudes.
+
+
+    python -m tools.bench_report annecy nice --runs 3 --latency 2 --concurrency 4
+    python -m tools.bench_report annecy nice --base-url https://api.openai.com/v1
+    python -m tools.bench_report annecy nice --runs 3 --warm
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from core import data_loader
+from core.geo import get_city_coords
+from gpt_agent.gpt_assistant import GPTAssistant, IMAGE_ENCODE_SECONDS, LLM_FIRST_TOKEN_SECONDS, LLM_SECONDS
+from gpt_agent.pdf_generator import LLM_CONCURRENCY, PDF_LAYOUT_SECONDS, generate_comparison_report
+from image_service.compress import print_cache
+from image_service.dashboard_to_image import dashboard_to_image
+from image_service.snapshot_cache import snapshot_cache
+from tools.llm_standin import StandinConfig, start_standin
+from viz import compare
+from viz.cache import figure_cache
+from viz.compare import load_comparison
+from viz.dashboard import dashboard_figures
+
+PHASES = ["données", "rendu", "encodage Σ", "LLM Σ", "LLM 1er fragment moy.", "mise en page PDF", "rapport", "total"]
+
+PHASE_HISTOGRAMS = {
+    "encode": IMAGE_ENCODE_SECONDS,
+    "llm": LLM_SECONDS,
+    "first_token": LLM_FIRST_TOKEN_SECONDS,
+    "layout": PDF_LAYOUT_SECONDS,
+}
+
+
+def _snapshot():
+    """Sommes et compteurs cumulés des histogrammes de phase."""
+    return {name: (h.sum(), h.count()) for name, h in PHASE_HISTOGRAMS.items()}
+
+
+def cold_caches(cache_dir: str) -> None:
+    """Vide les caches mémoire et redirige les caches disque vers `cache_dir` (vide)."""
+    figure_cache.clear()
+    compare._comparisons.clear()
+    data_loader._frames.clear()
+    snapshot_cache.root = Path(cache_dir) / "snapshots"
+    print_cache.root = Path(cache_dir) / "print"
+
+
+def run_once(city1, city2, assistant, concurrency, output_dir):
+    timings = {}
+    start = time.perf_counter()
+
+    comparison = load_comparison([city1, city2])
+    pair = comparison.subset([city1, city2])
+    coords1, coords2 = get_city_coords(city1.lower()), get_city_coords(city2.lower())
+    timings["données"] = time.perf_counter() - start
+
+    t = time.perf_counter()
+    plots, decks = dashboard_figures(pair, True, coords1, coords2)
+    dash_img = dashboard_to_image(plt=plots, pdk=decks, output_dir=output_dir)
+    timings["rendu"] = time.perf_counter() - t
+
+    before = _snapshot()
+    t = time.perf_counter()
+
+    generate_comparison_report(
+        city1=city1,
+        city2=city2,
+        df1=pair.frame(city1),
+        df2=pair.frame(city2),
+        stats1=pair.stats[city1],
+        stats2=pair.stats[city2],
+        weekly1=pair.weekly_prices(city1),
+        weekly2=pair.weekly_prices(city2),
+        question="Quelle ville est la plus attractive pour investir ?",
+        output_path=os.path.join(output_dir, "rapport.pdf"),
+        dashboard_image_path=dash_img,
+        assistant=assistant,
+        image_dir=output_dir,
+        max_concurrency=concurrency,
+    )
+    timings["rapport"] = time.perf_counter() - t
+
+    after = _snapshot()
+    delta = {name: (after[name][0] - before[name][0], after[name][1] - before[name][1]) for name in after}
+    timings["encodage Σ"] = delta["encode"][0]
+    timings["LLM Σ"] = delta["llm"][0]
+    first_sum, first_count = delta["first_token"]
+    timings["LLM 1er fragment moy."] = first_sum / first_count if first_count else 0.0
+    timings["mise en page PDF"] = delta["layout"][0]
+    timings["total"] = time.perf_counter() - start
+    return timings
+
+
+def print_table(runs, warm=False):
+    width = max(len(p) for p in PHASES)
+    labels = [f"#{i + 1}" + ("" if warm and i else "*") for i in range(len(runs))]
+    header = "".join(f"{label:>9}" for label in labels)
+    # En mode --warm, la médiane ne porte que sur les passes chaudes
+    measured = runs[1:] if warm and len(runs) > 1 else runs
+    print(f"\n{'phase':<{width}}{header}{'médiane':>10}")
+    for phase in PHASES:
+        cells = "".join(f"{run[phase]:>8.2f}s" for run in runs)
+        median = statistics.median(run[phase] for run in measured)
+        print(f"{phase:<{width}}{cells}{median:>9.2f}s")
+    print("\n* : passe à froid (caches vides)."
+          + (" Médiane des passes chaudes." if warm and len(runs) > 1 else ""))
+    print("\nΣ : temps cumulé des appels (concurrents), pas un temps écoulé.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de génération des rapports")
+    parser.add_argument("city1")
+    parser.add_argument("city2")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=LLM_CONCURRENCY)
+    parser.add_argument("--base-url", default=None, help="backend LLM (défaut : serveur local de substitution)")
+    parser.add_argument("--latency", type=float, default=1.0, help="substitut : délai avant le premier fragment (s)")
+    parser.add_argument("--words-per-sec", type=float, default=40.0, help="substitut : débit de génération")
+    parser.add_argument("--image-latency", type=float, default=0.5, help="substitut : surcoût par image (s)")
+    parser.add_argument("--use-cache", action="store_true", help="utiliser le cache des réponses LLM")
+    parser.add_argument("--warm", action="store_true",
+                        help="conserver les caches entre les passes (1re passe froide, suivantes chaudes)")
+    args = parser.parse_args()
+
+    base_url = args.base_url
+    if base_url is None:
+        server = start_standin(config=StandinConfig(args.latency, args.words_per_sec, args.image_latency))
+        base_url = f"http://127.0.0.1:{server.server_port}/v1"
+        os.environ.setdefault("OPENAI_API_KEY", "standin")
+        print(f"🤖 LLM de substitution sur {base_url}")
+
+    assistant = GPTAssistant(base_url=base_url, use_cache=args.use_cache)
+
+    runs = []
+    snapshot_root, print_root = snapshot_cache.root, print_cache.root
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench_report_") as tmp:
+            for i in range(args.runs):
+                print(f"⏱️ Passe {i + 1}/{args.runs}...")
+                run_dir = os.path.join(tmp, f"run{i + 1}")
+                os.makedirs(run_dir)
+                if i == 0 or not args.warm:
+                    cold_caches(os.path.join(run_dir, "cache"))
+                runs.append(run_once(args.city1, args.city2, assistant, args.concurrency, run_dir))
+    finally:
+        snapshot_cache.root, print_cache.root = snapshot_root, print_root
+
+    print_table(runs, warm=args.warm)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# tools/check_import_budget.py
+"""
+Budget de temps d'import des pages Streamlit.
+
+Pour chaque page, les imports de premier niveau du script sont exécutés
+dans un interpréteur neuf (comme au démarrage à froid d'un hôte), plusieurs
+fois ; on garde le meilleur temps. Le coût d'une page est mesuré au-delà de
+l'import de Streamlit lui-même, commun à toutes les pages et hors de notre
+contrôle.
+
+Une page est en régression si son coût dépasse son budget ou si elle charge
+une dépendance lourde interdite au premier affichage (Selenium, reportlab,
+OpenAI...). Dans ce cas les modules les plus coûteux sont listés
+(`python -X importtime`) et le code de sortie vaut 1.
+
+Seuls les modules chargés par la page elle-même comptent : ceux que
+Streamlit importe déjà (relevés dans le même interpréteur, juste après
+`import streamlit`) ne sont ni interdits ni facturés à la page.
+
+    python -m tools.check_import_budget
+    python -m tools.check_import_budget --runs 5 pages/2_Visualiser.py
+"""
+
+import argparse
+import ast
+import json
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY = ("pandas", "numpy", "requests", "shapely", "plotly", "pydeck",
+         "selenium", "reportlab", "openai", "PIL")
+
+
+@dataclass
+class Budget:
+    ms: float                   # coût maximal au-delà de l'import de Streamlit
+    forbidden: tuple = HEAVY    # modules qui ne doivent pas être chargés
+
+
+BUDGETS = {
+    "app.py": Budget(20),
+    "pages/1_Scrapper.py": Budget(60),
+    "pages/2_Visualiser.py": Budget(60),
+    "pages/3_Configuration.py": Budget(20),
+}
+
+# Exécuté dans le sous-processus : temps de Streamlit seul, puis de la page
+PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import streamlit
+base = time.perf_counter() - start
+base_modules = set(sys.modules)
+exec(compile({source!r}, {page!r}, "exec"), {{"__name__": "__page__"}})
+total = time.perf_counter() - start
+print(json.dumps({{"base": base, "total": total, "modules": sorted(set(sys.modules) - base_modules)}}))
+"""
+
+
+def top_level_imports(page: Path) -> str:
+    """Instructions `import` de premier niveau du script (le code UI n'est pas exécuté)."""
+    tree = ast.parse(page.read_text(encoding="utf-8"))
+    nodes = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.unparse(node) for node in nodes)
+
+
+def _probe(page: str, source: str, importtime: bool = False):
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", PROBE.format(root=str(ROOT), source=source, page=page)]
+    return subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+
+
+def measure(page: str, runs: int) -> dict:
+    source = top_level_imports(ROOT / page)
+    best = None
+    for _ in range(runs):
+        result = _probe(page, source)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1])
+        data = json.loads(result.stdout.strip().splitlines()[-1])
+        if best is None or data["total"] < best["total"]:
+            best = data
+    return best
+
+
+def heaviest_imports(page: str, limit: int = 5) -> list:
+    """Imports de premier niveau les plus coûteux (cumul en ms) d'après -X importtime."""
+    result = _probe(page, top_level_imports(ROOT / page), importtime=True)
+    costs = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Un seul espace d'indentation : import direct (pas une dépendance transitive)
+        if name.startswith(" ") and not name.startswith("  ") and "streamlit" not in name:
+            costs.append((int(cumulative) / 1000, name.strip()))
+    return sorted(costs, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Budget de temps d'import des pages Streamlit")
+    parser.add_argument("pages", nargs="*", help="pages à mesurer (défaut : toutes)")
+    parser.add_argument("--runs", type=int, default=3, help="mesures par page (on garde la meilleure)")
+    args = parser.parse_args()
+
+    pages = args.pages or list(BUDGETS)
+    failures = 0
+    print(f"{'page':<28}{'total':>9}{'coût':>9}{'budget':>9}")
+    for page in pages:
+        budget = BUDGETS.get(page, Budget(60))
+        try:
+            data = measure(page, args.runs)
+        except RuntimeError as e:
+            print(f"❌ {page} : import impossible ({e})")
+            failures += 1
+            continue
+
+        cost = (data["total"] - data["base"]) * 1000
+        # Modules chargés par la page seule (hors dépendances de Streamlit)
+        loaded = sorted({m.split(".")[0] for m in data["modules"]} & set(budget.forbidden))
+        ok = cost <= budget.ms and not loaded
+        print(f"{'✅' if ok else '❌'} {page:<25}{data['total'] * 1000:>7.0f}ms"
+              f"{cost:>7.0f}ms{budget.ms:>7.0f}ms")
+        if ok:
+            continue
+
+        failures += 1
+        if loaded:
+            print(f"   Dépendances lourdes chargées : {', '.join(loaded)}")
+        for ms, name in heaviest_imports(page):
+            print(f"   {ms:>8.0f}ms  {name}")
+
+    if failures:
+        print(f"\n❌ {failures} page(s) hors budget")
+        sys.exit(1)
+    print("\n✅ Toutes les pages respectent leur budget")
+
+
+if __name__ == "__main__":
+    main()
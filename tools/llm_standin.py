@@ -0,0 +1,205 @@
+# tools/llm_standin.py
+"""
+Serveur local qui imite l'endpoint `POST /v1/responses` d'OpenAI.
+
+Il renvoie un texte fixe avec une latence configurable (délai avant le
+premier fragment + débit en mots/seconde), en réponse complète ou en flux
+SSE ; si un objet JSON est demandé, ce texte est répété pour chaque clé
+"chart_N" citée dans le prompt. Sert à mesurer et optimiser la génération
+des rapports hors ligne.
+
+    python -m tools.llm_standin --port 8765 --latency 2 --words-per-sec 40
+    LLM_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=standin streamlit run app.py
+"""
+
+import argparse
+import itertools
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PORT = 8765
+
+CANNED_TEXT = (
+    "Les deux marchés présentent des profils contrastés. Le prix médian au m² "
+    "reste plus élevé dans la première ville, porté par une offre de petites "
+    "surfaces, tandis que la seconde propose davantage de grands logements à "
+    "un prix unitaire plus modéré. L'évolution hebdomadaire est globalement "
+    "stable, sans tendance marquée sur la période observée.\n\n"
+    "La répartition géographique montre une concentration des annonces dans "
+    "les quartiers centraux. Pour un investissement locatif, la seconde ville "
+    "offre un meilleur rapport surface/prix, la première une demande plus "
+    "soutenue."
+)
+
+_ids = itertools.count(1)
+
+
+class StandinConfig:
+    def __init__(self, latency: float = 1.0, words_per_sec: float = 40.0,
+                 image_latency: float = 0.5, text: str = CANNED_TEXT):
+        self.latency = latency              # délai avant le premier fragment (s)
+        self.words_per_sec = words_per_sec  # débit de génération (0 = instantané)
+        self.image_latency = image_latency  # surcoût par image en entrée (s)
+        self.text = text
+
+
+def _input_text(body: dict) -> str:
+    texts = []
+    for message in body.get("input") or []:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, str):
+            texts.append(content)
+        elif isinstance(content, list):
+            texts.extend(part.get("text", "") for part in content if part.get("type") == "input_text")
+    return "\n".join(texts)
+
+
+def _answer(body: dict, config) -> str:
+    """Texte fixe, ou objet JSON {clé: texte} si le format JSON est demandé."""
+    fmt = ((body.get("text") or {}).get("format") or {}).get("type")
+    if fmt != "json_object":
+        return config.text
+    keys = dict.fromkeys(re.findall(r'"(chart_\d+)"', _input_text(body)))
+    return json.dumps({key: config.text for key in keys}, ensure_ascii=False)
+
+
+def _count_images(body: dict) -> int:
+    count = 0
+    for message in body.get("input") or []:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, list):
+            count += sum(1 for part in content if part.get("type") == "input_image")
+    return count
+
+
+def _response(model: str, response_id: str, text: str, status: str = "completed") -> dict:
+    output = []
+    if status == "completed":
+        output.append({
+            "type": "message",
+            "id": f"msg_{response_id}",
+            "status": "completed",
+            "role": "assistant",
+            "content": [{"type": "output_text", "text": text, "annotations": []}],
+        })
+    return {
+        "id": response_id,
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": model,
+        "status": status,
+        "output": output,
+        "parallel_tool_calls": False,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": {
+            "input_tokens": 0,
+            "output_tokens": len(text.split()),
+            "total_tokens": len(text.split()),
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens_details": {"reasoning_tokens": 0},
+        },
+    }
+
+
+def make_handler(config: StandinConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            if self.path.rstrip("/") not in ("/v1/responses", "/responses"):
+                self.send_error(404)
+                return
+
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            model = body.get("model", "standin")
+            response_id = f"resp_standin_{next(_ids)}"
+
+            time.sleep(config.latency + config.image_latency * _count_images(body))
+            text = _answer(body, config)
+
+            if body.get("stream"):
+                self._stream(model, response_id, text)
+            else:
+                if config.words_per_sec:
+                    time.sleep(len(text.split()) / config.words_per_sec)
+                payload = json.dumps(_response(model, response_id, text)).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        def _stream(self, model: str, response_id: str, text: str):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+            sequence = itertools.count()
+
+            def send(event: dict):
+                event["sequence_number"] = next(sequence)
+                chunk = f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+                self.wfile.write(chunk.encode("utf-8"))
+                self.wfile.flush()
+
+            send({"type": "response.created",
+                  "response": _response(model, response_id, "", status="in_progress")})
+
+            delay = 1 / config.words_per_sec if config.words_per_sec else 0
+            words = text.split(" ")
+            for i, word in enumerate(words):
+                send({
+                    "type": "response.output_text.delta",
+                    "item_id": f"msg_{response_id}",
+                    "output_index": 0,
+                    "content_index": 0,
+                    "delta": word if i == 0 else " " + word,
+                    "logprobs": [],
+                })
+                time.sleep(delay)
+
+            send({"type": "response.completed",
+                  "response": _response(model, response_id, text)})
+
+    return Handler
+
+
+def start_standin(port: int = 0, host: str = "127.0.0.1", config: StandinConfig = None):
+    """
+    Démarre le serveur dans un thread démon et le retourne.
+    `port=0` choisit un port libre ; l'URL de base est
+    f"http://{host}:{server.server_port}/v1".
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(config or StandinConfig()))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serveur LLM local de substitution (API Responses)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=1.0, help="délai avant le premier fragment (s)")
+    parser.add_argument("--words-per-sec", type=float, default=40.0, help="débit de génération (0 = instantané)")
+    parser.add_argument("--image-latency", type=float, default=0.5, help="surcoût par image (s)")
+    args = parser.parse_args()
+
+    config = StandinConfig(args.latency, args.words_per_sec, args.image_latency)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(config))
+    server.daemon_threads = True
+    print(f"🤖 LLM de substitution sur http://127.0.0.1:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,76 @@
+# tools/warm_place_ids.py
+"""
+Pré-remplit le cache des identifiants de lieux SeLoger (data/place_ids.json).
+
+Chaque commune de `data/merged_cities_communes.csv` rattachée à son
+département (communes avec population de `core.commune_index`) absente du
+cache (ou expirée) est résolue une fois, avec un seul client HTTP ; le cache est
+écrit par lots, si bien qu'un préchauffage interrompu reprend où il
+s'était arrêté. Ensuite, START dans la page Scrapper ne fait plus aucun
+appel réseau pour ces villes.
+
+    python -m tools.warm_place_ids
+    python -m tools.warm_place_ids --limit 50 --force
+"""
+
+import argparse
+
+from core.commune_index import commune_index
+from core.exceptions import SessionExpiredError
+from core.http import BrowserSession, HttpClient
+from core.location import cached_place, fetch_place, remember_places
+
+# Requêtes résolues entre deux écritures du cache
+FLUSH_EVERY = 20
+
+
+def communes() -> list:
+    """(nom, département) des communes peuplées, les plus grandes d'abord."""
+    return [(c.name, c.departement) for c in commune_index().communes if c.population]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Préchauffage du cache des identifiants de lieux")
+    parser.add_argument("--limit", type=int, default=None, help="nombre maximal de communes à résoudre")
+    parser.add_argument("--force", action="store_true", help="résoudre aussi les communes déjà en cache")
+    args = parser.parse_args()
+
+    names = communes()
+    todo = [place for place in names if args.force or cached_place(*place) is None]
+    if args.limit is not None:
+        todo = todo[:args.limit]
+    print(f"📍 {len(names) - len(todo)} communes en cache, {len(todo)} à résoudre")
+
+    client = HttpClient(BrowserSession())
+    pending, unresolved = {}, []
+    try:
+        for i, (name, departement) in enumerate(todo, start=1):
+            try:
+                loc_id, loc_name = fetch_place(name, client, departement=departement)
+            except SessionExpiredError:
+                raise
+            except Exception as e:
+                print(f"⚠️ {name} ({departement}) : {e}")
+                unresolved.append(f"{name} ({departement})")
+                continue
+
+            if loc_id is None:
+                unresolved.append(f"{name} ({departement})")
+            else:
+                pending[(name, departement)] = (loc_id, loc_name)
+
+            if len(pending) >= FLUSH_EVERY:
+                remember_places(pending)
+                pending = {}
+                print(f"💾 {i}/{len(todo)}")
+    finally:
+        if pending:
+            remember_places(pending)
+
+    print(f"✅ Terminé : {len(todo) - len(unresolved)} résolues, {len(unresolved)} sans résultat")
+    if unresolved:
+        print("   " + ", ".join(unresolved[:20]) + (" ..." if len(unresolved) > 20 else ""))
+
+
+if __name__ == "__main__":
+    main()
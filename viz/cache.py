@@ -0,0 +1,114 @@
+# viz/cache.py
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+# Budget mémoire par défaut du cache de figures (taille du JSON sérialisé)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+@dataclass
+class CachedFigure:
+    """Figure (Plotly ou Pydeck) construite une seule fois avec son JSON sérialisé."""
+    figure: object
+    json: str
+
+    @property
+    def size(self) -> int:
+        return len(self.json)
+
+
+def figure_key(kind: str, cities, versions, **params) -> tuple:
+    """
+    Clé de cache : type de figure, villes, versions des données et paramètres
+    de tracé (use_log, zoom, mode de carte…).
+    """
+    return (kind, tuple(cities), tuple(versions), tuple(sorted(params.items())))
+
+
+class FigureCache:
+    """
+    Cache LRU de figures partagé par tout le processus.
+
+    Le Visualiser, l'export image et le rapport PDF réutilisent ainsi les mêmes
+    objets figure et le même JSON sérialisé. Les entrées les moins récemment
+    utilisées sont évincées dès que le budget mémoire est dépassé.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._by_figure = {}   # id(figure) → entrée, pour retrouver le JSON d'une figure
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, builder) -> CachedFigure:
+        """Retourne l'entrée pour `key`, en appelant `builder()` si absente."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        figure = builder()
+        entry = CachedFigure(figure=figure, json=figure.to_json())
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._forget(previous)
+            self._entries[key] = entry
+            self._by_figure[id(figure)] = entry
+            self._size += entry.size
+            self._evict()
+
+        return entry
+
+    def figure(self, key, builder):
+        """Raccourci : retourne directement l'objet figure."""
+        return self.get(key, builder).figure
+
+    def json(self, figure) -> str:
+        """
+        JSON d'une figure : celui déjà calculé si elle vient du cache,
+        sinon sérialisée à la demande (export image, rapport HTML).
+        """
+        with self._lock:
+            entry = self._by_figure.get(id(figure))
+        if entry is not None and entry.figure is figure:
+            return entry.json
+        return figure.to_json()
+
+    def _forget(self, entry):
+        self._size -= entry.size
+        if self._by_figure.get(id(entry.figure)) is entry:
+            del self._by_figure[id(entry.figure)]
+
+    def _evict(self):
+        # On garde toujours l'entrée la plus récente, même si elle dépasse le budget
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            _, old = self._entries.popitem(last=False)
+            self._forget(old)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_figure.clear()
+            self._size = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Instance partagée par toutes les sessions Streamlit du processus
+figure_cache = FigureCache()
+
+
+def figure_json(figure) -> str:
+    """JSON d'une figure, sans resérialiser celles du cache partagé."""
+    return figure_cache.json(figure)
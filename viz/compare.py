@@ -0,0 +1,178 @@
+# viz/compare.py
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from core.cache import LRUCache
+from core.data_loader import load_city_dataframe, dataset_version
+
+
+# Couleurs attribuées aux villes dans l'ordre de sélection
+CITY_PALETTE = [
+    "#0062f4",  # bleu
+    "#d400ff",  # violet
+    "#00ae00",  # vert
+    "#ff6b35",  # orange
+    "#17a2b8",  # cyan
+    "#ffc107",  # jaune
+    "#ce0e00",  # rouge
+    "#6c757d",  # gris
+    "#0f489d",  # bleu foncé
+    "#8b4513",  # marron
+]
+
+
+# Comparaisons partagées par toutes les sessions (clé : villes + versions)
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+
+@dataclass
+class CityComparison:
+    """
+    Résultat partagé d'une comparaison N villes.
+
+    Toutes les agrégations sont calculées en une seule passe groupée
+    sur le DataFrame concaténé ; les graphiques se construisent à partir
+    de cet objet sans recharger ni recalculer les données.
+    """
+    cities: list
+    data: pd.DataFrame
+    stats: dict
+    weekly: pd.DataFrame
+    counts: dict
+    colors: dict = field(default_factory=dict)
+    versions: dict = field(default_factory=dict)
+
+    def weekly_prices(self, city: str) -> list:
+        """Série des prix médians hebdomadaires d'une ville."""
+        return self.weekly.loc[self.weekly["city"] == city, "median_price_m2"].tolist()
+
+    def frame(self, city: str) -> pd.DataFrame:
+        """Sous-ensemble des annonces d'une ville."""
+        return self.data[self.data["city_role"] == city]
+
+    def subset(self, cities: list) -> "CityComparison":
+        """Restreint la comparaison à quelques villes sans rien recalculer."""
+        return CityComparison(
+            cities=list(cities),
+            data=self.data[self.data["city_role"].isin(cities)],
+            stats={c: self.stats[c] for c in cities},
+            weekly=self.weekly[self.weekly["city"].isin(cities)],
+            counts={c: self.counts[c] for c in cities},
+            colors={c: self.colors[c] for c in cities},
+            versions={c: self.versions.get(c) for c in cities},
+        )
+
+    def with_listings(self, cities: list = None) -> list:
+        """Villes (de la comparaison ou de `cities`) ayant au moins une annonce."""
+        return [c for c in (self.cities if cities is None else cities) if self.counts.get(c)]
+
+    def version_of(self, cities: list) -> list:
+        """Versions des données des villes données (clé de cache des figures)."""
+        return [self.versions.get(c) for c in cities]
+
+
+def _date_column(df: pd.DataFrame) -> str:
+    return "update_date" if "update_date" in df.columns else "creation_date"
+
+
+def compare_cities(frames: dict) -> CityComparison:
+    """
+    Calcule stats, séries hebdomadaires et distributions pour toutes les villes
+    en une seule passe groupée.
+
+    Les villes sans annonce sont conservées (count 0, médiane et moyenne None).
+
+    Args:
+        frames: Dictionnaire {nom de ville: DataFrame nettoyé}, dans l'ordre d'affichage
+
+    Raises:
+        ValueError: si aucune ville n'a d'annonce
+    """
+    cities = list(frames)
+
+    parts = []
+    for city, df in frames.items():
+        if df.empty:
+            continue
+        parts.append(
+            df.assign(
+                city_role=city,
+                week_date=pd.to_datetime(df[_date_column(df)], errors="coerce", utc=True),
+            )
+        )
+    if not parts:
+        raise ValueError("❌ Aucune annonce pour les villes sélectionnées")
+    data = pd.concat(parts, ignore_index=True)
+    data["city_role"] = pd.Categorical(data["city_role"], categories=cities)
+
+    grouped = data.groupby("city_role", observed=False)
+
+    # Stats globales (mêmes clés que viz.stats.basic_stats)
+    # Ville sans annonce : médiane et moyenne inconnues (None), pas 0
+    agg = grouped["price_m2"].agg(["size", "median", "mean"])
+    stats = {
+        city: {
+            "count": int(agg.at[city, "size"]),
+            "median": float(agg.at[city, "median"]) if agg.at[city, "size"] else None,
+            "mean": float(agg.at[city, "mean"]) if agg.at[city, "size"] else None,
+        }
+        for city in cities
+    }
+    counts = {city: stats[city]["count"] for city in cities}
+
+    # Médiane hebdomadaire + lissage, toutes villes confondues
+    dated = data.dropna(subset=["week_date"])
+    weeks = dated["week_date"].dt.tz_localize(None).dt.to_period("W").dt.start_time
+    weekly = (
+        dated.assign(week=weeks)
+        .groupby(["city_role", "week"], observed=True)["price_m2"]
+        .median()
+        .reset_index(name="median_price_m2")
+        .sort_values(["city_role", "week"])
+    )
+    weekly["city"] = weekly["city_role"].astype(str)
+    weekly["smooth"] = (
+        weekly.groupby("city_role", observed=True)["median_price_m2"]
+        .transform(lambda s: s.rolling(window=3, center=True, min_periods=1).median())
+    )
+    weekly["city_role"] = weekly["city"]
+    weekly = weekly.reset_index(drop=True)
+
+    data["city_role"] = data["city_role"].astype(str)
+    data["city"] = data["city_role"]
+    data = data.drop(columns=["week_date"])
+
+    colors = {city: CITY_PALETTE[i % len(CITY_PALETTE)] for i, city in enumerate(cities)}
+
+    return CityComparison(
+        cities=cities,
+        data=data,
+        stats=stats,
+        weekly=weekly,
+        counts=counts,
+        colors=colors,
+    )
+
+
+_comparisons = LRUCache(
+    MAX_CACHE_BYTES,
+    sizeof=lambda cmp: int(cmp.data.memory_usage(deep=True).sum()),
+)
+
+
+def load_comparison(cities: list) -> CityComparison:
+    """
+    Charge chaque ville une seule fois puis calcule la comparaison.
+    Le résultat est partagé entre sessions tant que les données n'ont pas changé.
+    """
+    frames = {city: load_city_dataframe(city.lower()) for city in cities}
+    versions = tuple(dataset_version(city) for city in cities)
+    key = (tuple(cities), versions)
+
+    comparison = _comparisons.get(key)
+    if comparison is None:
+        comparison = compare_cities(frames)
+        comparison.versions = {city: dataset_version(city) for city in comparison.cities}
+        _comparisons.put(key, comparison)
+    return comparison
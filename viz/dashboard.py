@@ -0,0 +1,40 @@
+# viz/dashboard.py
+from viz.cache import figure_cache, figure_key
+from viz.maps import make_price_map
+from viz.plots import price_surface_scatter, weekly_price_evolution, annonces_distribution_pie
+
+
+def cached_figure(kind, comparison, builder, **params):
+    """Figure mémoïsée par villes, version des données, couleurs et paramètres de tracé."""
+    cities = comparison.cities
+    colors = tuple(comparison.colors.get(city) for city in cities)
+    key = figure_key(kind, cities, comparison.version_of(cities), colors=colors, **params)
+    return figure_cache.figure(key, builder)
+
+
+def cached_map(comparison, city, coords, show_heatmap, zoom=11):
+    key = figure_key("map", [city], comparison.version_of([city]), show_heatmap=show_heatmap, zoom=zoom)
+    return figure_cache.figure(
+        key,
+        lambda: make_price_map(comparison.frame(city), coords["lat"], coords["lon"],
+                               show_heatmap=show_heatmap, zoom=zoom),
+    )
+
+
+def dashboard_figures(pair, use_log, coords1, coords2):
+    """Figures de l'export image, partagées entre « Analyser », le rapport PDF et les lots."""
+    city1, city2 = pair.cities
+    missing = [city for city in pair.cities if city not in pair.with_listings()]
+    if missing:
+        # Pas de carte ni de prix à comparer pour une ville vide
+        raise ValueError("❌ Aucune annonce pour : " + ", ".join(missing))
+    plots = [
+        cached_figure("pie", pair, lambda: annonces_distribution_pie(pair)),
+        cached_figure("scatter", pair, lambda: price_surface_scatter(pair, use_log=use_log), use_log=use_log),
+        cached_figure("weekly", pair, lambda: weekly_price_evolution(pair)),
+    ]
+    decks = [
+        cached_map(pair, city1, coords1, show_heatmap=False, zoom=13),
+        cached_map(pair, city2, coords2, show_heatmap=False, zoom=13),
+    ]
+    return plots, decks
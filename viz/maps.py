@@ -2,27 +2,24 @@
 import numpy as np
 import pydeck as pdk
 
+# Seules colonnes sérialisées dans le deck (position + infobulle) : le JSON
+# embarqué dans les exports HTML et envoyé au navigateur reste léger
+MAP_COLUMNS = ["lat", "lon", "price_m2", "livingSpace"]
+
+
 def make_price_map(df, lat, lon, show_heatmap=True, zoom=11):
-    df = df.copy()
+    df = df[[c for c in MAP_COLUMNS if c in df.columns]].copy()
 
     # --- Auto-échelle à partir des données ---
     p_low, p_high = np.percentile(df["price_m2"], [5, 95])
-    df["price_clipped"] = df["price_m2"].clip(p_low, p_high)
 
-    def price_to_color(p):
-        # On travaille sur les valeurs "clippées"
-        p = np.clip(p, p_low, p_high)
-        t = (p - p_low) / (p_high - p_low + 1e-9)
-        return [
-            int(255 * t),
-            int(30 * (1 - t)),
-            int(255 * (1 - t)),
-            255,
-        ]
+    # On travaille sur les valeurs "clippées"
+    t = (df["price_m2"].clip(p_low, p_high) - p_low) / (p_high - p_low + 1e-9)
 
-    df["color"] = df["price_m2"].apply(price_to_color)
-
-    df["weight"] = 1.0
+    # Précision suffisante pour l'affichage (~1 m), JSON plus compact
+    df["lat"] = df["lat"].round(5)
+    df["lon"] = df["lon"].round(5)
+    df["price_m2"] = df["price_m2"].round(0)
 
     # ---------------------------
     # 1. HEATMAP LAYER (optionnel)
@@ -30,6 +27,7 @@ def make_price_map(df, lat, lon, show_heatmap=True, zoom=11):
     layers = []
     
     if show_heatmap:
+        df["weight"] = 1.0
         heat = pdk.Layer(
             "HeatmapLayer",
             df,
@@ -51,6 +49,13 @@ def make_price_map(df, lat, lon, show_heatmap=True, zoom=11):
         # ---------------------------
         # 2. SCATTER LAYER (seulement si pas de heatmap)
         # ---------------------------
+        df["color"] = np.stack([
+            (255 * t).astype(int),
+            (30 * (1 - t)).astype(int),
+            (255 * (1 - t)).astype(int),
+            np.full(len(df), 255),
+        ], axis=1).tolist()
+
         points = pdk.Layer(
             "ScatterplotLayer",
             df,
@@ -1,5 +1,4 @@
 # core/viz/plots.py
-import pandas as pd
 import plotly.express as px
 
 
@@ -9,27 +8,22 @@ ROLE_COLORS = {
     "Ville 2": "rgba(255, 127, 14, 0.35)",  # orange
 }
 
+# Les graphiques prennent un viz.compare.CityComparison : les agrégats sont
+# calculés une seule fois pour toutes les villes puis partagés entre graphiques.
+
 
 # --------------------------------------------------
 # Scatter : Prix / Surface
 # --------------------------------------------------
-def price_surface_scatter(df1, df2, city1, city2, use_log=True):
-    # Fusion simple
-    df_all = pd.concat([
-        df1.assign(city=city1, city_role=city1),
-        df2.assign(city=city2, city_role=city2),
-    ], ignore_index=True)
-
+def price_surface_scatter(comparison, use_log=True):
     # Création du Scatter avec Marginals et Log
     fig = px.scatter(
-        df_all,
+        comparison.data,
         x="livingSpace",
         y="price_m2",
         color="city_role",                # Génère automatiquement la légende
-        color_discrete_map={              # Couleurs fixes
-            city1: "#0062f4", 
-            city2: "#d400ff"
-        },
+        color_discrete_map=comparison.colors,  # Couleurs fixes par ville
+        category_orders={"city_role": comparison.cities},
         opacity=0.5,                      # Transparence pour voir la densité
         log_x=use_log,                    # Échelle Log indispensable pour l'immo
         log_y=use_log,
@@ -58,17 +52,14 @@ def price_surface_scatter(df1, df2, city1, city2, use_log=True):
 # --------------------------------------------------
 # Courbe temporelle (classique, lisible)
 # --------------------------------------------------
-def weekly_price_evolution(weekly_df):
-    # Get unique cities for color mapping
-    cities = weekly_df["city_role"].unique()
-    color_map = {cities[0]: "#0062f4", cities[1]: "#d400ff"} if len(cities) >= 2 else {}
-    
+def weekly_price_evolution(comparison):
     fig = px.line(
-        weekly_df,
+        comparison.weekly,
         x="week",
         y="smooth",
         color="city_role",
-        color_discrete_map=color_map,
+        color_discrete_map=comparison.colors,
+        category_orders={"city_role": comparison.cities},
         title="Évolution du prix MÉDIAN au m² (hebdomadaire, lissé)",
         labels={
             "week": "Semaine",
@@ -88,18 +79,19 @@ def weekly_price_evolution(weekly_df):
 # --------------------------------------------------
 # Diagramme circulaire : Distribution des annonces
 # --------------------------------------------------
-def annonces_distribution_pie(df1, df2, city1, city2):
+def annonces_distribution_pie(comparison):
     """
-    Affiche un diagramme circulaire montrant la distribution des annonces entre les deux villes.
+    Affiche un diagramme circulaire montrant la distribution des annonces entre les villes.
     """
-    counts = [len(df1), len(df2)]
-    cities = [city1, city2]
+    cities = comparison.cities
+    counts = [comparison.counts[c] for c in cities]
     
     fig = px.pie(
         values=counts,
         names=cities,
         title="Distribution des annonces par ville",
-        color_discrete_sequence=["#0062f4", "#d400ff"],  # Bleu et violet
+        color=cities,
+        color_discrete_map=comparison.colors,
         hole=0.3  # Donut chart pour un look moderne
     )
     